@@ -0,0 +1,528 @@
+#!/usr/bin/env python3
+"""
+Benchmark suite for the WiFi Security Audit Tool
+
+Builds reproducible synthetic fixtures in a scratch directory (pcap and
+pcapng captures of several sizes, an authorization directory with
+thousands of .auth files, stub aircrack-ng/hashcat executables with a
+configurable latency) and measures the hot paths of the audit tool and
+the dictionary generator. Results are written as JSON so runs can be
+compared with --compare.
+
+Nothing outside the scratch directory is touched: the tool runs with
+its own configuration, and its log goes to benchmark.log in the scratch
+directory.
+"""
+
+import os
+import sys
+import json
+import time
+import random
+import shutil
+import struct
+import logging
+import platform
+import argparse
+import tempfile
+import datetime
+import statistics
+import subprocess
+
+REPO_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, REPO_DIR)
+os.environ.setdefault('TQDM_DISABLE', '1')
+
+# Imported by main() once the suite's logging is installed: importing the
+# tool first would let its basicConfig send the log to /var/log/wifi_security_audit.log
+sat = None
+dg = None
+
+AP_MAC = bytes.fromhex('001122334455')
+STATION_MAC = bytes.fromhex('66778899aabb')
+BROADCAST_MAC = b'\xff' * 6
+SNAP_EAPOL = bytes.fromhex('aaaa03000000888e')
+SNAP_IPV4 = bytes.fromhex('aaaa030000000800')
+RSN_IE = bytes.fromhex('30140100000fac040100000fac040100000fac020000')
+BENCH_SSID = 'BenchNet'
+
+CAPTURE_SIZES = {
+    'quick': (0, 1000, 10000),
+    'full': (0, 1000, 10000, 100000),
+}
+
+ENGINE_STUBS = {
+    'hashcat': """#!/bin/sh
+# hashcat stand-in: waits BENCH_ENGINE_LATENCY seconds, cracks if BENCH_CRACK=1
+if [ "$1" = "-b" ]; then echo "1:22000:0:0:12.3:500000.00"; exit 0; fi
+out=""
+while [ $# -gt 0 ]; do [ "$1" = "-o" ] && out="$2"; shift; done
+cat > /dev/null
+echo hashcat >> "$BENCH_ENGINE_LOG"
+sleep "${BENCH_ENGINE_LATENCY:-0}"
+echo "STATUS	3	SPEED	1000	1000	EXEC_RUNTIME	1	CURKU	1000	PROGRESS	1000	1000	RECHASH	0	1"
+if [ "${BENCH_CRACK:-0}" = "1" ]; then echo "password1" > "$out"; exit 0; fi
+exit 1
+""",
+    'aircrack-ng': """#!/bin/sh
+# aircrack-ng stand-in: waits BENCH_ENGINE_LATENCY seconds, cracks if BENCH_CRACK=1
+cat > /dev/null
+echo aircrack-ng >> "$BENCH_ENGINE_LOG"
+sleep "${BENCH_ENGINE_LATENCY:-0}"
+echo "[00:00:01] 1000/1000 keys tested (1000.00 k/s)"
+if [ "${BENCH_CRACK:-0}" = "1" ]; then echo "KEY FOUND! [ password1 ]"; else echo "KEY NOT FOUND"; fi
+""",
+}
+
+
+# Synthetic captures (802.11 frames without radiotap header)
+
+def _beacon(ssid, bssid):
+    ies = bytes([0, len(ssid)]) + ssid.encode() + RSN_IE
+    return (b'\x80\x00\x00\x00' + BROADCAST_MAC + bssid + bssid + b'\x00\x00'
+            + bytes(8) + struct.pack('<HH', 100, 0x1111) + ies)
+
+
+def _eapol_key(key_info, nonce, mic=bytes(16), keydata=b''):
+    body = (bytes([2]) + struct.pack('>HHQ', key_info, 16, 1) + nonce + bytes(16) + bytes(16)
+            + mic + struct.pack('>H', len(keydata)) + keydata)
+    return bytes([1, 3]) + struct.pack('>H', len(body)) + body
+
+
+def _data_frame(flags, addr1, addr2, addr3, payload):
+    return bytes([0x08, flags]) + b'\x00\x00' + addr1 + addr2 + addr3 + b'\x00\x00' + payload
+
+
+def capture_frames(ssid, bssid, filler, seed):
+    """Return the frames of a capture with one handshake plus `filler` unrelated data frames."""
+    rng = random.Random(seed)
+    anonce, snonce, mic = rng.randbytes(32), rng.randbytes(32), rng.randbytes(16)
+    frames = [
+        _beacon(ssid, bssid),
+        _data_frame(0x02, STATION_MAC, bssid, bssid, SNAP_EAPOL + _eapol_key(0x008a, anonce)),
+        _data_frame(0x01, bssid, STATION_MAC, bssid, SNAP_EAPOL + _eapol_key(0x010a, snonce, mic, RSN_IE)),
+    ]
+    for _ in range(filler):
+        frames.append(_data_frame(0x01, bssid, STATION_MAC, bssid, SNAP_IPV4 + rng.randbytes(rng.randint(40, 160))))
+    return frames
+
+
+def write_pcap(path, frames):
+    with open(path, 'wb') as f:
+        f.write(struct.pack('<IHHiIII', 0xa1b2c3d4, 2, 4, 0, 0, 65535, sat.LINKTYPE_IEEE802_11))
+        for index, frame in enumerate(frames):
+            f.write(struct.pack('<IIII', 1700000000 + index // 1000, index % 1000, len(frame), len(frame)))
+            f.write(frame)
+
+
+def write_pcapng(path, frames):
+    def block(block_type, body):
+        body += bytes(-len(body) % 4)
+        return struct.pack('<II', block_type, len(body) + 12) + body + struct.pack('<I', len(body) + 12)
+
+    with open(path, 'wb') as f:
+        f.write(block(0x0A0D0D0A, struct.pack('<IHHq', 0x1A2B3C4D, 1, 0, -1)))
+        f.write(block(1, struct.pack('<HHI', sat.LINKTYPE_IEEE802_11, 0, 65535)))
+        for index, frame in enumerate(frames):
+            f.write(block(6, struct.pack('<IIIII', 0, 0, index, len(frame), len(frame)) + frame))
+
+
+def write_capture(path, frames):
+    (write_pcapng if path.endswith('.pcapng') else write_pcap)(path, frames)
+    return path
+
+
+def write_auth_dir(auth_dir, count, ssid):
+    """Write `count` authorization documents; the last one authorizes `ssid`."""
+    os.makedirs(auth_dir, exist_ok=True)
+    year = datetime.date.today().year
+    for index in range(count):
+        name = ssid if index == count - 1 else f"Network-{index:06d}"
+        mac = AP_MAC if index == count - 1 else struct.pack('>IH', 0x02000000, index)
+        with open(os.path.join(auth_dir, f"{index:06d}.auth"), 'w') as f:
+            f.write(f"Network SSID: {name}\n"
+                    f"MAC Address: {':'.join(f'{b:02X}' for b in mac)}\n"
+                    f"Authorization Period: {year}-01-01 to {year}-12-31\n"
+                    f"Authorized by: Benchmark\n")
+
+
+def write_engine_stubs(bin_dir):
+    os.makedirs(bin_dir, exist_ok=True)
+    for name, script in ENGINE_STUBS.items():
+        path = os.path.join(bin_dir, name)
+        with open(path, 'w') as f:
+            f.write(script)
+        os.chmod(path, 0o755)
+
+
+def write_config(work_dir, auth_dir):
+    wordlist = os.path.join(work_dir, 'wordlist.txt')
+    with open(wordlist, 'w') as f:
+        f.writelines(f"candidate{index:05d}\n" for index in range(10000))
+    config_path = os.path.join(work_dir, 'config.ini')
+    with open(config_path, 'w') as f:
+        f.write(f"""[Directories]
+monitor_dir = {work_dir}/handshakes
+wordlist_path = {wordlist}
+auth_dir = {auth_dir}
+result_store = {work_dir}/results.db
+spool_dir = {work_dir}/spool
+
+[Email]
+server = 127.0.0.1
+port = 25
+starttls = false
+password =
+queue = {work_dir}/mail.db
+digest = all
+digest_interval = 1000000000
+
+[Security]
+require_authorization = true
+audit_logging = true
+local_network_only = false
+audit_log = {work_dir}/audit_events.jsonl
+audit_store = {work_dir}/audit.db
+audit_fsync_interval = 0
+
+[Analysis]
+engine_strategy = sequential
+benchmark_cache = {work_dir}/engine_benchmark.json
+
+[Processing]
+status_file = {work_dir}/status.json
+journal = {work_dir}/jobs.db
+""")
+    return config_path
+
+
+# Measurement helpers
+
+def measure(func, repeat):
+    """Run func `repeat` times; return min/median/max wall time in seconds."""
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        times.append(time.perf_counter() - start)
+    return {'min': min(times), 'median': statistics.median(times), 'max': max(times)}
+
+
+def percentile(values, fraction):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(round(fraction * (len(values) - 1))))]
+
+
+# Benchmarks; each returns a JSON-serializable dict
+
+def bench_extract(bench):
+    """_extract_ssid/_extract_mac on captures of increasing size, parsed cold and from the cache."""
+    results = {}
+    for filler in CAPTURE_SIZES[bench.size]:
+        for suffix in ('pcap', 'pcapng'):
+            path = write_capture(os.path.join(bench.work_dir, f"extract_{filler}.{suffix}"),
+                                 capture_frames(BENCH_SSID, AP_MAC, filler, filler))
+            assert bench.tool._extract_ssid(path) == BENCH_SSID and sat.capture_hash_lines(path)
+
+            def cold():
+                sat._parse_capture_cached.cache_clear()
+                bench.tool._extract_ssid(path)
+                bench.tool._extract_mac(path)
+
+            def warm():
+                for _ in range(1000):
+                    bench.tool._extract_ssid(path)
+                    bench.tool._extract_mac(path)
+
+            size = os.path.getsize(path)
+            cold_seconds = measure(cold, bench.repeat)
+            results[f"{suffix}_{filler + 3}_frames"] = {
+                'bytes': size,
+                'cold_seconds': cold_seconds,
+                'cold_mb_per_second': size / cold_seconds['median'] / 1e6,
+                'warm_call_seconds': measure(warm, bench.repeat)['median'] / 1000,
+            }
+    return results
+
+
+def bench_authorization(bench):
+    """_check_authorization against the large authorization directory."""
+    hit = write_capture(os.path.join(bench.work_dir, 'auth_hit.pcap'), capture_frames(BENCH_SSID, AP_MAC, 0, 1))
+    miss = write_capture(os.path.join(bench.work_dir, 'auth_miss.pcap'),
+                         capture_frames('Unlisted', bytes.fromhex('0a0b0c0d0e0f'), 0, 2))
+    calls = 1000
+
+    def build():
+        bench.tool.auth_index = sat.AuthorizationIndex(bench.auth_dir)
+        assert bench.tool._check_authorization(hit)
+
+    def lookups(path):
+        return lambda: [bench.tool._check_authorization(path) for _ in range(calls)]
+
+    index_build = measure(build, bench.repeat)
+    hit_seconds = measure(lookups(hit), bench.repeat)['median'] / calls
+    miss_seconds = measure(lookups(miss), bench.repeat)['median'] / calls
+    bench.tool.audit_sink.flush()
+    return {
+        'auth_files': bench.auth_files,
+        'index_build_seconds': index_build,
+        'hit_call_seconds': hit_seconds,
+        'miss_call_seconds': miss_seconds,
+        'checks_per_second': 2 / (hit_seconds + miss_seconds),
+    }
+
+
+def bench_process(bench):
+    """_process_handshake_file end to end with stub engines, then a repeated capture answered from the store."""
+    capture_dir = os.path.join(bench.work_dir, 'process')
+    os.makedirs(capture_dir, exist_ok=True)
+    paths = [write_capture(os.path.join(capture_dir, f"{index:04d}.{'pcapng' if index % 2 else 'pcap'}"),
+                           capture_frames(BENCH_SSID, AP_MAC, 100, 1000 + index))
+             for index in range(bench.captures)]
+    latencies = []
+    open(bench.engine_log, 'w').close()
+    start = time.perf_counter()
+    for path in paths:
+        call_start = time.perf_counter()
+        assert bench.tool._process_handshake_file(path)
+        latencies.append(time.perf_counter() - call_start)
+    elapsed = time.perf_counter() - start
+    with open(bench.engine_log, 'r') as f:
+        engine_runs = len(f.readlines())
+    repeated = measure(lambda: bench.tool._process_handshake_file(paths[0]), bench.repeat)
+    return {
+        'captures': len(paths),
+        'engine_latency_seconds': bench.engine_latency,
+        'crack': bench.crack,
+        'captures_per_second': len(paths) / elapsed,
+        'latency_seconds': {
+            'p50': percentile(latencies, 0.5),
+            'p95': percentile(latencies, 0.95),
+            'max': max(latencies),
+        },
+        'engine_runs': engine_runs,
+        'overhead_per_capture_seconds': (sum(latencies) - engine_runs * bench.engine_latency) / len(paths),
+        'repeated_capture_seconds': repeated,
+    }
+
+
+def bench_audit(bench):
+    """_log_audit_event: enqueue rate, and the rate including the write, store insert and an fsync per batch."""
+    events = bench.audit_events
+
+    def log_events():
+        for index in range(events):
+            bench.tool._log_audit_event("BENCHMARK", f"Benchmark event {index}", BENCH_SSID,
+                                        '00:11:22:33:44:55', "OK")
+
+    def log_and_flush():
+        log_events()
+        bench.tool.audit_sink.flush()
+
+    bench.tool.audit_sink.flush()
+    enqueue = measure(log_events, bench.repeat)
+    bench.tool.audit_sink.flush()
+    durable = measure(log_and_flush, bench.repeat)
+    return {
+        'events': events,
+        'enqueue_seconds': enqueue,
+        'enqueue_events_per_second': events / enqueue['median'],
+        'durable_seconds': durable,
+        'durable_events_per_second': events / durable['median'],
+    }
+
+
+def _stream_rate(chunks, limit):
+    """Consume a candidate stream up to `limit` candidates; return (candidates, bytes, seconds)."""
+    candidates = size = 0
+    start = time.perf_counter()
+    for chunk in chunks:
+        candidates += chunk.count(b'\n')
+        size += len(chunk)
+        if candidates >= limit:
+            break
+    return candidates, size, time.perf_counter() - start
+
+
+def bench_generator(bench):
+    """DictionaryGenerator throughput in memory (keyspace, rule patterns, deduplicated) and to disk."""
+    generator = dg.DictionaryGenerator()
+    charset = generator.build_charset(use_lowercase=True, use_digits=True)
+    base_words = [f"word{index}" for index in range(bench.base_words)]
+    limit = bench.keyspace_candidates
+    streams = {
+        'keyspace': lambda: generator.stream_wordlist(charset, 8, 8, use_patterns=False),
+        'patterns': lambda: generator.stream_wordlist(charset, 1, 0, base_words),
+        'patterns_dedup': lambda: generator.stream_wordlist(charset, 1, 0, base_words, dedup=True),
+    }
+    results = {}
+    for name, stream in streams.items():
+        runs = [_stream_rate(stream(), limit) for _ in range(bench.repeat)]
+        candidates, size, seconds = sorted(runs, key=lambda run: run[2])[len(runs) // 2]
+        results[name] = {
+            'candidates': candidates,
+            'seconds': seconds,
+            'candidates_per_second': candidates / seconds,
+            'mb_per_second': size / seconds / 1e6,
+        }
+
+    length = 6 if bench.size == 'quick' else 7
+    for compression in (None, 'gzip', 'zstd', 'lz4'):
+        if compression and compression not in dg.COMPRESSION_SUFFIXES:
+            continue
+        if (compression == 'zstd' and dg.zstandard is None) or (compression == 'lz4' and dg.lz4 is None):
+            continue
+        output_file = os.path.join(bench.work_dir, f"generated_{compression or 'plain'}.txt")
+        start = time.perf_counter()
+        count = generator.generate_wordlist(output_file, length, length, use_lowercase=False, use_digits=True,
+                                            use_patterns=False, benchmark_cache=bench.generator_cache,
+                                            compression=compression)
+        seconds = time.perf_counter() - start
+        results[f"file_{compression or 'plain'}"] = {
+            'candidates': count,
+            'seconds': seconds,
+            'candidates_per_second': count / seconds,
+            'mb_per_second': count * (length + 1) / seconds / 1e6,
+            'stored_bytes': os.path.getsize(output_file),
+        }
+        os.remove(output_file)
+    return results
+
+
+BENCHMARKS = {
+    'extract': bench_extract,
+    'authorization': bench_authorization,
+    'process': bench_process,
+    'audit': bench_audit,
+    'generator': bench_generator,
+}
+
+
+class Bench:
+    """Scratch directory, fixtures and tool instance shared by the benchmarks."""
+
+    def __init__(self, args, work_dir):
+        self.size = 'quick' if args.quick else 'full'
+        self.repeat = args.repeat
+        self.work_dir = work_dir
+        self.engine_latency = args.engine_latency
+        self.crack = args.crack
+        self.auth_files = args.auth_files or (1000 if args.quick else 5000)
+        self.captures = args.captures or (20 if args.quick else 100)
+        self.audit_events = 5000 if args.quick else 50000
+        self.base_words = 200 if args.quick else 2000
+        self.keyspace_candidates = 2000000 if args.quick else 20000000
+        self.generator_cache = os.path.join(work_dir, 'generator_benchmark.json')
+        self.auth_dir = os.path.join(work_dir, 'auth')
+
+        write_auth_dir(self.auth_dir, self.auth_files, BENCH_SSID)
+        bin_dir = os.path.join(work_dir, 'bin')
+        write_engine_stubs(bin_dir)
+        os.environ['PATH'] = bin_dir + os.pathsep + os.environ.get('PATH', '')
+        os.environ['BENCH_ENGINE_LATENCY'] = str(self.engine_latency)
+        os.environ['BENCH_CRACK'] = '1' if self.crack else '0'
+        self.engine_log = os.environ['BENCH_ENGINE_LOG'] = os.path.join(work_dir, 'engine_runs.log')
+        self.tool = sat.SecurityAuditTool(write_config(work_dir, self.auth_dir))
+
+    def close(self):
+        self.tool.cleanup()
+
+
+def _git_revision():
+    try:
+        return subprocess.run(['git', 'rev-parse', 'HEAD'], cwd=REPO_DIR, capture_output=True,
+                              text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def _flatten(results, prefix=''):
+    for key, value in results.items():
+        if isinstance(value, dict):
+            yield from _flatten(value, f"{prefix}{key}.")
+        elif isinstance(value, (int, float)) and not isinstance(value, bool):
+            yield f"{prefix}{key}", value
+
+
+def compare(baseline_path, results):
+    """Print every numeric metric next to its value in a baseline results file."""
+    with open(baseline_path, 'r') as f:
+        baseline = dict(_flatten(json.load(f)['results']))
+    print(f"{'metric':<60} {'baseline':>14} {'current':>14} {'ratio':>8}")
+    for key, value in _flatten(results):
+        if key in baseline:
+            ratio = f"{value / baseline[key]:.2f}" if baseline[key] else '-'
+            print(f"{key:<60} {baseline[key]:>14.6g} {value:>14.6g} {ratio:>8}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark suite for the WiFi Security Audit Tool')
+    parser.add_argument('benchmarks', nargs='*', metavar='BENCHMARK',
+                        help=f"Benchmarks to run (default: all of {', '.join(BENCHMARKS)})")
+    parser.add_argument('-o', '--output', help='Write the results as JSON to this file (default: stdout)')
+    parser.add_argument('--compare', metavar='FILE', help='Compare the results with an earlier results file')
+    parser.add_argument('--quick', action='store_true', help='Smaller fixtures for a fast run')
+    parser.add_argument('--repeat', type=int, default=3, help='Repetitions per measurement (default: 3)')
+    parser.add_argument('--engine-latency', type=float, default=0.05,
+                        help='Seconds each stub engine run takes (default: 0.05)')
+    parser.add_argument('--crack', action='store_true', help='Let the stub engines find the key')
+    parser.add_argument('--auth-files', type=int, help='Authorization files (default: 5000, quick 1000)')
+    parser.add_argument('--captures', type=int, help='Captures processed end to end (default: 100, quick 20)')
+    parser.add_argument('--work-dir', help='Scratch directory to keep (default: a temporary directory)')
+    parser.add_argument('--verbose', action='store_true', help='Also show the log on stderr')
+    args = parser.parse_args()
+    unknown = [name for name in args.benchmarks if name not in BENCHMARKS]
+    if unknown:
+        parser.error(f"unknown benchmark: {', '.join(unknown)}")
+
+    work_dir = args.work_dir or tempfile.mkdtemp(prefix='wifi_audit_bench_')
+    os.makedirs(work_dir, exist_ok=True)
+    handlers = [logging.FileHandler(os.path.join(work_dir, 'benchmark.log'))]
+    if args.verbose:
+        handlers.append(logging.StreamHandler())
+    root = logging.getLogger()
+    root.setLevel(logging.INFO)
+    for handler in handlers:
+        handler.setFormatter(logging.Formatter('%(asctime)s - %(name)s - %(levelname)s - %(message)s'))
+        root.addHandler(handler)
+
+    global sat, dg
+    import security_audit_tool as sat
+    import dictionary_generator as dg
+
+    bench = Bench(args, work_dir)
+    results = {}
+    try:
+        for name in args.benchmarks or BENCHMARKS:
+            print(f"Running {name} benchmark...", file=sys.stderr)
+            results[name] = BENCHMARKS[name](bench)
+    finally:
+        bench.close()
+        if not args.work_dir:
+            shutil.rmtree(work_dir, ignore_errors=True)
+
+    report = {
+        'meta': {
+            'timestamp': datetime.datetime.now().isoformat(timespec='seconds'),
+            'revision': _git_revision(),
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'cpu_count': os.cpu_count(),
+            'size': bench.size,
+            'repeat': args.repeat,
+            'engine_latency_seconds': args.engine_latency,
+        },
+        'results': results,
+    }
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(report, f, indent=2)
+    else:
+        json.dump(report, sys.stdout, indent=2)
+        print()
+    if args.compare:
+        compare(args.compare, results)
+
+
+if __name__ == "__main__":
+    main()
@@ -13,19 +13,433 @@ import string
 import itertools
 import logging
 import time
+import struct
+import hashlib
+import concurrent.futures
+import collections
+import functools
+import bisect
+import heapq
+import math
+import tempfile
+import shutil
+import json
+import socket
+import gzip
+import threading
+import numpy as np
 from tqdm import tqdm
 
+# Optional codecs for compressed output; gzip is always available
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+try:
+    import lz4.frame
+except ImportError:
+    lz4 = None
+
 # Configure logging
 logging.basicConfig(
     level=logging.INFO,
     format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
     handlers=[
-        logging.FileHandler("dictionary_generator.log"),
+        logging.FileHandler("dictionary_generator.log", delay=True),
         logging.StreamHandler()
     ]
 )
 logger = logging.getLogger("dictionary_generator")
 
+# Compiled wordlist layout (also read by security_audit_tool.CompiledWordlist):
+# magic, candidate count, length of the candidate block, SHA-256 of the
+# candidate block and the number of candidates of each length 8..63,
+# followed by the candidates as newline-terminated lines.
+WORDLIST_MAGIC = b'WPAWL\x00\x01\x00'
+WORDLIST_HEADER = struct.Struct('<8sQQ32s56Q')
+WORDLIST_MIN_LENGTH = 8   # WPA passphrases are 8 to 63 characters
+WORDLIST_MAX_LENGTH = 63
+
+PlanPhase = collections.namedtuple('PlanPhase', ['name', 'candidates', 'bytes'])
+PlanPhase.__doc__ = "One phase of a wordlist: what it adds to the output in candidates and bytes."
+
+WordlistPlan = collections.namedtuple('WordlistPlan', [
+    'phases', 'candidates', 'bytes', 'stored_bytes', 'free_bytes', 'generation_seconds', 'engine_seconds'
+])
+WordlistPlan.__doc__ = """Exact size of a wordlist before it is generated.
+
+stored_bytes is the size on disk: bytes, or for compressed output an
+estimate from compressing the start of the wordlist. free_bytes is the space available for the output (None when streaming),
+generation_seconds the estimate from the generator benchmark and
+engine_seconds maps each benchmarked engine to the time it needs to test
+every candidate. Estimates are None when no benchmark is available.
+"""
+
+GenerationLimits = collections.namedtuple('GenerationLimits', [
+    'max_candidates', 'max_bytes', 'max_seconds', 'reserve_bytes'
+], defaults=(None, None, None, 1024 ** 3))
+GenerationLimits.__doc__ = """Limits a plan must stay within to be generated; None means unlimited.
+
+reserve_bytes is left free on the target filesystem.
+"""
+
+COMPRESSION_SUFFIXES = {'gzip': '.gz', 'zstd': '.zst', 'lz4': '.lz4'}
+COMPRESSION_BLOCK = 4 * 1024 * 1024
+
+def _block_compressor(compression, level=None):
+    """Return a function compressing one block into a self-contained gzip member or zstd/lz4 frame."""
+    if compression == 'gzip':
+        return functools.partial(gzip.compress, compresslevel=level or 6, mtime=0)
+    if compression == 'zstd':
+        if zstandard is None:
+            raise ValueError("zstd compression needs the zstandard module")
+        # A compressor context must not be shared between threads
+        local = threading.local()
+        def compress(block):
+            if not hasattr(local, 'compressor'):
+                local.compressor = zstandard.ZstdCompressor(level=level or 3)
+            return local.compressor.compress(block)
+        return compress
+    if compression == 'lz4':
+        if lz4 is None:
+            raise ValueError("lz4 compression needs the lz4 module")
+        return functools.partial(lz4.frame.compress, compression_level=level or 0)
+    raise ValueError(f"Unknown compression: {compression}")
+
+
+class CompressedWriter:
+    """Binary file writer that compresses blocks in a thread pool.
+
+    Written data is cut into blocks of block_size bytes, each compressed
+    into an independent gzip member or zstd/lz4 frame; concatenated they
+    form one valid stream for the command line tools and for streaming
+    decompressors. The codecs release the GIL, so blocks are compressed
+    in parallel; they are written in order, with at most two per thread
+    in flight.
+    """
+
+    def __init__(self, path, compression, threads=0, level=None, block_size=COMPRESSION_BLOCK):
+        self.compress = _block_compressor(compression, level)
+        self.threads = threads or os.cpu_count() or 1
+        self.block_size = block_size
+        self.file = open(path, 'wb')
+        self.pool = concurrent.futures.ThreadPoolExecutor(max_workers=self.threads)
+        self.pending = collections.deque()
+        self.buffer = []
+        self.buffered = 0
+
+    def write(self, data):
+        self.buffer.append(data)
+        self.buffered += len(data)
+        if self.buffered >= self.block_size:
+            block = b''.join(self.buffer)
+            self.buffer, self.buffered = [], 0
+            for start in range(0, len(block) - self.block_size + 1, self.block_size):
+                self._submit(block[start:start + self.block_size])
+            rest = len(block) % self.block_size
+            if rest:
+                self.buffer, self.buffered = [block[-rest:]], rest
+
+    def _submit(self, block):
+        while len(self.pending) >= 2 * self.threads:
+            self.file.write(self.pending.popleft().result())
+        self.pending.append(self.pool.submit(self.compress, block))
+
+    def close(self):
+        if self.buffered:
+            self._submit(b''.join(self.buffer))
+            self.buffer, self.buffered = [], 0
+        while self.pending:
+            self.file.write(self.pending.popleft().result())
+        self.pool.shutdown()
+        self.file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+def _comment_header():
+    """Return the comment lines at the top of a generated wordlist."""
+    return ("# Dictionary generated for authorized security assessment\n"
+            f"# Generated: {time.strftime('%Y-%m-%d %H:%M:%S')}\n"
+            "# This file should be used only for legitimate security auditing\n"
+            "# with proper authorization from the network owner.\n\n")
+
+def _format_bytes(size):
+    for unit in ('B', 'KiB', 'MiB', 'GiB', 'TiB', 'PiB'):
+        if size < 1024 or unit == 'PiB':
+            return f"{size:.0f} {unit}" if unit == 'B' else f"{size:.1f} {unit}"
+        size /= 1024
+
+def _format_duration(seconds):
+    if seconds is None:
+        return "unknown (no benchmark)"
+    if seconds < 60:
+        return f"{seconds:.1f} s"
+    if seconds < 86400:
+        return f"{seconds // 3600:.0f} h {seconds % 3600 // 60:.0f} min"
+    return f"{seconds / 86400:,.1f} days"
+
+def _parse_size(value):
+    """argparse type for byte sizes with an optional K, M, G or T suffix."""
+    units = {'K': 1024, 'M': 1024 ** 2, 'G': 1024 ** 3, 'T': 1024 ** 4}
+    value = value.strip().upper().rstrip('IB') or '0'
+    try:
+        if value[-1] in units:
+            return int(float(value[:-1]) * units[value[-1]])
+        return int(value)
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"invalid size: {value}")
+
+def _keyspace_layout(radix, length, block_size):
+    """Split a keyspace into (prefix length, suffix length).
+
+    The last positions vary fastest; as many of them as fit into one
+    block form the suffix, whose combinations are built only once.
+    """
+    suffix_length = 0
+    while suffix_length < length and radix ** (suffix_length + 1) <= block_size:
+        suffix_length += 1
+    return length - suffix_length, suffix_length
+
+
+def _keyspace_blocks(charset, length, block_size, first_prefix=0, last_prefix=None):
+    """Yield the itertools.product(charset, repeat=length) keyspace as newline-terminated byte blocks.
+    
+    The suffix combinations (see _keyspace_layout) are built once and
+    reused below every prefix. Each block covers consecutive prefixes,
+    whose mixed-radix digits are mapped to charset bytes through a
+    lookup table. first_prefix and last_prefix select a shard.
+    """
+    radix = len(charset)
+    prefix_length, suffix_length = _keyspace_layout(radix, length, block_size)
+    suffix_rows = radix ** suffix_length
+    total_prefixes = radix ** prefix_length
+    if last_prefix is None:
+        last_prefix = total_prefixes
+    try:
+        lut = np.frombuffer(charset.encode('ascii'), dtype=np.uint8)
+    except UnicodeEncodeError:
+        # Multi-byte characters do not fit fixed-width rows
+        combos = itertools.product(charset, repeat=length)
+        for combo in itertools.islice(combos, first_prefix * suffix_rows, last_prefix * suffix_rows):
+            yield (''.join(combo) + '\n').encode()
+        return
+    suffix_index = np.arange(suffix_rows)
+    suffix = np.empty((suffix_rows, suffix_length), dtype=np.uint8)
+    for position in range(suffix_length):
+        suffix[:, position] = lut[suffix_index // radix ** (suffix_length - 1 - position) % radix]
+    
+    prefixes_per_block = max(1, block_size // suffix_rows)
+    block = np.empty((suffix_rows * prefixes_per_block, length + 1), dtype=np.uint8)
+    block[:, prefix_length:length] = np.tile(suffix, (prefixes_per_block, 1))
+    block[:, length] = ord('\n')
+    
+    for start in range(first_prefix, last_prefix, prefixes_per_block):
+        prefixes = min(prefixes_per_block, last_prefix - start)
+        rows = block[:suffix_rows * prefixes]
+        if prefix_length:
+            # Python integers beyond int64 for keyspaces too large for NumPy's fixed-width types
+            if total_prefixes < 2 ** 63:
+                index = np.arange(start, start + prefixes, dtype=np.int64)
+            else:
+                index = np.array(range(start, start + prefixes), dtype=object)
+            for position in range(prefix_length):
+                digits = (index // radix ** (prefix_length - 1 - position) % radix).astype(np.intp)
+                rows[:, position] = np.repeat(lut[digits], suffix_rows)
+        yield rows.tobytes()
+
+
+def _write_keyspace_shard(output_file, offset, charset, length, block_size, first_prefix, last_prefix):
+    """Process pool task: write one shard of a keyspace at its offset. Returns the candidate count."""
+    count = 0
+    with open(output_file, 'r+b') as f:
+        f.seek(offset)
+        for block in _keyspace_blocks(charset, length, block_size, first_prefix, last_prefix):
+            f.write(block)
+            count += len(block) // (length + 1)
+    return count
+
+
+# Pattern rules, one per line. Each rule is a chain of operations applied
+# to a base word from left to right; an operation that takes a set yields
+# one candidate per element:
+#   :            the word unchanged
+#   l u c t      lowercase, uppercase, capitalize, toggle case
+#   $SET  ^SET   append / prepend each element of SET
+#   sXY          substitute every X with Y
+# A SET is @name (a set in DictionaryGenerator.patterns), {a,b,c},
+# a numeric range {1990-2029} or a single literal.
+DEFAULT_RULES = """\
+# Base word, with years and with common suffixes
+:
+$@years
+$@common_suffixes
+# Capitalized, with years and with common suffixes
+c
+c $@years
+c $@common_suffixes
+"""
+
+RULE_CASES = {
+    'l': str.lower,
+    'u': str.upper,
+    'c': str.capitalize,
+    't': str.swapcase,
+}
+
+def _rule_set(spec, named_sets):
+    """Resolve the SET argument of an append or prepend operation."""
+    if spec.startswith('@'):
+        if spec[1:] not in named_sets:
+            raise ValueError(f"unknown set {spec}")
+        return list(named_sets[spec[1:]])
+    if len(spec) > 1 and spec.startswith('{') and spec.endswith('}'):
+        bounds = spec[1:-1].split('-')
+        if len(bounds) == 2 and all(bound.isdigit() for bound in bounds):
+            width = len(bounds[0]) if bounds[0].startswith('0') else 0
+            return [str(n).zfill(width) for n in range(int(bounds[0]), int(bounds[1]) + 1)]
+        return spec[1:-1].split(',')
+    if not spec:
+        raise ValueError("empty set")
+    return [spec]
+
+def _compile_rule(rule, named_sets):
+    """Compile one rule into a list of steps, each mapping an iterator of words to an iterator of words."""
+    steps = []
+    for token in rule.split():
+        op, arg = token[0], token[1:]
+        if op == ':' and not arg:
+            continue
+        if op in RULE_CASES and not arg:
+            steps.append(functools.partial(map, RULE_CASES[op]))
+        elif op == '$':
+            values = _rule_set(arg, named_sets)
+            steps.append(lambda words, values=values: (word + value for word in words for value in values))
+        elif op == '^':
+            values = _rule_set(arg, named_sets)
+            steps.append(lambda words, values=values: (value + word for word in words for value in values))
+        elif op == 's' and len(arg) == 2:
+            steps.append(lambda words, old=arg[0], new=arg[1]: (word.replace(old, new) for word in words))
+        else:
+            raise ValueError(f"invalid operation '{token}'")
+    return steps
+
+DEDUP_MEMORY = 256 * 1024 ** 2   # default memory budget of the dedup stage
+
+class BloomFilter:
+    """Fixed-size Bloom filter over byte strings.
+
+    The bit array is sized for `expected` items at a false positive rate
+    of about one in ten million, but never beyond memory_bytes; a full
+    budget raises the false positive rate instead of the memory use.
+    """
+
+    def __init__(self, memory_bytes, expected):
+        wanted = -max(1, expected) * math.log(1e-7) / math.log(2) ** 2
+        self.size = max(8192, min(memory_bytes * 8, int(wanted)))
+        self.hashes = max(1, min(16, round(self.size / max(1, expected) * math.log(2))))
+        self.bits = bytearray((self.size + 7) // 8)
+
+    def add(self, item):
+        """Add item; return True if it was (probably) present already."""
+        digest = hashlib.blake2b(item, digest_size=16).digest()
+        h1, h2 = struct.unpack('<QQ', digest)
+        present = True
+        for i in range(self.hashes):
+            bit = (h1 + i * h2) % self.size
+            if not self.bits[bit >> 3] & (1 << (bit & 7)):
+                present = False
+                self.bits[bit >> 3] |= 1 << (bit & 7)
+        return present
+
+
+def strip_comment_header(chunks):
+    """Drop the comment and blank lines at the top of a stream of byte chunks, as compile_wordlist does."""
+    chunks = iter(chunks)
+    head = b''
+    for chunk in chunks:
+        head += chunk
+        while head[:1] in (b'#', b'\r', b'\n'):
+            end = head.find(b'\n')
+            if end < 0:
+                break   # The rest of this line is in the next chunk
+            head = head[end + 1:]
+        else:
+            if head:
+                yield head
+                yield from chunks
+                return
+
+
+def skip_lines(chunks, skip):
+    """Drop the first `skip` lines from a stream of byte chunks."""
+    for chunk in chunks:
+        if skip:
+            count = chunk.count(b'\n')
+            if count < skip:
+                skip -= count
+                continue
+            position = -1
+            for _ in range(skip):
+                position = chunk.index(b'\n', position + 1)
+            chunk = chunk[position + 1:]
+            skip = 0
+        if chunk:
+            yield chunk
+
+
+RUN_RECORD = struct.Struct('<QI')   # position and length of a line in a sorted run
+
+def _write_run(run, directory):
+    """Sort a run of (line, position) pairs and spill it to a temporary file."""
+    run.sort()
+    fd, path = tempfile.mkstemp(dir=directory, suffix='.run')
+    with os.fdopen(fd, 'wb', buffering=1024 * 1024) as f:
+        for line, position in run:
+            f.write(RUN_RECORD.pack(position, len(line)))
+            f.write(line)
+    return path
+
+def _read_run(path):
+    with open(path, 'rb', buffering=1024 * 1024) as f:
+        while True:
+            record = f.read(RUN_RECORD.size)
+            if not record:
+                return
+            position, length = RUN_RECORD.unpack(record)
+            yield f.read(length), position
+
+def _write_positions(positions, directory):
+    """Sort line positions and spill them to a temporary .npy file."""
+    fd, path = tempfile.mkstemp(dir=directory, suffix='.npy')
+    with os.fdopen(fd, 'wb') as f:
+        np.save(f, np.sort(np.array(positions, dtype=np.uint64)))
+    return path
+
+def _read_positions(path):
+    positions = np.load(path, mmap_mode='r')
+    for start in range(0, len(positions), 65536):
+        yield from positions[start:start + 65536].tolist()
+
+
+def _line_chunks(candidates, chunk_size):
+    """Join candidates into newline-terminated byte chunks of about chunk_size bytes."""
+    chunk, size = [], 0
+    for candidate in candidates:
+        line = f"{candidate}\n".encode()
+        chunk.append(line)
+        size += len(line)
+        if size >= chunk_size:
+            yield b''.join(chunk)
+            chunk, size = [], 0
+    if chunk:
+        yield b''.join(chunk)
+
+
 class DictionaryGenerator:
     def __init__(self):
         """Initialize the DictionaryGenerator with character sets."""
@@ -37,91 +451,137 @@ class DictionaryGenerator:
             'all': string.ascii_lowercase + string.ascii_uppercase + string.digits + string.punctuation
         }
         
-        # Common password patterns
+        # Common password patterns, available to rules as named sets
         self.patterns = {
             'years': [str(year) for year in range(1990, 2030)],
             'common_suffixes': ['123', '1234', '12345', '123456', '!', '#', '@', '$']
         }
+        self.rules = self.compile_rules(DEFAULT_RULES)
+        self.rules_text = DEFAULT_RULES
+        self.duplicates = 0
+
+    def compile_rules(self, text):
+        """Compile pattern rules (see DEFAULT_RULES) into chains of generator steps."""
+        rules = []
+        for number, line in enumerate(text.splitlines(), 1):
+            line = line.strip()
+            if not line or line.startswith('#'):
+                continue
+            try:
+                rules.append(_compile_rule(line, self.patterns))
+            except ValueError as e:
+                raise ValueError(f"Invalid rule on line {number} ({line}): {str(e)}")
+        return rules
+
+    def load_rules(self, rules_file):
+        """Replace the pattern rules with those in rules_file."""
+        with open(rules_file, 'r') as f:
+            text = f.read()
+        self.rules = self.compile_rules(text)
+        self.rules_text = text
+        logger.info(f"Loaded {len(self.rules)} pattern rules from {rules_file}")
 
-    def generate_fixed_length(self, charset, length, output_file, batch_size=1000000):
-        """Generate all possible combinations of fixed length."""
+    def generate_fixed_length(self, charset, length, output_file, batch_size=1000000, workers=1):
+        """Generate all possible combinations of fixed length.
+        
+        The output is in itertools.product order. Blocks of up to
+        batch_size candidates are built as byte matrices in NumPy and
+        written whole. With several workers, the keyspace is split into
+        index ranges generated by a process pool; every candidate has the
+        same width, so each shard is written straight to its final offset.
+        """
         logger.info(f"Generating fixed length passwords (length={length})")
-        count = 0
         
         # Calculate total combinations for progress bar and warning
         total = len(charset) ** length
         if total > 1000000000:  # If more than a billion combinations
             logger.warning(f"Generating {total} combinations. This may take a very long time and create a large file.")
             logger.warning("Such large dictionaries are rarely effective and may consume excessive resources.")
-            confirm = input("Continue? (y/n): ")
-            if confirm.lower() != 'y':
-                return 0
         
-        with open(output_file, 'a') as f:
-            # Use itertools.product to generate all combinations
-            batch = []
-            for combo in tqdm(itertools.product(charset, repeat=length), total=total):
-                password = ''.join(combo)
-                batch.append(password)
-                count += 1
-                
-                # Write in batches to improve performance
-                if len(batch) >= batch_size:
-                    f.write('\n'.join(batch) + '\n')
-                    batch = []
-            
-            # Write any remaining passwords
-            if batch:
-                f.write('\n'.join(batch) + '\n')
+        if workers > 1 and charset.isascii():
+            return self._generate_sharded(charset, length, output_file, batch_size, workers, total)
+        
+        count = 0
+        with open(output_file, 'ab') as f, tqdm(total=total, unit=' passwords') as progress:
+            for block in _keyspace_blocks(charset, length, batch_size):
+                f.write(block)
+                rows = len(block) // (length + 1)
+                count += rows
+                progress.update(rows)
                 
         return count
 
-    def generate_range_length(self, charset, min_length, max_length, output_file):
+    def _generate_sharded(self, charset, length, output_file, batch_size, workers, total):
+        """Generate one length's keyspace in a process pool, in place at the end of output_file."""
+        prefix_length, suffix_length = _keyspace_layout(len(charset), length, batch_size)
+        prefixes, suffix_rows = len(charset) ** prefix_length, len(charset) ** suffix_length
+        # A few shards per worker keep the pool busy when shards finish unevenly
+        shard_count = min(prefixes, workers * 4)
+        bounds = [prefixes * i // shard_count for i in range(shard_count + 1)]
+        
+        with open(output_file, 'ab') as f:
+            base = f.tell()
+            f.truncate(base + total * (length + 1))
+        
+        count = 0
+        with concurrent.futures.ProcessPoolExecutor(max_workers=workers) as pool, \
+                tqdm(total=total, unit=' passwords') as progress:
+            shards = [
+                pool.submit(_write_keyspace_shard, output_file, base + bounds[i] * suffix_rows * (length + 1),
+                            charset, length, batch_size, bounds[i], bounds[i + 1])
+                for i in range(shard_count)
+            ]
+            for shard in concurrent.futures.as_completed(shards):
+                rows = shard.result()
+                count += rows
+                progress.update(rows)
+        return count
+
+    def generate_range_length(self, charset, min_length, max_length, output_file, workers=1):
         """Generate passwords with lengths in the specified range."""
         total_count = 0
         for length in range(min_length, max_length + 1):
-            count = self.generate_fixed_length(charset, length, output_file)
+            count = self.generate_fixed_length(charset, length, output_file, workers=workers)
             total_count += count
         return total_count
 
     def generate_with_common_patterns(self, base_words, output_file):
-        """Generate passwords using common patterns with base words."""
-        logger.info("Generating passwords with common patterns")
+        """Generate passwords by applying the pattern rules to the base words."""
+        logger.info(f"Generating passwords with {len(self.rules)} pattern rules")
         count = 0
         
-        with open(output_file, 'a') as f:
-            for word in tqdm(base_words):
-                # Original word
-                f.write(f"{word}\n")
-                count += 1
-                
-                # Word with years
-                for year in self.patterns['years']:
-                    f.write(f"{word}{year}\n")
-                    count += 1
-                
-                # Word with common suffixes
-                for suffix in self.patterns['common_suffixes']:
-                    f.write(f"{word}{suffix}\n")
-                    count += 1
-                    
-                # Capitalize first letter
-                cap_word = word.capitalize()
-                if cap_word != word:
-                    f.write(f"{cap_word}\n")
-                    count += 1
-                    
-                    # Capitalized with years and suffixes
-                    for year in self.patterns['years']:
-                        f.write(f"{cap_word}{year}\n")
-                        count += 1
-                    
-                    for suffix in self.patterns['common_suffixes']:
-                        f.write(f"{cap_word}{suffix}\n")
-                        count += 1
+        with open(output_file, 'ab') as f:
+            for chunk in _line_chunks(tqdm(self._pattern_candidates(base_words), unit=' passwords'), 1024 * 1024):
+                f.write(chunk)
+                count += chunk.count(b'\n')
         
         return count
 
+    def _pattern_candidates(self, base_words):
+        """Yield the rule expansions of the base words.
+        
+        Each rule is a chain of generators; a word's expansion is the
+        concatenation of its rule chains, with duplicates dropped (e.g. a
+        capitalize rule on a word that is already capitalized). Repeated
+        base words are expanded once.
+        """
+        for word in dict.fromkeys(base_words):
+            seen = set()
+            for steps in self.rules:
+                words = iter((word,))
+                for step in steps:
+                    words = step(words)
+                for candidate in words:
+                    if candidate not in seen:
+                        seen.add(candidate)
+                        yield candidate
+
+    def _word_candidates(self, base_words, use_patterns):
+        """Yield the base words and then their pattern expansions, without holding the expansions in memory."""
+        yield from base_words
+        if base_words and use_patterns:
+            yield from self._pattern_candidates(base_words)
+
     def add_base_words(self, base_words_file, output_file):
         """Add custom base words from a file."""
         if not os.path.exists(base_words_file):
@@ -142,11 +602,13 @@ class DictionaryGenerator:
         logger.info(f"Added {count} base words from {base_words_file}")
         return base_words
 
-    def generate_wordlist(self, output_file, min_length=8, max_length=10, 
-                         use_lowercase=True, use_uppercase=False, use_digits=True, 
-                         use_special=False, base_words_file=None, use_patterns=True):
-        """Generate a complete wordlist based on specified parameters."""
-        # Initialize charset based on parameters
+    def read_base_words(self, base_words_file):
+        """Return the words of a base words file, one per non-empty line."""
+        with open(base_words_file, 'r') as f:
+            return [word for word in (line.strip() for line in f) if word]
+
+    def build_charset(self, use_lowercase=True, use_uppercase=False, use_digits=True, use_special=False):
+        """Concatenate the selected character sets."""
         charset = ''
         if use_lowercase:
             charset += self.charsets['lowercase']
@@ -156,7 +618,374 @@ class DictionaryGenerator:
             charset += self.charsets['digits']
         if use_special:
             charset += self.charsets['special']
+        return charset
+
+    def count_candidates(self, charset, min_length, max_length, base_words=(), use_patterns=True):
+        """Return the number of candidates stream_wordlist() yields for these parameters."""
+        return self.plan_wordlist(charset, min_length, max_length, base_words, use_patterns).candidates
+
+    def plan_wordlist(self, charset, min_length, max_length, base_words=(), use_patterns=True,
+                      output_file=None, benchmark_cache=None, engine_benchmark=None, workers=1,
+                      compression=None, compression_threads=0):
+        """Compute the exact candidates and bytes of every phase without generating anything.
+        
+        With an uncompressed output_file the plan includes the comment
+        header; with any output_file it includes the free space on its filesystem (counting the file it replaces).
+        Generation time is estimated from the benchmark in benchmark_cache,
+        measured first if missing or stale, and engine time from the audit
+        tool's engine benchmark cache. For compressed output, the stored
+        size and compression time are extrapolated from compressing the
+        first blocks of the wordlist.
+        """
+        phases = []
+        if output_file and not compression:
+            phases.append(PlanPhase('header', 0, len(_comment_header().encode())))
+        if base_words:
+            phases.append(PlanPhase('base words', len(base_words),
+                                    sum(len(word.encode()) + 1 for word in base_words)))
+        if base_words and use_patterns:
+            count = size = 0
+            for candidate in self._pattern_candidates(base_words):
+                count += 1
+                size += len(candidate.encode()) + 1
+            phases.append(PlanPhase('patterns', count, size))
+        width = len(charset[0].encode()) if charset.isascii() else None
+        for length in range(min_length, max_length + 1):
+            count = len(charset) ** length
+            if width is not None:
+                size = count * (length * width + 1)
+            else:
+                # Each position takes every character equally often
+                size = count + length * len(charset) ** (length - 1) * len(charset.encode())
+            phases.append(PlanPhase(f'length {length}', count, size))
+        
+        candidates = sum(phase.candidates for phase in phases)
+        total_bytes = sum(phase.bytes for phase in phases)
+        free_bytes = None
+        if output_file:
+            directory = os.path.dirname(os.path.abspath(output_file))
+            while not os.path.isdir(directory):
+                directory = os.path.dirname(directory)
+            free_bytes = shutil.disk_usage(directory).free
+            if os.path.isfile(output_file):
+                free_bytes += os.path.getsize(output_file)
+        
+        generation_seconds = None
+        if benchmark_cache:
+            rate = self.benchmark(benchmark_cache)
+            if rate:
+                generation_seconds = total_bytes / (rate * max(1, min(workers, os.cpu_count() or 1)))
+        engine_seconds = {}
+        if engine_benchmark:
+            try:
+                with open(engine_benchmark, 'r') as f:
+                    rates = json.load(f).get(socket.gethostname()) or {}
+            except (OSError, ValueError):
+                rates = {}
+            for engine in ('aircrack-ng', 'hashcat'):
+                if rates.get(engine):
+                    engine_seconds[engine] = candidates / rates[engine]
+        stored_bytes = total_bytes
+        if compression and total_bytes:
+            sample = b''.join(itertools.islice(
+                self.stream_wordlist(charset, min_length, max_length, base_words, use_patterns), 4))
+            compress = _block_compressor(compression)
+            start = time.perf_counter()
+            compressed = sum(len(compress(sample[i:i + COMPRESSION_BLOCK]))
+                             for i in range(0, len(sample), COMPRESSION_BLOCK))
+            elapsed = time.perf_counter() - start
+            stored_bytes = int(total_bytes * compressed / len(sample))
+            compression_seconds = elapsed * total_bytes / len(sample) / (compression_threads or os.cpu_count() or 1)
+            # Generation and compression overlap; the slower one sets the pace
+            generation_seconds = max(generation_seconds or 0, compression_seconds)
+        return WordlistPlan(phases, candidates, total_bytes, stored_bytes, free_bytes,
+                            generation_seconds, engine_seconds)
+
+    def check_plan(self, plan, limits):
+        """Return the reasons a plan exceeds the limits; empty if it may be generated."""
+        problems = []
+        if limits.max_candidates is not None and plan.candidates > limits.max_candidates:
+            problems.append(f"{plan.candidates:,} candidates exceed the limit of {limits.max_candidates:,}")
+        if limits.max_bytes is not None and plan.stored_bytes > limits.max_bytes:
+            problems.append(f"{_format_bytes(plan.stored_bytes)} exceed the limit of {_format_bytes(limits.max_bytes)}")
+        if plan.free_bytes is not None and plan.stored_bytes > plan.free_bytes - (limits.reserve_bytes or 0):
+            problems.append(f"{_format_bytes(plan.stored_bytes)} do not fit into {_format_bytes(plan.free_bytes)} free "
+                            f"with {_format_bytes(limits.reserve_bytes or 0)} reserved")
+        if limits.max_seconds is not None and plan.generation_seconds is not None \
+                and plan.generation_seconds > limits.max_seconds:
+            problems.append(f"estimated generation time {_format_duration(plan.generation_seconds)} exceeds "
+                            f"the limit of {_format_duration(limits.max_seconds)}")
+        return problems
+
+    def format_plan(self, plan):
+        """Render a plan as a table for --plan."""
+        lines = [f"{'Phase':<16}{'Candidates':>26}{'Bytes':>16}"]
+        for phase in plan.phases:
+            lines.append(f"{phase.name:<16}{phase.candidates:>26,}{_format_bytes(phase.bytes):>16}")
+        lines.append(f"{'total':<16}{plan.candidates:>26,}{_format_bytes(plan.bytes):>16}")
+        lines.append("")
+        if plan.stored_bytes != plan.bytes:
+            lines.append(f"Compressed size:    {_format_bytes(plan.stored_bytes)} (estimated)")
+        if plan.free_bytes is not None:
+            lines.append(f"Free space:         {_format_bytes(plan.free_bytes)}")
+        lines.append(f"Generation time:    {_format_duration(plan.generation_seconds)}")
+        for engine in ('aircrack-ng', 'hashcat'):
+            lines.append(f"{engine + ' time:':<20}{_format_duration(plan.engine_seconds.get(engine))}")
+        return "\n".join(lines)
+
+    def benchmark(self, cache_path, max_age_days=7):
+        """Return the keyspace generation rate in bytes per second.
+        
+        The rate is cached per host in cache_path and measured again
+        (for about half a second, in memory) once it is older than
+        max_age_days. Returns None if it can be neither read nor measured.
+        """
+        hostname = socket.gethostname()
+        try:
+            with open(cache_path, 'r') as f:
+                cache = json.load(f)
+        except (OSError, ValueError):
+            cache = {}
+        entry = cache.get(hostname)
+        if entry and time.time() - entry.get('measured_at', 0) <= max_age_days * 86400:
+            return entry.get('bytes_per_second')
+        
+        generated, start = 0, time.perf_counter()
+        for block in _keyspace_blocks(string.ascii_lowercase + string.digits, 8, 1000000):
+            generated += len(block)
+            if time.perf_counter() - start >= 0.5:
+                break
+        rate = generated / (time.perf_counter() - start)
+        logger.info(f"Generator benchmark: {_format_bytes(rate)}/s")
+        cache[hostname] = {'bytes_per_second': rate, 'measured_at': time.time()}
+        try:
+            os.makedirs(os.path.dirname(os.path.abspath(cache_path)), exist_ok=True)
+            tmp_path = f"{cache_path}.tmp"
+            with open(tmp_path, 'w') as f:
+                json.dump(cache, f, indent=2)
+            os.replace(tmp_path, cache_path)
+        except OSError as e:
+            logger.error(f"Error writing benchmark cache {cache_path}: {str(e)}")
+        return rate
+
+    def stream_wordlist(self, charset, min_length, max_length, base_words=(), use_patterns=True,
+                        skip=0, chunk_size=1024 * 1024, dedup=False, dedup_memory=DEDUP_MEMORY):
+        """Return the candidates of generate_wordlist() as an iterator of newline-terminated byte chunks.
+        
+        Nothing is written to disk, so the chunks can be piped straight
+        into a cracking engine. The stream starts at candidate `skip`;
+        whole lengths and keyspace prefixes before it are skipped
+        arithmetically instead of being generated. With dedup, repeated
+        candidates are dropped (see _dedup_phases) and counted in
+        self.duplicates; the skipped part is then generated and dropped.
+        """
+        self.duplicates = 0
+        if dedup:
+            return skip_lines(self._dedup_phases(charset, min_length, max_length, base_words,
+                                                 use_patterns, chunk_size, dedup_memory), skip)
+        return self._stream_phases(charset, min_length, max_length, base_words, use_patterns, skip, chunk_size)
+
+    def _stream_phases(self, charset, min_length, max_length, base_words, use_patterns, skip, chunk_size):
+        words = 0
+        
+        def counted_words():
+            nonlocal words
+            for words, word in enumerate(self._word_candidates(base_words, use_patterns), 1):
+                yield word
+        
+        yield from _line_chunks(itertools.islice(counted_words(), skip, None), chunk_size)
+        skip = max(0, skip - words)
+        
+        for length in range(min_length, max_length + 1):
+            total = len(charset) ** length
+            if skip >= total:
+                skip -= total
+                continue
+            block_size = max(1, chunk_size // (length + 1))
+            suffix_rows = len(charset) ** _keyspace_layout(len(charset), length, block_size)[1]
+            first_prefix, skip = divmod(skip, suffix_rows)
+            blocks = _keyspace_blocks(charset, length, block_size, first_prefix)
+            if not charset.isascii():
+                # One candidate per block without the fixed-width fast path
+                yield from itertools.islice(blocks, skip, None)
+            elif skip:
+                yield next(blocks)[skip * (length + 1):]
+                yield from blocks
+            else:
+                yield from blocks
+            skip = 0
+
+    def _dedup_phases(self, charset, min_length, max_length, base_words, use_patterns, chunk_size, memory_bytes):
+        """Stream all phases without repeated candidates.
+        
+        Each length's keyspace is free of repeats by construction, so only
+        the base word and pattern phases pass through a Bloom filter
+        bounded by memory_bytes. Those of their candidates that also lie
+        in a keyspace are remembered by row index and cut out of the
+        keyspace blocks, which therefore never need a lookup per row.
+        The filter is sized by a counting pass over the patterns, so they
+        are expanded twice but never held in memory.
+        """
+        self.duplicates = 0
+        seen = BloomFilter(memory_bytes, sum(1 for _ in self._word_candidates(base_words, use_patterns)))
+        digits = {char: i for i, char in enumerate(charset)}
+        keyspace_rows = collections.defaultdict(list)
+        
+        def unique_words():
+            for word in self._word_candidates(base_words, use_patterns):
+                if seen.add(word.encode()):
+                    self.duplicates += 1
+                    continue
+                if min_length <= len(word) <= max_length and all(char in digits for char in word):
+                    row = 0
+                    for char in word:
+                        row = row * len(charset) + digits[char]
+                    keyspace_rows[len(word)].append(row)
+                yield word
+        
+        yield from _line_chunks(unique_words(), chunk_size)
+        
+        for length in range(min_length, max_length + 1):
+            drop = sorted(keyspace_rows[length])
+            first_row = 0
+            for block in _keyspace_blocks(charset, length, max(1, chunk_size // (length + 1))):
+                # One candidate per block without the fixed-width fast path
+                rows = len(block) // (length + 1) if charset.isascii() else 1
+                lo, hi = bisect.bisect_left(drop, first_row), bisect.bisect_left(drop, first_row + rows)
+                if hi > lo:
+                    self.duplicates += hi - lo
+                    if rows == 1:
+                        block = b''
+                    else:
+                        matrix = np.frombuffer(block, dtype=np.uint8).reshape(rows, length + 1)
+                        block = np.delete(matrix, [row - first_row for row in drop[lo:hi]], axis=0).tobytes()
+                first_row += rows
+                if block:
+                    yield block
+
+    def dedup_file(self, file_path, memory_bytes=DEDUP_MEMORY):
+        """Remove repeated lines from a file in place, keeping first occurrences in order.
+        
+        An external sort bounded by memory_bytes: runs of lines are
+        sorted by (line, position) and spilled to temporary files next to
+        the file. Merging the runs puts every repeat right after its
+        first occurrence; the positions of the repeats are sorted the
+        same way, and a final pass copies the file without them.
+        Returns the number of lines removed.
+        """
+        directory = os.path.dirname(os.path.abspath(file_path))
+        with tempfile.TemporaryDirectory(dir=directory, prefix='.dedup-') as tmp_dir:
+            runs, run, size = [], [], 0
+            with open(file_path, 'rb', buffering=1024 * 1024) as f:
+                for position, line in enumerate(f):
+                    line = line.rstrip(b'\n')
+                    run.append((line, position))
+                    size += len(line) + 100   # tuple and bytes object overhead
+                    if size >= memory_bytes:
+                        runs.append(_write_run(run, tmp_dir))
+                        run, size = [], 0
+            if run:
+                runs.append(_write_run(run, tmp_dir))
+            del run
             
+            repeat_runs, repeats, removed = [], [], 0
+            previous = None
+            for line, position in heapq.merge(*(_read_run(path) for path in runs)):
+                if line == previous:
+                    repeats.append(position)
+                    removed += 1
+                    if len(repeats) * 8 >= memory_bytes:
+                        repeat_runs.append(_write_positions(repeats, tmp_dir))
+                        repeats = []
+                previous = line
+            if not removed:
+                return 0
+            if repeats:
+                repeat_runs.append(_write_positions(repeats, tmp_dir))
+            
+            drops = heapq.merge(*(_read_positions(path) for path in repeat_runs))
+            next_drop = next(drops, None)
+            output_path = os.path.join(tmp_dir, 'output')
+            with open(file_path, 'rb', buffering=1024 * 1024) as f, \
+                    open(output_path, 'wb', buffering=1024 * 1024) as out:
+                for position, line in enumerate(f):
+                    if position == next_drop:
+                        next_drop = next(drops, None)
+                        continue
+                    out.write(line if line.endswith(b'\n') else line + b'\n')
+            os.replace(output_path, file_path)
+        return removed
+
+    def compile_wordlist(self, source_file, output_file, dedup_memory=DEDUP_MEMORY):
+        """Compile a text wordlist into the binary format used by the audit tool.
+        
+        Comment lines at the top of the file (the header written by
+        generate_wordlist) and entries outside 8-63 bytes are dropped;
+        duplicates are removed exactly by dedup_file within dedup_memory,
+        keeping the first occurrence of each entry in place.
+        Returns (kept, dropped).
+        """
+        if not os.path.exists(source_file):
+            logger.error(f"Wordlist not found: {source_file}")
+            return 0, 0
+        
+        logger.info(f"Compiling wordlist {source_file} to {output_file}")
+        histogram = [0] * (WORDLIST_MAX_LENGTH - WORDLIST_MIN_LENGTH + 1)
+        fingerprint = hashlib.sha256()
+        kept = dropped = body_length = 0
+        tmp_file = f"{output_file}.tmp"
+        directory = os.path.dirname(os.path.abspath(output_file))
+        
+        with tempfile.TemporaryDirectory(dir=directory, prefix='.compile-') as tmp_dir:
+            entries_file = os.path.join(tmp_dir, 'entries')
+            with open(source_file, 'rb') as infile, open(entries_file, 'wb', buffering=1024 * 1024) as outfile:
+                in_header = True
+                for line in tqdm(infile, unit=' lines'):
+                    word = line.rstrip(b'\r\n')
+                    if in_header and (word.startswith(b'#') or not word):
+                        continue
+                    in_header = False
+                    if not WORDLIST_MIN_LENGTH <= len(word) <= WORDLIST_MAX_LENGTH:
+                        dropped += 1
+                        continue
+                    outfile.write(word + b'\n')
+            dropped += self.dedup_file(entries_file, dedup_memory)
+            
+            with open(entries_file, 'rb', buffering=1024 * 1024) as infile, open(tmp_file, 'wb') as outfile:
+                outfile.write(bytes(WORDLIST_HEADER.size))
+                for entry in infile:
+                    outfile.write(entry)
+                    fingerprint.update(entry)
+                    histogram[len(entry) - 1 - WORDLIST_MIN_LENGTH] += 1
+                    body_length += len(entry)
+                    kept += 1
+                outfile.seek(0)
+                outfile.write(WORDLIST_HEADER.pack(WORDLIST_MAGIC, kept, body_length, fingerprint.digest(), *histogram))
+        os.replace(tmp_file, output_file)
+        
+        logger.info(f"Compiled {kept} candidates ({dropped} duplicates or invalid lengths dropped)")
+        logger.info(f"Wordlist fingerprint: {fingerprint.hexdigest()}")
+        return kept, dropped
+
+    def generate_wordlist(self, output_file, min_length=8, max_length=10, 
+                         use_lowercase=True, use_uppercase=False, use_digits=True, 
+                         use_special=False, base_words_file=None, use_patterns=True, workers=1,
+                         limits=None, benchmark_cache=None, dedup=None, dedup_memory=DEDUP_MEMORY,
+                         compression=None, compression_threads=0):
+        """Generate a complete wordlist based on specified parameters.
+        
+        The wordlist is planned first and refused, without writing
+        anything, if it exceeds `limits` (GenerationLimits) or the free
+        space on the target filesystem. dedup removes repeated candidates
+        within dedup_memory: 'bloom' while generating (in one process),
+        'exact' by an external sort of the finished file. compression
+        ('gzip', 'zstd' or 'lz4') writes the wordlist through a
+        CompressedWriter with compression_threads threads (0: one per
+        CPU). Returns the number of entries, or None if nothing was
+        generated.
+        """
+        # Initialize charset based on parameters
+        charset = self.build_charset(use_lowercase, use_uppercase, use_digits, use_special)
         if not charset:
             logger.error("No character sets selected. Please select at least one character set.")
             return
@@ -165,25 +994,59 @@ class DictionaryGenerator:
         logger.info(f"Character set: {'lowercase ' if use_lowercase else ''}{'uppercase ' if use_uppercase else ''}{'digits ' if use_digits else ''}{'special' if use_special else ''}")
         logger.info(f"Length range: {min_length} to {max_length}")
         
+        if compression and dedup == 'exact':
+            logger.error("Exact deduplication sorts an uncompressed file; use --dedup bloom with compression")
+            return None
+        
         # Check for excessive dictionary size
-        if max_length > 10:
-            logger.warning("Creating dictionaries with lengths > 10 can generate extremely large files")
-            logger.warning("This may consume excessive disk space and is rarely effective for security assessments")
-            confirm = input("Are you sure you want to continue? (y/n): ")
-            if confirm.lower() != 'y':
-                logger.info("Dictionary generation cancelled by user")
-                return
+        try:
+            planned_words = self.read_base_words(base_words_file) if base_words_file else []
+        except OSError:
+            planned_words = []
+        plan = self.plan_wordlist(charset, min_length, max_length, planned_words, use_patterns,
+                                  output_file, benchmark_cache, workers=workers,
+                                  compression=compression, compression_threads=compression_threads)
+        logger.info(f"Planned {plan.candidates} entries, {_format_bytes(plan.stored_bytes)}, "
+                    f"estimated generation time {_format_duration(plan.generation_seconds)}")
+        problems = self.check_plan(plan, limits or GenerationLimits())
+        if problems:
+            for problem in problems:
+                logger.error(f"Dictionary generation refused: {problem}")
+            return None
         
-        # Create new file or overwrite existing
-        with open(output_file, 'w') as f:
-            f.write("# Dictionary generated for authorized security assessment\n")
-            f.write(f"# Generated: {time.strftime('%Y-%m-%d %H:%M:%S')}\n")
-            f.write("# This file should be used only for legitimate security auditing\n")
-            f.write("# with proper authorization from the network owner.\n\n")
-            
         total_count = 0
         start_time = time.time()
         
+        # Stream all phases through the dedup filter and/or the compressor
+        if dedup == 'bloom' or compression:
+            if workers > 1:
+                logger.info("Deduplicated or compressed wordlists are generated in a single process")
+            chunks = self.stream_wordlist(charset, min_length, max_length, planned_words, use_patterns,
+                                          dedup=dedup == 'bloom', dedup_memory=dedup_memory)
+            if compression:
+                output = CompressedWriter(output_file, compression, compression_threads)
+            else:
+                output = open(output_file, 'wb')
+            with output as f, tqdm(total=plan.candidates, unit=' passwords') as progress:
+                # Compressed lists are streamed into the engines as they are, so they carry no comment header
+                if not compression:
+                    f.write(_comment_header().encode())
+                for chunk in chunks:
+                    f.write(chunk)
+                    rows = chunk.count(b'\n')
+                    total_count += rows
+                    progress.update(rows)
+            if dedup == 'bloom':
+                logger.info(f"Removed {self.duplicates} duplicate candidates")
+            duration = time.time() - start_time
+            logger.info(f"Dictionary generation complete. Generated {total_count} entries in {duration:.2f} seconds.")
+            logger.info(f"Dictionary saved to {output_file}")
+            return total_count
+        
+        # Create new file or overwrite existing
+        with open(output_file, 'w') as f:
+            f.write(_comment_header())
+            
         # Add base words if specified
         base_words = []
         if base_words_file:
@@ -197,31 +1060,61 @@ class DictionaryGenerator:
             logger.info(f"Generated {pattern_count} passwords with common patterns")
             
         # Generate passwords of specified length range
-        range_count = self.generate_range_length(charset, min_length, max_length, output_file)
+        range_count = self.generate_range_length(charset, min_length, max_length, output_file, workers)
         total_count += range_count
         
+        if dedup == 'exact':
+            removed = self.dedup_file(output_file, dedup_memory)
+            total_count -= removed
+            logger.info(f"Removed {removed} duplicate candidates")
+        
         duration = time.time() - start_time
         logger.info(f"Dictionary generation complete. Generated {total_count} entries in {duration:.2f} seconds.")
         logger.info(f"Dictionary saved to {output_file}")
+        return total_count
+
+def _confirm(prompt):
+    """Ask a y/n question on stderr, which stays free when candidates go to stdout."""
+    sys.stderr.write(prompt)
+    sys.stderr.flush()
+    return input().strip().lower() == 'y'
+
+def _stream_to(path, chunks):
+    """Write a candidate stream to stdout (path None) or a FIFO, created if missing.
+    
+    Opening a FIFO blocks until its reader (e.g. an engine started with
+    the FIFO as its wordlist) has opened the other end.
+    """
+    if path is None:
+        out = sys.stdout.buffer
+    else:
+        if not os.path.exists(path):
+            os.mkfifo(path, 0o600)
+        out = open(path, 'wb')
+    count = 0
+    try:
+        for chunk in chunks:
+            out.write(chunk)
+            count += chunk.count(b'\n')
+        out.flush()
+    except BrokenPipeError:
+        # The reader stopped early, e.g. once the key was found
+        logger.info(f"Reader closed the stream after {count} candidates")
+        if path is None:
+            # Keep the interpreter from failing to flush stdout on exit
+            os.dup2(os.open(os.devnull, os.O_WRONLY), sys.stdout.fileno())
+        return count
+    finally:
+        if path is not None:
+            try:
+                out.close()
+            except BrokenPipeError:
+                pass
+    logger.info(f"Streamed {count} candidates")
+    return count
 
 def main():
     """Parse arguments and run the dictionary generator."""
-    print("""
-    ===================================================================
-    WiFi Dictionary Generator - For Security Assessment Purposes Only
-    ===================================================================
-    
-    This tool creates wordlists for legitimate security assessments of
-    WiFi networks with proper authorization. Use responsibly and ethically.
-    
-    The dictionaries generated by this tool should only be used for:
-    1. Authorized security assessments with written permission
-    2. Testing the security of your own networks
-    3. Educational purposes in controlled environments
-    
-    ===================================================================
-    """)
-    
     parser = argparse.ArgumentParser(description='WiFi Dictionary Generator for Security Assessment')
     parser.add_argument('-o', '--output', default='/var/wifi_security_audit/wordlist.txt',
                         help='Output dictionary file path')
@@ -245,32 +1138,135 @@ def main():
                         help='File containing base words to include')
     parser.add_argument('--no-patterns', action='store_false', dest='use_patterns',
                         help='Disable generation of common patterns with base words')
+    parser.add_argument('--rules',
+                        help='File of pattern rules applied to the base words instead of the built-in ones')
+    parser.add_argument('--workers', type=int, default=1,
+                        help='Number of processes generating the keyspace in parallel')
+    parser.add_argument('--compile', metavar='WORDLIST',
+                        help='Compile an existing text wordlist into the binary format instead of generating one')
+    parser.add_argument('--stdout', action='store_true',
+                        help='Stream the candidates to stdout instead of writing a file')
+    parser.add_argument('--fifo', metavar='PATH',
+                        help='Stream the candidates into a named pipe (created if missing) instead of writing a file')
+    parser.add_argument('--skip', type=int, default=0,
+                        help='Start the stream at this candidate offset (with --stdout or --fifo)')
+    parser.add_argument('--dedup', choices=('bloom', 'exact'),
+                        help='Remove repeated candidates: bloom while generating or streaming, exact by sorting the finished file')
+    parser.add_argument('--dedup-memory', type=_parse_size, default=DEDUP_MEMORY,
+                        help='Memory budget of the dedup stage (default: 256M)')
+    parser.add_argument('--compress', choices=tuple(COMPRESSION_SUFFIXES),
+                        help='Write the wordlist compressed with gzip, zstd or lz4 (suffix added to the output path)')
+    parser.add_argument('--compress-threads', type=int, default=0,
+                        help='Threads compressing blocks in parallel (default: one per CPU)')
+    parser.add_argument('--plan', action='store_true',
+                        help='Print the exact size and estimated time of every phase and exit without generating')
+    parser.add_argument('--max-candidates', type=int,
+                        help='Refuse to generate more candidates than this')
+    parser.add_argument('--max-bytes', type=_parse_size,
+                        help='Refuse to write a larger file than this (e.g. 500M, 20G)')
+    parser.add_argument('--max-seconds', type=float,
+                        help='Refuse to generate if the estimated generation time is longer')
+    parser.add_argument('--reserve', type=_parse_size, default=GenerationLimits().reserve_bytes,
+                        help='Free space to leave on the target filesystem (default: 1G)')
+    parser.add_argument('--benchmark-cache', default='/var/wifi_security_audit/generator_benchmark.json',
+                        help='Cache of the generation rate used for time estimates')
+    parser.add_argument('--engine-benchmark', default='/var/wifi_security_audit/engine_benchmark.json',
+                        help="Audit tool's engine benchmark cache used for engine time estimates")
     
     args = parser.parse_args()
+    streaming = args.stdout or args.fifo
+    
+    print("""
+    ===================================================================
+    WiFi Dictionary Generator - For Security Assessment Purposes Only
+    ===================================================================
+    
+    This tool creates wordlists for legitimate security assessments of
+    WiFi networks with proper authorization. Use responsibly and ethically.
+    
+    The dictionaries generated by this tool should only be used for:
+    1. Authorized security assessments with written permission
+    2. Testing the security of your own networks
+    3. Educational purposes in controlled environments
+    
+    ===================================================================
+    """, file=sys.stderr if args.stdout else sys.stdout)
     
     # Validate arguments
     if args.min_length > args.max_length:
         logger.error("Minimum length cannot be greater than maximum length")
         sys.exit(1)
         
-    if args.min_length < 3:
-        logger.warning("Minimum length less than 3 may generate an extremely large dictionary")
-        confirm = input("Continue? (y/n): ")
-        if confirm.lower() != 'y':
-            sys.exit(0)
+    if args.compress and not streaming and not args.compile \
+            and not args.output.endswith(COMPRESSION_SUFFIXES[args.compress]):
+        args.output += COMPRESSION_SUFFIXES[args.compress]
+    
+    generator = DictionaryGenerator()
+    if args.rules:
+        try:
+            generator.load_rules(args.rules)
+        except (OSError, ValueError) as e:
+            logger.error(f"Cannot load rules: {str(e)}")
+            sys.exit(1)
+    charset = generator.build_charset(args.lowercase, args.uppercase, args.digits, args.special)
+    limits = GenerationLimits(args.max_candidates, args.max_bytes, args.max_seconds, args.reserve)
+    
+    # Print the plan without generating anything
+    if args.plan:
+        if not charset:
+            logger.error("No character sets selected. Please select at least one character set.")
+            sys.exit(1)
+        base_words = generator.read_base_words(args.base_words) if args.base_words else []
+        plan = generator.plan_wordlist(charset, args.min_length, args.max_length, base_words, args.use_patterns,
+                                       None if streaming else args.output, args.benchmark_cache,
+                                       args.engine_benchmark, max(1, args.workers),
+                                       None if streaming else args.compress, args.compress_threads)
+        print(generator.format_plan(plan))
+        problems = generator.check_plan(plan, limits)
+        for problem in problems:
+            print(f"Refused: {problem}")
+        sys.exit(1 if problems else 0)
     
     # Create output directory if it doesn't exist
-    os.makedirs(os.path.dirname(os.path.abspath(args.output)), exist_ok=True)
+    if not streaming:
+        os.makedirs(os.path.dirname(os.path.abspath(args.output)), exist_ok=True)
     
     # Confirm ethical usage
-    consent = input("Do you confirm this dictionary will only be used for authorized security assessments? (y/n): ")
-    if consent.lower() != 'y':
-        print("Dictionary generation cancelled. This tool is for authorized security assessments only.")
+    if not _confirm("Do you confirm this dictionary will only be used for authorized security assessments? (y/n): "):
+        print("Dictionary generation cancelled. This tool is for authorized security assessments only.", file=sys.stderr)
         sys.exit(0)
     
+    # Stream candidates without an intermediate file
+    if streaming:
+        if not charset:
+            logger.error("No character sets selected. Please select at least one character set.")
+            sys.exit(1)
+        base_words = generator.read_base_words(args.base_words) if args.base_words else []
+        plan = generator.plan_wordlist(charset, args.min_length, args.max_length, base_words, args.use_patterns,
+                                       benchmark_cache=args.benchmark_cache)
+        problems = generator.check_plan(plan, limits._replace(max_bytes=None))
+        if problems:
+            for problem in problems:
+                logger.error(f"Dictionary generation refused: {problem}")
+            sys.exit(1)
+        if args.dedup == 'exact':
+            logger.error("Exact deduplication needs a file; use --dedup bloom when streaming")
+            sys.exit(1)
+        chunks = generator.stream_wordlist(charset, args.min_length, args.max_length, base_words,
+                                           args.use_patterns, skip=max(0, args.skip),
+                                           dedup=bool(args.dedup), dedup_memory=args.dedup_memory)
+        _stream_to(None if args.stdout else args.fifo, chunks)
+        if args.dedup:
+            logger.info(f"Removed {generator.duplicates} duplicate candidates")
+        return
+    
+    # Compile an existing wordlist
+    if args.compile:
+        generator.compile_wordlist(args.compile, args.output, args.dedup_memory)
+        return
+    
     # Generate wordlist
-    generator = DictionaryGenerator()
-    generator.generate_wordlist(
+    count = generator.generate_wordlist(
         args.output,
         min_length=args.min_length,
         max_length=args.max_length,
@@ -279,8 +1275,17 @@ def main():
         use_digits=args.digits,
         use_special=args.special,
         base_words_file=args.base_words,
-        use_patterns=args.use_patterns
+        use_patterns=args.use_patterns,
+        workers=max(1, args.workers),
+        limits=limits,
+        benchmark_cache=args.benchmark_cache,
+        dedup=args.dedup,
+        dedup_memory=args.dedup_memory,
+        compression=args.compress,
+        compression_threads=max(0, args.compress_threads)
     )
+    if count is None:
+        sys.exit(1)
 
 if __name__ == "__main__":
     main()
@@ -40,7 +40,7 @@ apt-get install -y python3 python3-pip aircrack-ng hashcat
 
 # Install Python dependencies
 echo "Installing Python packages..."
-pip3 install python-daemon lockfile tqdm
+pip3 install python-daemon lockfile tqdm numpy zstandard lz4
 
 # Create directories
 echo "Creating directories..."
@@ -67,6 +67,8 @@ if [ ! -f /etc/wifi_security_audit/config.ini ]; then
 monitor_dir = /var/wifi_security_audit/handshakes
 wordlist_path = /var/wifi_security_audit/wordlist.txt
 auth_dir = /var/wifi_security_audit/auth
+result_store = /var/wifi_security_audit/results.db
+spool_dir = /var/wifi_security_audit/spool
 
 [Email]
 sender = sender@gmx.de
@@ -74,11 +76,64 @@ password = your_password
 recipient = recipient@example.com
 server = mail.gmx.net
 port = 587
+starttls = true
+queue = /var/wifi_security_audit/mail.db
+keepalive = 60
+idle_timeout = 300
+retry_base = 30
+retry_max = 3600
+max_attempts = 10
+digest = off
+digest_interval = 3600
 
 [Security]
 require_authorization = true
 audit_logging = true
 local_network_only = true
+audit_log = /var/log/wifi_security_audit_events.jsonl
+audit_fsync_interval = 1
+audit_max_size_mb = 100
+audit_max_age_days = 30
+audit_backups = 12
+audit_ring_size = 1000
+audit_store = /var/wifi_security_audit/audit.db
+
+[Metrics]
+listen =
+textfile =
+textfile_interval = 15
+
+[Monitoring]
+settle_time = 2
+poll_interval = 5
+
+[Analysis]
+timeout = 3600
+engine_strategy = sequential
+cpu_budget = 0
+benchmark_cache = /var/wifi_security_audit/engine_benchmark.json
+benchmark_max_age_days = 7
+checkpoint_interval = 300
+max_slices = 1
+candidate_source = wordlist
+
+[Generator]
+charsets = lowercase,digits
+min_length = 8
+max_length = 8
+base_words =
+patterns = true
+rules =
+
+[Processing]
+workers = 2
+status_file = /var/wifi_security_audit/status.json
+journal = /var/wifi_security_audit/jobs.db
+max_attempts = 3
+journal_retention_days = 30
+batch_size = 1
+batch_latency = 60
+shutdown_timeout = 30
 EOF
     echo "IMPORTANT: Please edit /etc/wifi_security_audit/config.ini with your email settings."
 fi
@@ -8,6 +8,27 @@ This tool is intended for legitimate security auditing of WiFi networks with pro
 
 import os
 import time
+import struct
+import functools
+import collections
+import bisect
+import contextlib
+import fnmatch
+import cProfile
+import tracemalloc
+import asyncio
+import concurrent.futures
+import itertools
+import uuid
+import json
+import queue
+import ctypes
+import ctypes.util
+import mmap
+import select
+import hashlib
+import sqlite3
+import threading
 import subprocess
 import logging
 import smtplib
@@ -15,41 +36,2731 @@ import tempfile
 import shutil
 import datetime
 import socket
+import socketserver
+import http.server
 import getpass
 import ipaddress
 from email.mime.text import MIMEText
 from email.mime.multipart import MIMEMultipart
 import re
 import sys
+import csv
 import argparse
 from pathlib import Path
 import configparser
 import signal
+import gzip
 import daemon
 from lockfile.pidlockfile import PIDLockFile
 
+# Optional codecs for compressed wordlists; gzip is always available
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+try:
+    import lz4.frame
+except ImportError:
+    lz4 = None
+
 # Configure logging
 logging.basicConfig(
     level=logging.INFO,
     format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
     handlers=[
-        logging.FileHandler("/var/log/wifi_security_audit.log"),
+        logging.FileHandler("/var/log/wifi_security_audit.log", delay=True),
         logging.StreamHandler()
     ]
 )
 logger = logging.getLogger("wifi_security_audit")
 
+# Imported after the logging setup so the generator's basicConfig does not replace it
+from dictionary_generator import (DictionaryGenerator, WORDLIST_HEADER, WORDLIST_MAGIC, WORDLIST_MIN_LENGTH,
+                                  skip_lines, strip_comment_header)
+
+# Capture file formats
+PCAP_MAGICS = {
+    b'\xd4\xc3\xb2\xa1': '<', b'\xa1\xb2\xc3\xd4': '>',  # microsecond timestamps
+    b'\x4d\x3c\xb2\xa1': '<', b'\xa1\xb2\x3c\x4d': '>',  # nanosecond timestamps
+}
+PCAPNG_SHB = b'\x0a\x0d\x0d\x0a'
+# Body bytes before the packet data of Interface Description, Obsolete, Simple and Enhanced Packet Blocks
+PCAPNG_FIXED_FIELDS = {1: 8, 2: 20, 3: 4, 6: 20}
+HCCAPX_SIGNATURE = b'HCPX'
+HCCAPX_RECORD_SIZE = 393
+
+# Link-layer types carrying 802.11 frames
+LINKTYPE_IEEE802_11 = 105
+LINKTYPE_PRISM = 119
+LINKTYPE_RADIOTAP = 127
+LINKTYPE_AVS = 163
+LINKTYPE_PPI = 192
+
+LLC_SNAP_EAPOL = b'\xaa\xaa\x03\x00\x00\x00\x88\x8e'
+PMKID_KDE = b'\xdd\x14\x00\x0f\xac\x04'
+RSN_OUI = b'\x00\x0f\xac'
+WPA_OUI = b'\x00\x50\xf2'
+
+CaptureMetadata = collections.namedtuple('CaptureMetadata', ['ssid', 'bssid', 'encryption', 'eapol_frames'])
+CaptureMetadata.__doc__ = "Network details extracted from a handshake capture in a single pass."
+
+
+CaptureKey = collections.namedtuple('CaptureKey', ['metadata', 'capture_fp', 'wordlist_fp'])
+CaptureKey.__doc__ = "A capture admitted for analysis, with the fingerprints its result is stored under."
+
+
+class CaptureFormatError(Exception):
+    """Raised when a file is not a capture format the native parser understands."""
+
+
+EapolMessage = collections.namedtuple('EapolMessage', ['number', 'replay_counter', 'nonce', 'mic', 'frame', 'pmkid'])
+EapolMessage.__doc__ = "One EAPOL-Key message of a 4-way handshake; frame is the EAPOL frame with its MIC zeroed."
+
+
+class CaptureParser:
+    """Streaming pcap/pcapng/hccapx reader for beacon, probe and EAPOL frames.
+
+    Besides the network details, the handshake material is collected so it
+    can be exported as hashcat 22000 hash lines without a second pass.
+    """
+
+    def __init__(self):
+        self.networks = collections.OrderedDict()
+        self.handshakes = collections.OrderedDict()
+        self.hccapx_lines = []
+
+    def parse(self, file_path):
+        """Parse the capture and return its CaptureMetadata.
+
+        Raises CaptureFormatError for unknown formats and for corrupt
+        capture structures, so callers can fall back to aircrack-ng.
+        """
+        with open(file_path, 'rb') as f:
+            magic = f.read(4)
+            try:
+                if magic in PCAP_MAGICS:
+                    self._read_pcap(f, PCAP_MAGICS[magic])
+                elif magic == PCAPNG_SHB:
+                    self._read_pcapng(f)
+                elif magic == HCCAPX_SIGNATURE:
+                    self._read_hccapx(f)
+                else:
+                    raise CaptureFormatError(f"Unrecognized capture format: {file_path}")
+            except (struct.error, IndexError) as e:
+                raise CaptureFormatError(f"Malformed capture {file_path}: {str(e)}") from e
+        return self._select_network()
+
+    def _network(self, bssid):
+        if bssid not in self.networks:
+            self.networks[bssid] = {'ssid': None, 'essid': None, 'encryption': None, 'eapol_frames': 0}
+        return self.networks[bssid]
+
+    def hash_lines(self, bssid=None):
+        """Return the handshakes of the parsed capture as hashcat 22000 (WPA*01/WPA*02) lines.
+
+        With a bssid, only that network's handshakes for its ESSID are
+        returned, so nothing but the admitted network is analysed.
+        """
+        if bssid is None:
+            lines = [line for _, _, line in self.hccapx_lines]
+        else:
+            admitted = self.networks.get(bssid, {}).get('essid')
+            lines = [line for ap, essid, line in self.hccapx_lines if ap == bssid and essid == admitted]
+        for (ap, station), messages in self.handshakes.items():
+            if bssid is not None and ap != bssid:
+                continue
+            essid = self.networks.get(ap, {}).get('essid')
+            if not essid:
+                continue  # The ESSID is part of the PMK salt
+            prefix = f"{ap.replace(':', '').lower()}*{station.hex()}*{essid.hex()}"
+            for message in messages:
+                if message.pmkid:
+                    lines.append(f"WPA*01*{message.pmkid.hex()}*{prefix}***")
+            for m2 in (m for m in messages if m.number == 2):
+                # M1+M2 share the replay counter; M3 follows M2 with the next one
+                anonce, message_pair = None, None
+                for message in messages:
+                    if message.number == 1 and message.replay_counter == m2.replay_counter:
+                        anonce, message_pair = message.nonce, 0x00
+                        break
+                else:
+                    for message in messages:
+                        if message.number == 3 and message.replay_counter == m2.replay_counter + 1:
+                            anonce, message_pair = message.nonce, 0x02
+                            break
+                if anonce is not None:
+                    lines.append(f"WPA*02*{m2.mic.hex()}*{prefix}*{anonce.hex()}*{m2.frame.hex()}*{message_pair:02x}")
+        return list(dict.fromkeys(lines))
+
+    def _select_network(self):
+        """Prefer the network with a handshake, then the first one seen."""
+        if not self.networks:
+            return CaptureMetadata(None, None, None, 0)
+        bssid = max(self.networks, key=lambda b: self.networks[b]['eapol_frames'] > 0)
+        network = self.networks[bssid]
+        return CaptureMetadata(network['ssid'], bssid, network['encryption'], network['eapol_frames'])
+
+    def _read_pcap(self, f, endian):
+        header = f.read(20)
+        if len(header) < 20:
+            raise CaptureFormatError("Truncated pcap header")
+        linktype = struct.unpack(endian + 'I', header[16:20])[0] & 0x0FFFFFFF
+        record = struct.Struct(endian + 'IIII')
+        while True:
+            record_header = f.read(16)
+            if len(record_header) < 16:
+                break
+            incl_len = record.unpack(record_header)[2]
+            data = f.read(incl_len)
+            if len(data) < incl_len:
+                break
+            self._handle_packet(linktype, data)
+
+    def _read_pcapng(self, f):
+        f.seek(0)
+        endian = '<'
+        linktypes = []
+        while True:
+            block_header = f.read(8)
+            if len(block_header) < 8:
+                break
+            if block_header[:4] == PCAPNG_SHB:
+                bom = f.read(4)
+                endian = '<' if bom == b'\x4d\x3c\x2b\x1a' else '>'
+                block_len = struct.unpack(endian + 'I', block_header[4:8])[0]
+                if block_len < 12:
+                    break
+                body = bom + f.read(block_len - 12)
+                linktypes = []
+            else:
+                block_len = struct.unpack(endian + 'I', block_header[4:8])[0]
+                if block_len < 12:
+                    break
+                body = f.read(block_len - 8)
+            if len(body) < block_len - 8:
+                break
+            block_type = struct.unpack(endian + 'I', block_header[:4])[0]
+            if len(body) < PCAPNG_FIXED_FIELDS.get(block_type, 0):
+                raise CaptureFormatError(f"pcapng block of type {block_type} is too short ({block_len} bytes)")
+            if block_type == 1:  # Interface Description Block
+                linktypes.append(struct.unpack(endian + 'H', body[:2])[0])
+            elif block_type == 6:  # Enhanced Packet Block
+                interface_id, _, _, cap_len = struct.unpack(endian + 'IIII', body[:16])
+                if interface_id < len(linktypes):
+                    self._handle_packet(linktypes[interface_id], body[20:20 + cap_len])
+            elif block_type == 3 and linktypes:  # Simple Packet Block
+                orig_len = struct.unpack(endian + 'I', body[:4])[0]
+                self._handle_packet(linktypes[0], body[4:4 + min(orig_len, len(body) - 8)])
+            elif block_type == 2:  # Obsolete Packet Block
+                interface_id = struct.unpack(endian + 'H', body[:2])[0]
+                cap_len = struct.unpack(endian + 'I', body[12:16])[0]
+                if interface_id < len(linktypes):
+                    self._handle_packet(linktypes[interface_id], body[20:20 + cap_len])
+
+    def _read_hccapx(self, f):
+        f.seek(0)
+        while True:
+            record = f.read(HCCAPX_RECORD_SIZE)
+            if len(record) < HCCAPX_RECORD_SIZE or record[:4] != HCCAPX_SIGNATURE:
+                break
+            essid_len = min(record[9], 32)
+            essid = record[10:10 + essid_len]
+            keyver = record[42]
+            bssid = self._format_mac(record[59:65])
+            network = self._network(bssid)
+            network['ssid'] = network['ssid'] or self._decode_ssid(essid)
+            network['essid'] = network['essid'] or essid.rstrip(b'\x00')
+            network['encryption'] = network['encryption'] or ('WPA' if keyver == 1 else 'WPA2')
+            network['eapol_frames'] += 1
+            eapol_len = min(struct.unpack('<H', record[135:137])[0], 256)
+            eapol = bytearray(record[137:137 + eapol_len])
+            eapol[81:97] = bytes(16)
+            self.hccapx_lines.append((bssid, essid.rstrip(b'\x00'),
+                f"WPA*02*{record[43:59].hex()}*{record[59:65].hex()}*{record[97:103].hex()}*{essid.hex()}"
+                f"*{record[65:97].hex()}*{bytes(eapol).hex()}*{record[8]:02x}"
+            ))
+
+    def _handle_packet(self, linktype, data):
+        """Strip the link-layer header and hand the 802.11 frame on."""
+        has_fcs = False
+        if linktype == LINKTYPE_RADIOTAP:
+            if len(data) < 8:
+                return
+            header_len = struct.unpack('<H', data[2:4])[0]
+            has_fcs = self._radiotap_has_fcs(data, header_len)
+            data = data[header_len:]
+        elif linktype == LINKTYPE_PRISM:
+            if len(data) < 8:
+                return
+            data = data[struct.unpack('<I', data[4:8])[0]:]
+        elif linktype == LINKTYPE_AVS:
+            if len(data) < 8:
+                return
+            data = data[struct.unpack('>I', data[4:8])[0]:]
+        elif linktype == LINKTYPE_PPI:
+            if len(data) < 4:
+                return
+            data = data[struct.unpack('<H', data[2:4])[0]:]
+        elif linktype != LINKTYPE_IEEE802_11:
+            return
+        if has_fcs:
+            data = data[:-4]
+        if len(data) >= 24:
+            try:
+                self._handle_frame(data)
+            except (struct.error, IndexError):
+                pass  # Malformed frames are skipped, as aircrack-ng does
+
+    @staticmethod
+    def _radiotap_has_fcs(data, header_len):
+        """Check the radiotap Flags field for a trailing frame check sequence."""
+        present = struct.unpack('<I', data[4:8])[0]
+        offset = 8
+        word = present
+        while word & 0x80000000 and offset + 4 <= header_len:
+            word = struct.unpack('<I', data[offset:offset + 4])[0]
+            offset += 4
+        if present & 0x01:  # TSFT, 8-byte aligned
+            offset = (offset + 7) & ~7
+            offset += 8
+        if present & 0x02 and offset < header_len:
+            return bool(data[offset] & 0x10)
+        return False
+
+    def _handle_frame(self, frame):
+        frame_type = (frame[0] >> 2) & 0x03
+        subtype = (frame[0] >> 4) & 0x0F
+        flags = frame[1]
+        if frame_type == 0:
+            self._handle_management(frame, subtype)
+        elif frame_type == 2 and not flags & 0x40:
+            self._handle_data(frame, subtype, flags)
+
+    def _handle_management(self, frame, subtype):
+        if subtype in (5, 8):  # Probe Response, Beacon
+            ies_offset = 36
+        elif subtype == 0:  # Association Request
+            ies_offset = 28
+        elif subtype == 2:  # Reassociation Request
+            ies_offset = 34
+        else:
+            return
+        if len(frame) < ies_offset:
+            return
+        bssid = self._format_mac(frame[16:22])
+        network = self._network(bssid)
+        ies = self._parse_ies(frame[ies_offset:])
+        if 0 in ies and not network['ssid']:
+            network['ssid'] = self._decode_ssid(ies[0])
+            network['essid'] = ies[0].rstrip(b'\x00') or None
+        if subtype in (5, 8) and not network['encryption']:
+            capability = struct.unpack('<H', frame[34:36])[0]
+            network['encryption'] = self._encryption_from_ies(ies, capability)
+
+    def _handle_data(self, frame, subtype, flags):
+        to_ds, from_ds = flags & 0x01, flags & 0x02
+        if to_ds and not from_ds:
+            bssid, station = frame[4:10], frame[10:16]
+        elif from_ds and not to_ds:
+            bssid, station = frame[10:16], frame[4:10]
+        else:
+            return
+        offset = 24
+        if subtype & 0x08:  # QoS data
+            offset += 2
+            if flags & 0x80:
+                offset += 4
+        if frame[offset:offset + 8] != LLC_SNAP_EAPOL:
+            return
+        eapol = frame[offset + 8:]
+        if len(eapol) < 7 or eapol[1] != 3:  # EAPOL-Key only
+            return
+        network = self._network(self._format_mac(bssid))
+        network['eapol_frames'] += 1
+        key_info = struct.unpack('>H', eapol[5:7])[0]
+        if not network['encryption']:
+            network['encryption'] = 'WPA' if key_info & 0x07 == 1 else 'WPA2'
+        message = self._eapol_message(eapol, key_info)
+        if message:
+            messages = self.handshakes.setdefault((self._format_mac(bssid), station), [])
+            if message not in messages:
+                messages.append(message)
+
+    @staticmethod
+    def _eapol_message(eapol, key_info):
+        """Classify an EAPOL-Key frame as message 1-4 of the 4-way handshake."""
+        eapol = eapol[:4 + struct.unpack('>H', eapol[2:4])[0]]
+        if len(eapol) < 99:
+            return None
+        ack, mic, install, secure = key_info & 0x0080, key_info & 0x0100, key_info & 0x0040, key_info & 0x0200
+        if ack and not mic:
+            number = 1
+        elif ack and mic and install:
+            number = 3
+        elif mic and not ack and not secure:
+            number = 2
+        elif mic and not ack:
+            number = 4
+        else:
+            return None
+        pmkid = None
+        if number == 1:
+            key_data = eapol[99:99 + struct.unpack('>H', eapol[97:99])[0]]
+            offset = key_data.find(PMKID_KDE)
+            if offset >= 0 and any(key_data[offset + 6:offset + 22]):
+                pmkid = key_data[offset + 6:offset + 22]
+        frame = eapol[:81] + bytes(16) + eapol[97:]
+        return EapolMessage(number, struct.unpack('>Q', eapol[9:17])[0], eapol[17:49], eapol[81:97], frame, pmkid)
+
+    @staticmethod
+    def _parse_ies(data):
+        ies = {}
+        offset = 0
+        while offset + 2 <= len(data):
+            ie_id, ie_len = data[offset], data[offset + 1]
+            value = data[offset + 2:offset + 2 + ie_len]
+            if ie_id == 221 and value[:4] == WPA_OUI + b'\x01':
+                ies.setdefault('wpa', value)
+            else:
+                ies.setdefault(ie_id, value)
+            offset += 2 + ie_len
+        return ies
+
+    @staticmethod
+    def _encryption_from_ies(ies, capability):
+        rsn = ies.get(48)
+        if rsn and len(rsn) >= 8:
+            pairwise_count = struct.unpack('<H', rsn[6:8])[0]
+            akm_offset = 8 + 4 * pairwise_count
+            akms = set()
+            if len(rsn) >= akm_offset + 2:
+                akm_count = struct.unpack('<H', rsn[akm_offset:akm_offset + 2])[0]
+                for i in range(akm_count):
+                    suite = rsn[akm_offset + 2 + 4 * i:akm_offset + 6 + 4 * i]
+                    if suite[:3] == RSN_OUI and len(suite) == 4:
+                        akms.add(suite[3])
+            if 8 in akms and akms & {2, 6}:
+                return 'WPA2/WPA3'
+            if akms & {8, 24}:
+                return 'WPA3'
+            if akms & {1, 5} and not akms & {2, 6}:
+                return 'WPA2-Enterprise'
+            return 'WPA2'
+        if 'wpa' in ies:
+            return 'WPA'
+        if capability & 0x0010:
+            return 'WEP'
+        return 'OPEN'
+
+    @staticmethod
+    def _decode_ssid(raw):
+        raw = raw.rstrip(b'\x00')
+        if not raw:
+            return None
+        return raw.decode('utf-8', errors='replace')
+
+    @staticmethod
+    def _format_mac(raw):
+        return ':'.join(f"{b:02X}" for b in raw)
+
+
+EngineProgress = collections.namedtuple('EngineProgress', ['tested', 'total', 'rate'])
+EngineProgress.__doc__ = "Candidates tested, keyspace size (None if unknown) and candidates per second."
+
+ProcessResult = collections.namedtuple(
+    'ProcessResult', ['returncode', 'output', 'match', 'timed_out', 'pid', 'duration', 'stdin_bytes'])
+ProcessResult.__doc__ = "Outcome of a supervised child process; output holds only the last lines."
+
+LINE_SEPARATOR = re.compile(rb'[\r\n]+')
+ANSI_ESCAPE = re.compile(r'\x1b\[[0-9;?]*[A-Za-z]')
+# Without a total when the wordlist is read from stdin (-w -)
+AIRCRACK_PROGRESS = re.compile(r'(\d+)(?:/(\d+))? keys tested \(([\d.]+) k/s\)')
+ENGINE_STRATEGIES = ('sequential', 'race', 'best')
+HASHCAT_MODE = 22000
+AIRCRACK_KEY_FOUND = re.compile(r'KEY FOUND!\s*\[\s*([^\]]+?)\s*\]')
+HASHCAT_PROGRESS = re.compile(r'^Progress\.*:\s*(\d+)/(\d+)')
+HASHCAT_SPEED = re.compile(r'^Speed\.#\*?\S*\.*:\s*([\d.]+)\s*([kMGT]?)H/s')
+SPEED_UNITS = {'': 1, 'k': 1e3, 'M': 1e6, 'G': 1e9, 'T': 1e12}
+
+
+class JobInterrupted(Exception):
+    """Raised when a job's child process is cancelled, e.g. on daemon shutdown."""
+
+
+class JobParked(Exception):
+    """Raised when a job waits for an identical capture in flight; it is resumed once that one is settled."""
+
+
+def parse_aircrack_progress(line):
+    match = AIRCRACK_PROGRESS.search(line)
+    if match:
+        total = int(match.group(2)) if match.group(2) else None
+        return EngineProgress(int(match.group(1)), total, float(match.group(3)) * 1000)
+    return None
+
+
+def parse_hashcat_progress(line):
+    """Parse hashcat --machine-readable STATUS lines, or the human-readable status screen."""
+    if line.startswith('STATUS\t'):
+        fields = line.split('\t')
+        rate = 0.0
+        tested = total = None
+        i = 0
+        while i < len(fields):
+            if fields[i] == 'SPEED':
+                i += 1
+                while i + 1 < len(fields) and fields[i].isdigit():
+                    if int(fields[i + 1]):
+                        rate += int(fields[i]) * 1000.0 / int(fields[i + 1])
+                    i += 2
+                continue
+            if fields[i] == 'PROGRESS' and i + 2 < len(fields):
+                tested, total = int(fields[i + 1]), int(fields[i + 2])
+            i += 1
+        if tested is not None:
+            return EngineProgress(tested, total, rate)
+        return None
+    match = HASHCAT_PROGRESS.search(line)
+    if match:
+        return EngineProgress(int(match.group(1)), int(match.group(2)), None)
+    match = HASHCAT_SPEED.search(line)
+    if match:
+        return EngineProgress(None, None, float(match.group(1)) * SPEED_UNITS[match.group(2)])
+    return None
+
+
+class Tracer:
+    """Write spans as Chrome trace events (JSON array format) for chrome://tracing or Perfetto.
+
+    Spans are complete events on the track of the thread that ran them,
+    so the viewers nest each job's stages below the job span of its
+    worker. Child processes get a track of their own, named after the
+    command and keyed by their PID. Events are appended and flushed as
+    spans end, so the trace of a crashed run can still be opened.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.pid = os.getpid()
+        self.origin = time.perf_counter()
+        self.lock = threading.Lock()
+        self.tracks = set()
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self.file = open(path, 'w')
+        self.file.write('[')
+        self.separator = '\n'
+
+    def record(self, name, start, duration, args, tid=None, track=None):
+        """Record a complete event; start is a time.perf_counter() value."""
+        if tid is None:
+            tid, track = threading.get_native_id(), threading.current_thread().name
+        event = {'name': name, 'ph': 'X', 'pid': self.pid, 'tid': tid,
+                 'ts': round((start - self.origin) * 1e6, 1), 'dur': round(duration * 1e6, 1), 'args': args}
+        with self.lock:
+            if self.file.closed:
+                return
+            if tid not in self.tracks:
+                self.tracks.add(tid)
+                self._write({'name': 'thread_name', 'ph': 'M', 'pid': self.pid, 'tid': tid, 'args': {'name': track}})
+            self._write(event)
+            self.file.flush()
+
+    def close(self):
+        with self.lock:
+            if not self.file.closed:
+                self.file.write('\n]\n')
+                self.file.close()
+
+    def _write(self, event):
+        self.file.write(self.separator + json.dumps(event, default=str))
+        self.separator = ',\n'
+
+
+class _Span:
+    """A span being timed; set() adds arguments shown with it in the trace viewer."""
+
+    __slots__ = ('tracer', 'name', 'args', 'start')
+    recording = True
+
+    def __init__(self, tracer, name, args):
+        self.tracer = tracer
+        self.name = name
+        self.args = args
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is not None:
+            self.args['error'] = exc_type.__name__
+        self.tracer.record(self.name, self.start, time.perf_counter() - self.start, self.args)
+
+    def set(self, **args):
+        self.args.update(args)
+
+
+class _NullSpan:
+    """Stand-in for _Span while tracing is off; callers check `recording` before costly arguments."""
+
+    recording = False
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        return False
+
+    def set(self, **args):
+        pass
+
+
+NULL_SPAN = _NullSpan()
+_tracer = None
+
+
+def set_tracer(tracer):
+    """Install the process-wide Tracer, or None to switch tracing off."""
+    global _tracer
+    _tracer = tracer
+
+
+def trace_span(name, **args):
+    """Return a context manager tracing its block as a span of the current thread."""
+    if _tracer is None:
+        return NULL_SPAN
+    return _Span(_tracer, name, args)
+
+
+class ProcessSupervisor:
+    """Run child processes on a private asyncio event loop.
+
+    Output is read line by line while the process runs, so progress can be
+    reported and a run can end as soon as its result line appears. Each
+    child gets its own process group, which is killed as a whole on
+    timeout, early result or cancellation, so no engine workers are left
+    behind. Only the last `keep_lines` lines of output are kept.
+    """
+
+    def __init__(self, keep_lines=200):
+        self.keep_lines = keep_lines
+        self.loop = asyncio.new_event_loop()
+        self.closed = False
+        # Produces stdin chunks (file reads, decompression, generation) off the event loop
+        self.stdin_pool = concurrent.futures.ThreadPoolExecutor(thread_name_prefix="process-stdin")
+        self.thread = threading.Thread(target=self.loop.run_forever, name="process-supervisor", daemon=True)
+        self.thread.start()
+
+    def submit(self, args, timeout=None, **kwargs):
+        """Start a process and return a concurrent.futures.Future for its ProcessResult.
+
+        Cancelling the future kills the process group.
+        """
+        if self.closed:
+            raise JobInterrupted(f"Process supervisor is shut down; not starting {args[0]}")
+        return asyncio.run_coroutine_threadsafe(self._run(args, timeout, **kwargs), self.loop)
+
+    def run(self, args, timeout=None, **kwargs):
+        """Run a process to completion and return its ProcessResult.
+
+        Keyword arguments: result_pattern (compiled regex ending the run on
+        its first match), progress_parser and progress_callback, stdin_source
+        (iterable of bytes chunks fed to the child), and preexec_fn.
+        """
+        future = self.submit(args, timeout, **kwargs)
+        try:
+            return future.result()
+        except concurrent.futures.CancelledError:
+            raise JobInterrupted(f"{args[0]} was cancelled")
+
+    def shutdown(self, grace=10):
+        """Cancel every supervised process and stop the event loop."""
+        if self.closed:
+            return
+        self.closed = True
+        try:
+            asyncio.run_coroutine_threadsafe(self._cancel_all(), self.loop).result(timeout=grace)
+        except (concurrent.futures.TimeoutError, concurrent.futures.CancelledError):
+            pass
+        self.loop.call_soon_threadsafe(self.loop.stop)
+        self.stdin_pool.shutdown(wait=False)
+
+    async def _cancel_all(self):
+        tasks = [task for task in asyncio.all_tasks(self.loop) if task is not asyncio.current_task()]
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+    async def _run(self, args, timeout, result_pattern=None, progress_parser=None,
+                   progress_callback=None, stdin_source=None, preexec_fn=None):
+        start_time = time.monotonic()
+        trace_start = time.perf_counter()
+        proc = await asyncio.create_subprocess_exec(
+            *args,
+            stdin=asyncio.subprocess.PIPE if stdin_source is not None else asyncio.subprocess.DEVNULL,
+            stdout=asyncio.subprocess.PIPE, stderr=asyncio.subprocess.STDOUT,
+            start_new_session=True, preexec_fn=preexec_fn
+        )
+        output = collections.deque(maxlen=self.keep_lines)
+        found = []
+        stdin_bytes = [0]
+
+        async def read_output():
+            buffer = b''
+            while True:
+                chunk = await proc.stdout.read(64 * 1024)
+                if chunk:
+                    lines = LINE_SEPARATOR.split(buffer + chunk)
+                    buffer = lines.pop()
+                else:
+                    lines = [buffer]
+                for raw in lines:
+                    line = ANSI_ESCAPE.sub('', raw.decode('utf-8', errors='replace')).strip()
+                    if not line:
+                        continue
+                    output.append(line)
+                    if progress_parser and progress_callback:
+                        progress = progress_parser(line)
+                        if progress:
+                            progress_callback(progress)
+                    if result_pattern:
+                        match = result_pattern.search(line)
+                        if match:
+                            found.append(match)
+                            return
+                if not chunk:
+                    return
+
+        async def feed_stdin():
+            iterator = iter(stdin_source)
+            pending = None
+            try:
+                while True:
+                    pending = self.stdin_pool.submit(next, iterator, None)
+                    chunk = await asyncio.wrap_future(pending, loop=self.loop)
+                    if chunk is None:
+                        break
+                    proc.stdin.write(chunk)
+                    stdin_bytes[0] += len(chunk)
+                    await proc.stdin.drain()
+            except (BrokenPipeError, ConnectionResetError):
+                pass
+            finally:
+                proc.stdin.close()
+                close = getattr(iterator, 'close', None)
+                if close:
+                    if pending is not None and not pending.done():
+                        # Closing a generator while next() runs in the pool raises ValueError
+                        pending.add_done_callback(lambda _: close())
+                    else:
+                        close()
+
+        writer = self.loop.create_task(feed_stdin()) if stdin_source is not None else None
+        timed_out = cancelled = False
+        try:
+            await asyncio.wait_for(read_output(), timeout)
+        except asyncio.TimeoutError:
+            timed_out = True
+        except asyncio.CancelledError:
+            cancelled = True
+        finally:
+            if writer:
+                writer.cancel()
+        if writer:
+            error = (await asyncio.gather(writer, return_exceptions=True))[0]
+            if isinstance(error, Exception):
+                logger.warning(f"Feeding the wordlist to {os.path.basename(args[0])} failed: {str(error)}")
+
+        if timed_out or cancelled or found:
+            await self._kill_group(proc)
+        returncode = await proc.wait()
+        if cancelled:
+            raise asyncio.CancelledError()
+
+        match = found[0] if found else None
+        if _tracer is not None:
+            _tracer.record(os.path.basename(args[0]), trace_start, time.perf_counter() - trace_start,
+                           {'argv': ' '.join(args), 'pid': proc.pid, 'returncode': returncode,
+                            'stdin_bytes': stdin_bytes[0], 'timed_out': timed_out},
+                           tid=proc.pid, track=f"{os.path.basename(args[0])} [{proc.pid}]")
+        return ProcessResult(
+            returncode, list(output),
+            (match.group(1) if match.groups() else match.group(0)) if match else None,
+            timed_out, proc.pid, time.monotonic() - start_time, stdin_bytes[0]
+        )
+
+    @staticmethod
+    async def _kill_group(proc, grace=5):
+        for sig in (signal.SIGTERM, signal.SIGKILL):
+            try:
+                os.killpg(proc.pid, sig)
+            except ProcessLookupError:
+                return
+            try:
+                await asyncio.wait_for(proc.wait(), grace)
+                return
+            except asyncio.TimeoutError:
+                continue
+
+
+_process_supervisor = None
+_process_supervisor_lock = threading.Lock()
+
+
+def get_process_supervisor():
+    """Return the shared ProcessSupervisor, starting it on first use."""
+    global _process_supervisor
+    with _process_supervisor_lock:
+        if _process_supervisor is None:
+            _process_supervisor = ProcessSupervisor()
+        return _process_supervisor
+
+
+def _probe_with_aircrack(file_path):
+    """Fallback for formats the native parser does not understand."""
+    try:
+        output = get_process_supervisor().run(['aircrack-ng', file_path], timeout=30)
+    except OSError:
+        output = None
+    if output is None or output.timed_out or output.returncode != 0:
+        logger.warning(f"Failed to extract network details from {file_path}")
+        return None
+
+    stdout = '\n'.join(output.output)
+    ssid_match = re.search(r'SSID:\s+([^\n]+)', stdout)
+    mac_match = re.search(r'BSSID:\s+([0-9A-F:]{17})', stdout, re.IGNORECASE)
+    return CaptureMetadata(
+        ssid_match.group(1).strip() if ssid_match else None,
+        mac_match.group(1).strip().upper() if mac_match else None,
+        None,
+        0
+    )
+
+
+@functools.lru_cache(maxsize=256)
+def _parse_capture_cached(file_path, size, mtime_ns):
+    """Return (CaptureMetadata, hash lines of the selected network) from a single pass over the file."""
+    parser = CaptureParser()
+    try:
+        metadata = parser.parse(file_path)
+        return metadata, tuple(parser.hash_lines(metadata.bssid))
+    except CaptureFormatError:
+        return _probe_with_aircrack(file_path), ()
+    except OSError as e:
+        logger.warning(f"Failed to read capture {file_path}: {str(e)}")
+        return None, ()
+
+
+def _scan_capture(file_path):
+    try:
+        stat = os.stat(file_path)
+    except OSError as e:
+        logger.warning(f"Failed to read capture {file_path}: {str(e)}")
+        return None, ()
+    if _tracer is None:
+        return _parse_capture_cached(os.path.abspath(file_path), stat.st_size, stat.st_mtime_ns)
+    with trace_span('parse_capture', file=os.path.basename(file_path), bytes=stat.st_size) as span:
+        misses = _parse_capture_cached.cache_info().misses
+        result = _parse_capture_cached(os.path.abspath(file_path), stat.st_size, stat.st_mtime_ns)
+        span.set(cached=_parse_capture_cached.cache_info().misses == misses)
+    return result
+
+
+def parse_capture(file_path):
+    """Return the CaptureMetadata for a capture, parsing each file version only once.
+
+    Returns None if the network details could not be extracted at all.
+    """
+    return _scan_capture(file_path)[0]
+
+
+def capture_hash_lines(file_path):
+    """Return the handshakes of the network parse_capture selected as hashcat 22000 hash lines.
+
+    Other networks in the same capture are left out, since authorization
+    is checked for the selected network only. Empty if none were found.
+    """
+    return list(_scan_capture(file_path)[1])
+
+
+@functools.lru_cache(maxsize=256)
+def _content_digest(file_path, size, mtime_ns):
+    digest = hashlib.sha256()
+    with open(file_path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1024 * 1024), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def capture_fingerprint(file_path, metadata):
+    """Fingerprint a capture by its content hash plus the extracted BSSID/SSID."""
+    stat = os.stat(file_path)
+    digest = hashlib.sha256(_content_digest(os.path.abspath(file_path), stat.st_size, stat.st_mtime_ns).encode())
+    if metadata:
+        digest.update(f"|{metadata.bssid or ''}|{metadata.ssid or ''}".encode('utf-8'))
+    return digest.hexdigest()
+
+
+class CompiledWordlist:
+    """Memory-mapped compiled wordlist.
+
+    The header carries the candidate count, a SHA-256 fingerprint of the
+    candidate block and a histogram of candidate lengths 8-63. The
+    candidates follow as newline-terminated lines, so they are handed to
+    an engine's stdin straight from the map without being parsed.
+    """
+
+    def __init__(self, file_path):
+        with open(file_path, 'rb') as f:
+            self.map = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        if len(self.map) < WORDLIST_HEADER.size:
+            self.map.close()
+            raise ValueError(f"Truncated compiled wordlist: {file_path}")
+        magic, self.count, body_length, fingerprint, *histogram = WORDLIST_HEADER.unpack_from(self.map)
+        if magic != WORDLIST_MAGIC or body_length != len(self.map) - WORDLIST_HEADER.size:
+            self.map.close()
+            raise ValueError(f"Invalid compiled wordlist: {file_path}")
+        self.fingerprint = fingerprint.hex()
+        self.histogram = {WORDLIST_MIN_LENGTH + i: n for i, n in enumerate(histogram) if n}
+
+    def chunks(self, skip=0, chunk_size=1024 * 1024):
+        """Yield the candidate block in chunks for an engine's stdin, starting at candidate `skip`."""
+        return skip_lines((self.map[offset:offset + chunk_size]
+                           for offset in range(WORDLIST_HEADER.size, len(self.map), chunk_size)), skip)
+
+
+class GeneratedWordlist:
+    """Candidate stream generated by dictionary_generator from a spec.
+
+    The spec (character sets, length range, base words, pattern rules) takes
+    the place of a wordlist file: candidates are generated chunk by
+    chunk while the engine reads its stdin, and a resumed stream starts
+    at its offset without generating what comes before. The fingerprint
+    covers the spec and the base words, so stored outcomes and
+    checkpoints stay tied to the keyspace it describes.
+    """
+
+    def __init__(self, charsets, min_length, max_length, base_words_file=None, use_patterns=True, rules_file=None):
+        self.generator = DictionaryGenerator()
+        if rules_file:
+            self.generator.load_rules(rules_file)
+        unknown = [name for name in charsets if name not in self.generator.charsets]
+        if unknown or not charsets:
+            raise ValueError(f"Unknown character sets: {', '.join(unknown) or '(none)'}")
+        if not 0 < min_length <= max_length:
+            raise ValueError(f"Invalid length range: {min_length} to {max_length}")
+        self.charset = ''.join(dict.fromkeys(''.join(self.generator.charsets[name] for name in charsets)))
+        self.min_length = min_length
+        self.max_length = max_length
+        self.base_words = self.generator.read_base_words(base_words_file) if base_words_file else []
+        self.use_patterns = use_patterns
+        self.count = self.generator.count_candidates(self.charset, min_length, max_length,
+                                                     self.base_words, use_patterns)
+        spec = json.dumps([self.charset, min_length, max_length, self.base_words, use_patterns,
+                           self.generator.rules_text if use_patterns else None])
+        self.fingerprint = hashlib.sha256(f"generator|{spec}".encode('utf-8')).hexdigest()
+
+    def chunks(self, skip=0, chunk_size=1024 * 1024):
+        """Yield the generated candidates in chunks for an engine's stdin, starting at candidate `skip`."""
+        return self.generator.stream_wordlist(self.charset, self.min_length, self.max_length,
+                                              self.base_words, self.use_patterns, skip, chunk_size)
+
+
+# Leading bytes of compressed wordlists (written by dictionary_generator.py --compress)
+WORDLIST_COMPRESSION = {
+    b'\x1f\x8b': 'gzip',
+    b'\x28\xb5\x2f\xfd': 'zstd',
+    b'\x04\x22\x4d\x18': 'lz4',
+}
+WORDLIST_STREAM_CHUNK = 4 * 1024 * 1024
+
+
+class CompressedWordlist:
+    """gzip, zstd or lz4 compressed text wordlist.
+
+    The list is decompressed as a stream into the engine's stdin and
+    never lands on disk. Large chunks keep the decompressor busy between
+    pipe writes. The candidate count is unknown without decompressing
+    everything, so count and fingerprint are None (the wordlist is then
+    fingerprinted by its file).
+    """
+
+    count = None
+    fingerprint = None
+
+    def __init__(self, file_path, compression):
+        if compression == 'zstd' and zstandard is None:
+            raise ValueError(f"zstd wordlist {file_path} needs the zstandard module")
+        if compression == 'lz4' and lz4 is None:
+            raise ValueError(f"lz4 wordlist {file_path} needs the lz4 module")
+        self.path = file_path
+        self.compression = compression
+
+    def chunks(self, skip=0, chunk_size=WORDLIST_STREAM_CHUNK):
+        """Yield the decompressed wordlist in chunks for an engine's stdin, starting at candidate `skip`.
+
+        A comment header at the top (lists compressed before the generator
+        stopped writing one) is not passed on as candidates.
+        """
+        return skip_lines(strip_comment_header(self._decompressed(chunk_size)), skip)
+
+    def _decompressed(self, chunk_size):
+        with open(self.path, 'rb') as raw:
+            # Concatenated members/frames (one per compressed block) are read as one stream
+            if self.compression == 'gzip':
+                reader = gzip.GzipFile(fileobj=raw)
+            elif self.compression == 'zstd':
+                reader = zstandard.ZstdDecompressor().stream_reader(raw, read_size=chunk_size,
+                                                                    read_across_frames=True)
+            else:
+                reader = lz4.frame.LZ4FrameFile(raw)
+            with reader:
+                yield from iter(lambda: reader.read(chunk_size), b'')
+
+
+def text_wordlist_chunks(file_path, skip=0, chunk_size=1024 * 1024):
+    """Yield a text wordlist in chunks for an engine's stdin, starting at line `skip`."""
+    with open(file_path, 'rb') as f:
+        yield from skip_lines(iter(lambda: f.read(chunk_size), b''), skip)
+
+
+@functools.lru_cache(maxsize=2)
+def _open_wordlist(file_path, size, mtime_ns, inode):
+    with open(file_path, 'rb') as f:
+        head = f.read(len(WORDLIST_MAGIC))
+    if head == WORDLIST_MAGIC:
+        return CompiledWordlist(file_path)
+    for magic, compression in WORDLIST_COMPRESSION.items():
+        if head.startswith(magic):
+            return CompressedWordlist(file_path, compression)
+    return None
+
+
+def open_wordlist(file_path):
+    """Return the CompiledWordlist or CompressedWordlist at file_path, or None for a plain text wordlist."""
+    stat = os.stat(file_path)
+    return _open_wordlist(os.path.abspath(file_path), stat.st_size, stat.st_mtime_ns, stat.st_ino)
+
+
+@functools.lru_cache(maxsize=16)
+def _wordlist_digest(file_path, size, mtime_ns, inode):
+    compiled = _open_wordlist(file_path, size, mtime_ns, inode)
+    if compiled and compiled.fingerprint:
+        return compiled.fingerprint
+    digest = hashlib.sha256(f"{size}|{mtime_ns}|{inode}".encode())
+    with open(file_path, 'rb') as f:
+        digest.update(f.read(1024 * 1024))
+        if size > 2 * 1024 * 1024:
+            f.seek(-1024 * 1024, os.SEEK_END)
+            digest.update(f.read())
+    return digest.hexdigest()
+
+
+def wordlist_fingerprint(file_path):
+    """Fingerprint a wordlist by its size, mtime and head/tail bytes.
+
+    Wordlists can be far too large to hash on every capture, so only the
+    first and last MiB are read; any rewrite also changes size or mtime.
+    Compiled wordlists carry a fingerprint of their content instead.
+    """
+    try:
+        stat = os.stat(file_path)
+        return _wordlist_digest(os.path.abspath(file_path), stat.st_size, stat.st_mtime_ns, stat.st_ino)
+    except (OSError, ValueError):
+        return None
+
+
+class ResultStore:
+    """SQLite store of assessment outcomes keyed by capture and wordlist fingerprint."""
+
+    def __init__(self, db_path):
+        os.makedirs(os.path.dirname(os.path.abspath(db_path)), exist_ok=True)
+        self.lock = threading.Lock()
+        self.conn = sqlite3.connect(db_path, check_same_thread=False)
+        with self.lock, self.conn:
+            self.conn.execute("""
+                CREATE TABLE IF NOT EXISTS assessments (
+                    capture_fp TEXT NOT NULL,
+                    wordlist_fp TEXT NOT NULL,
+                    ssid TEXT,
+                    bssid TEXT,
+                    encryption TEXT,
+                    authorized INTEGER,
+                    outcome TEXT,
+                    analysis_duration REAL,
+                    assessed_at TEXT,
+                    PRIMARY KEY (capture_fp, wordlist_fp)
+                )
+            """)
+            self.conn.execute("CREATE INDEX IF NOT EXISTS assessments_bssid ON assessments (bssid)")
+            self.conn.execute("""
+                CREATE TABLE IF NOT EXISTS verdicts (
+                    capture_fp TEXT NOT NULL,
+                    strategy TEXT NOT NULL,
+                    engine TEXT,
+                    time_to_verdict REAL NOT NULL,
+                    outcome TEXT,
+                    recorded_at TEXT NOT NULL
+                )
+            """)
+            self.conn.execute("""
+                CREATE TABLE IF NOT EXISTS checkpoints (
+                    capture_fp TEXT NOT NULL,
+                    wordlist_fp TEXT NOT NULL,
+                    engine TEXT NOT NULL,
+                    candidate_offset INTEGER NOT NULL,
+                    slices INTEGER NOT NULL DEFAULT 0,
+                    updated_at TEXT NOT NULL,
+                    PRIMARY KEY (capture_fp, wordlist_fp, engine)
+                )
+            """)
+
+    def lookup(self, capture_fp, wordlist_fp):
+        """Return the stored assessment as a dict, or None if there is none."""
+        with self.lock:
+            self.conn.row_factory = sqlite3.Row
+            row = self.conn.execute(
+                "SELECT * FROM assessments WHERE capture_fp = ? AND wordlist_fp = ?",
+                (capture_fp, wordlist_fp)
+            ).fetchone()
+        return dict(row) if row else None
+
+    def record(self, capture_fp, wordlist_fp, metadata, authorized, outcome=None, analysis_duration=None):
+        """Store the authorization decision and, if known, the assessment outcome.
+
+        A missing outcome never overwrites one recorded earlier.
+        """
+        with self.lock, self.conn:
+            self.conn.execute("""
+                INSERT INTO assessments VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+                ON CONFLICT (capture_fp, wordlist_fp) DO UPDATE SET
+                    authorized = excluded.authorized,
+                    outcome = COALESCE(excluded.outcome, outcome),
+                    analysis_duration = COALESCE(excluded.analysis_duration, analysis_duration),
+                    assessed_at = excluded.assessed_at
+            """, (
+                capture_fp, wordlist_fp,
+                metadata.ssid if metadata else None,
+                metadata.bssid if metadata else None,
+                metadata.encryption if metadata else None,
+                int(bool(authorized)), outcome, analysis_duration,
+                datetime.datetime.now().isoformat()
+            ))
+
+    def record_verdict(self, capture_fp, strategy, engine, time_to_verdict, outcome):
+        """Record how long a job took to reach its verdict, to compare engine strategies."""
+        with self.lock, self.conn:
+            self.conn.execute(
+                "INSERT INTO verdicts VALUES (?, ?, ?, ?, ?, ?)",
+                (capture_fp, strategy, engine, time_to_verdict, outcome, datetime.datetime.now().isoformat())
+            )
+
+    def checkpoint(self, capture_fp, wordlist_fp, engine):
+        """Return (candidate_offset, slices) of an unfinished analysis, or None."""
+        with self.lock:
+            return self.conn.execute(
+                "SELECT candidate_offset, slices FROM checkpoints WHERE capture_fp = ? AND wordlist_fp = ? AND engine = ?",
+                (capture_fp, wordlist_fp, engine)
+            ).fetchone()
+
+    def save_checkpoint(self, capture_fp, wordlist_fp, engine, candidate_offset, end_of_slice=False):
+        """Record how far an engine got; end_of_slice counts a run that hit the timeout.
+
+        Returns the number of time slices used so far.
+        """
+        with self.lock, self.conn:
+            self.conn.execute("""
+                INSERT INTO checkpoints VALUES (?, ?, ?, ?, ?, ?)
+                ON CONFLICT (capture_fp, wordlist_fp, engine) DO UPDATE SET
+                    candidate_offset = MAX(candidate_offset, excluded.candidate_offset),
+                    slices = slices + excluded.slices,
+                    updated_at = excluded.updated_at
+            """, (capture_fp, wordlist_fp, engine, candidate_offset, int(end_of_slice),
+                  datetime.datetime.now().isoformat()))
+            return self.conn.execute(
+                "SELECT slices FROM checkpoints WHERE capture_fp = ? AND wordlist_fp = ? AND engine = ?",
+                (capture_fp, wordlist_fp, engine)
+            ).fetchone()[0]
+
+    def clear_checkpoints(self, capture_fp, wordlist_fp):
+        with self.lock, self.conn:
+            self.conn.execute("DELETE FROM checkpoints WHERE capture_fp = ? AND wordlist_fp = ?",
+                              (capture_fp, wordlist_fp))
+
+    def has_network(self, bssid):
+        """Return True if an earlier capture of this BSSID was assessed."""
+        with self.lock:
+            row = self.conn.execute(
+                "SELECT 1 FROM assessments WHERE bssid = ? AND outcome IS NOT NULL LIMIT 1", (bssid,)
+            ).fetchone()
+        return row is not None
+
+    def close(self):
+        with self.lock:
+            self.conn.close()
+
+AuthorizationDocument = collections.namedtuple(
+    'AuthorizationDocument', ['path', 'ssids', 'bssids', 'valid_from', 'valid_until'])
+AuthorizationDocument.__doc__ = "Networks and validity window parsed from one .auth file."
+
+MAC_PATTERN = re.compile(r'\b[0-9A-F]{2}(?::[0-9A-F]{2}){5}\b', re.IGNORECASE)
+DATE_FORMATS = ['%Y-%m-%d', '%d.%m.%Y', '%d/%m/%Y']
+# Field names holding a network name; BSSID/MAC fields only feed the MAC index
+SSID_KEYS = frozenset({'ssid', 'ssids', 'ssid(s)', 'essid', 'network', 'network ssid', 'network name', 'wifi network',
+                       'wi-fi network'})
+
+
+class AuthorizationIndex:
+    """Index of authorization documents by exact SSID and BSSID.
+
+    The index is built once and refreshed incrementally: a lookup only
+    stats the auth directory, and individual files are re-read when their
+    mtime or size changes. Changes that do not touch the directory mtime
+    (in-place edits) are picked up by a full stat sweep every
+    `rescan_interval` seconds.
+    """
+
+    def __init__(self, auth_dir, rescan_interval=30):
+        self.auth_dir = auth_dir
+        self.rescan_interval = rescan_interval
+        self.lock = threading.Lock()
+        self.documents = {}
+        self.file_stats = {}
+        self.by_ssid = collections.defaultdict(set)
+        self.by_bssid = collections.defaultdict(set)
+        self.dir_mtime = None
+        self.last_sweep = 0
+
+    def lookup(self, ssid, bssid=None, when=None):
+        """Return a document authorizing the SSID or BSSID at `when`, or None."""
+        when = when or datetime.datetime.now()
+        with self.lock:
+            self._refresh()
+            paths = set()
+            if ssid:
+                paths |= self.by_ssid.get(ssid.strip().lower(), set())
+            if bssid:
+                paths |= self.by_bssid.get(self._normalize_mac(bssid), set())
+            for path in sorted(paths):
+                document = self.documents[path]
+                if document.valid_from and when < document.valid_from:
+                    logger.info(f"Authorization {path} is not valid before {document.valid_from:%Y-%m-%d}")
+                    continue
+                if document.valid_until and when > document.valid_until:
+                    logger.info(f"Authorization {path} expired on {document.valid_until:%Y-%m-%d}")
+                    continue
+                return document
+        return None
+
+    def _refresh(self):
+        try:
+            dir_mtime = os.stat(self.auth_dir).st_mtime_ns
+        except OSError as e:
+            logger.error(f"Cannot read authorization directory {self.auth_dir}: {str(e)}")
+            return
+        if dir_mtime == self.dir_mtime and time.time() - self.last_sweep < self.rescan_interval:
+            return
+        self.dir_mtime = dir_mtime
+        self.last_sweep = time.time()
+
+        seen = set()
+        for entry in os.scandir(self.auth_dir):
+            if not entry.name.lower().endswith('.auth') or not entry.is_file():
+                continue
+            seen.add(entry.path)
+            stat = entry.stat()
+            if self.file_stats.get(entry.path) == (stat.st_mtime_ns, stat.st_size):
+                continue
+            self._remove(entry.path)
+            try:
+                document = self._parse_document(entry.path)
+            except (OSError, UnicodeDecodeError) as e:
+                logger.error(f"Cannot read authorization file {entry.path}: {str(e)}")
+                continue
+            self.file_stats[entry.path] = (stat.st_mtime_ns, stat.st_size)
+            self._add(document)
+        for path in set(self.file_stats) - seen:
+            self._remove(path)
+
+    def _add(self, document):
+        self.documents[document.path] = document
+        for ssid in document.ssids:
+            self.by_ssid[ssid].add(document.path)
+        for bssid in document.bssids:
+            self.by_bssid[bssid].add(document.path)
+
+    def _remove(self, path):
+        document = self.documents.pop(path, None)
+        self.file_stats.pop(path, None)
+        if document is None:
+            return
+        for ssid in document.ssids:
+            self.by_ssid[ssid].discard(path)
+            if not self.by_ssid[ssid]:
+                del self.by_ssid[ssid]
+        for bssid in document.bssids:
+            self.by_bssid[bssid].discard(path)
+            if not self.by_bssid[bssid]:
+                del self.by_bssid[bssid]
+
+    def _parse_document(self, path):
+        """Parse SSID, MAC address and period fields from an authorization file.
+
+        Documents without an SSID field fall back to treating each whole
+        line as an SSID, which is still stricter than substring matching.
+        """
+        with open(path, 'r') as f:
+            content = f.read()
+
+        ssids = set()
+        valid_from = valid_until = None
+        for line in content.splitlines():
+            key, sep, value = line.partition(':')
+            key, value = key.strip().lower(), value.strip()
+            if not sep or not value or (value.startswith('[') and value.endswith(']')):
+                continue
+            if key in SSID_KEYS:
+                ssids.add(value.lower())
+            elif 'period' in key:
+                start, _, end = value.partition(' to ')
+                valid_from = self._parse_date(start) or valid_from
+                valid_until = self._parse_date(end, end_of_day=True) or valid_until
+            elif key in ('valid from', 'start date'):
+                valid_from = self._parse_date(value) or valid_from
+            elif key in ('valid until', 'valid to', 'end date'):
+                valid_until = self._parse_date(value, end_of_day=True) or valid_until
+
+        if not ssids:
+            ssids = {line.strip().lower() for line in content.splitlines() if line.strip()}
+        bssids = {self._normalize_mac(mac) for mac in MAC_PATTERN.findall(content)}
+        return AuthorizationDocument(path, frozenset(ssids), frozenset(bssids), valid_from, valid_until)
+
+    @staticmethod
+    def _parse_date(value, end_of_day=False):
+        value = value.strip()
+        for date_format in DATE_FORMATS:
+            try:
+                date = datetime.datetime.strptime(value, date_format)
+            except ValueError:
+                continue
+            if end_of_day:
+                date = date.replace(hour=23, minute=59, second=59)
+            return date
+        return None
+
+    @staticmethod
+    def _normalize_mac(mac):
+        return mac.strip().upper().replace('-', ':')
+
+# inotify event masks (linux/inotify.h)
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_FROM = 0x00000040
+IN_MOVED_TO = 0x00000080
+IN_DELETE = 0x00000200
+IN_Q_OVERFLOW = 0x00004000
+IN_IGNORED = 0x00008000
+INOTIFY_EVENT = struct.Struct('iIII')
+
+
+class DirectoryWatcher:
+    """Yield files from a directory as soon as they are completely written.
+
+    Uses inotify (IN_CLOSE_WRITE / IN_MOVED_TO) where available and falls
+    back to polling; files moved out or deleted are forgotten again. Files found by a scan rather than an event (at
+    startup, after an event queue overflow, or when polling) are only
+    yielded once their size and mtime have been stable for `settle_time`
+    seconds, so half-uploaded captures are never picked up.
+    """
+
+    def __init__(self, directory, settle_time=2.0, poll_interval=5.0):
+        self.directory = directory
+        self.settle_time = settle_time
+        self.poll_interval = poll_interval
+        self.pending = {}
+        self.yielded = {}
+        self.inotify_fd = None
+        self.stop_read, self.stop_write = os.pipe()
+        self.stopped = False
+
+    def stop(self):
+        """Make watch() return at its next wake-up."""
+        self.stopped = True
+        os.write(self.stop_write, b'x')
+
+    def watch(self):
+        """Generator yielding the path of each completely written file."""
+        self.inotify_fd = self._init_inotify()
+        if self.inotify_fd is None:
+            logger.info(f"inotify unavailable. Polling {self.directory} every {self.poll_interval} seconds")
+        self._scan()
+        try:
+            while not self.stopped:
+                for path in self._collect_stable():
+                    yield path
+                if self.inotify_fd is not None:
+                    for path in self._read_events(self.settle_time if self.pending else None):
+                        yield path
+                else:
+                    self._wait(min(self.poll_interval, self.settle_time) if self.pending else self.poll_interval)
+                    self._scan()
+        finally:
+            if self.inotify_fd is not None:
+                os.close(self.inotify_fd)
+                self.inotify_fd = None
+
+    def _init_inotify(self):
+        try:
+            libc = ctypes.CDLL(ctypes.util.find_library('c') or 'libc.so.6', use_errno=True)
+            fd = libc.inotify_init1(os.O_NONBLOCK | os.O_CLOEXEC)
+        except (OSError, AttributeError):
+            return None
+        if fd < 0:
+            return None
+        if libc.inotify_add_watch(fd, os.fsencode(self.directory),
+                                  IN_CLOSE_WRITE | IN_MOVED_TO | IN_MOVED_FROM | IN_DELETE) < 0:
+            os.close(fd)
+            return None
+        return fd
+
+    def _wait(self, timeout):
+        readable, _, _ = select.select([self.stop_read], [], [], timeout)
+        if readable:
+            os.read(self.stop_read, 64)
+
+    def _read_events(self, timeout):
+        readable, _, _ = select.select([self.inotify_fd, self.stop_read], [], [], timeout)
+        if self.stop_read in readable:
+            os.read(self.stop_read, 64)
+        if self.inotify_fd not in readable:
+            return []
+        try:
+            buffer = os.read(self.inotify_fd, 64 * 1024)
+        except BlockingIOError:
+            return []
+
+        ready = []
+        offset = 0
+        while offset + INOTIFY_EVENT.size <= len(buffer):
+            _, mask, _, name_len = INOTIFY_EVENT.unpack_from(buffer, offset)
+            name = buffer[offset + INOTIFY_EVENT.size:offset + INOTIFY_EVENT.size + name_len].rstrip(b'\0')
+            offset += INOTIFY_EVENT.size + name_len
+            if mask & IN_Q_OVERFLOW:
+                logger.warning("inotify event queue overflowed. Rescanning directory")
+                self._scan()
+            elif mask & IN_IGNORED:
+                logger.warning(f"Watch on {self.directory} removed. Falling back to polling")
+                os.close(self.inotify_fd)
+                self.inotify_fd = None
+                os.makedirs(self.directory, exist_ok=True)
+                self._scan()
+                break
+            elif name:
+                path = os.path.join(self.directory, os.fsdecode(name))
+                self.pending.pop(path, None)
+                if mask & (IN_MOVED_FROM | IN_DELETE):
+                    self.yielded.pop(path, None)
+                    if path in ready:
+                        ready.remove(path)
+                elif self._is_candidate(os.fsdecode(name), path) and path not in ready:
+                    ready.append(path)
+        for path in ready:
+            self._mark_yielded(path)
+        return ready
+
+    def _scan(self):
+        """Register files that appeared without an event for the stability check."""
+        try:
+            entries = list(os.scandir(self.directory))
+        except OSError as e:
+            logger.error(f"Error scanning directory {self.directory}: {str(e)}")
+            return
+        present = set()
+        for entry in entries:
+            present.add(entry.path)
+            if entry.path in self.pending or not self._is_candidate(entry.name, entry.path):
+                continue
+            stat = entry.stat()
+            if self.yielded.get(entry.path) == (stat.st_size, stat.st_mtime_ns):
+                continue
+            self.pending[entry.path] = (stat.st_size, stat.st_mtime_ns, time.monotonic())
+        for path in set(self.yielded) - present:
+            del self.yielded[path]
+
+    def _collect_stable(self):
+        ready = []
+        now = time.monotonic()
+        for path, (size, mtime_ns, since) in list(self.pending.items()):
+            try:
+                stat = os.stat(path)
+            except OSError:
+                del self.pending[path]
+                continue
+            if (stat.st_size, stat.st_mtime_ns) != (size, mtime_ns):
+                self.pending[path] = (stat.st_size, stat.st_mtime_ns, now)
+            elif now - since >= self.settle_time:
+                del self.pending[path]
+                self._mark_yielded(path)
+                ready.append(path)
+        return ready
+
+    def _mark_yielded(self, path):
+        try:
+            stat = os.stat(path)
+            self.yielded[path] = (stat.st_size, stat.st_mtime_ns)
+        except OSError:
+            pass
+
+    @staticmethod
+    def _is_candidate(name, path):
+        # Dotfiles are in-progress uploads (rsync, scp temp names)
+        return not name.startswith('.') and os.path.isfile(path)
+
+class AuditSink:
+    """Append-only JSON Lines audit log written by a background thread.
+
+    Host and user identity are looked up once. Events are queued and
+    written in batches; the file is fsynced at most every
+    `fsync_interval` seconds, and close() drains the queue and fsyncs, so
+    every event logged before shutdown is durable. The log is rotated
+    when it exceeds `max_bytes` or is older than `max_age_days`; rotated
+    files are gzip-compressed and the `backups` newest are kept. Only
+    the last `ring_size` events stay in memory, in `recent`. Each batch
+    is also inserted into the AuditStore `store`, if given.
+    """
+
+    def __init__(self, path, fsync_interval=1.0, max_bytes=100 * 1024 * 1024, max_age_days=30,
+                 backups=12, ring_size=1000, store=None):
+        self.path = path
+        self.store = store
+        self.fsync_interval = fsync_interval
+        self.max_bytes = max_bytes
+        self.max_age = max_age_days * 86400
+        self.backups = backups
+        self.user = getpass.getuser()
+        self.hostname = socket.gethostname()
+        self.recent = collections.deque(maxlen=ring_size)
+        # Bounded, so a stalled disk slows producers down instead of growing memory
+        self.queue = queue.Queue(maxsize=10000)
+        self.file = None
+        self.opened_at = None
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self.thread = threading.Thread(target=self._writer, name="audit-writer", daemon=True)
+        self.thread.start()
+
+    def log(self, event_type, description, ssid=None, mac=None, result=None):
+        """Queue an event; returns the entry."""
+        entry = {
+            "timestamp": datetime.datetime.now().isoformat(),
+            "user": self.user,
+            "hostname": self.hostname,
+            "event_type": event_type,
+            "description": description,
+            "ssid": ssid,
+            "mac_address": mac,
+            "result": result
+        }
+        self.recent.append(entry)
+        self.queue.put(entry)
+        return entry
+
+    def flush(self):
+        """Block until every queued event is written and fsynced."""
+        self.queue.join()
+
+    def close(self):
+        """Write and fsync all queued events, then stop the writer."""
+        if self.thread.is_alive():
+            self.queue.put(None)
+            self.thread.join()
+
+    def _writer(self):
+        last_sync = time.monotonic()
+        unsynced = 0   # queue items taken since the last fsync; marked done once durable
+        while True:
+            timeout = max(0.0, self.fsync_interval - (time.monotonic() - last_sync)) if unsynced else None
+            try:
+                batch = [self.queue.get(timeout=timeout)]
+            except queue.Empty:
+                batch = []
+            while batch and batch[-1] is not None and len(batch) < 1000:
+                try:
+                    batch.append(self.queue.get_nowait())
+                except queue.Empty:
+                    break
+            stop = bool(batch) and batch[-1] is None
+            unsynced += len(batch)
+            due = stop or time.monotonic() - last_sync >= self.fsync_interval
+            try:
+                events = [event for event in batch if event is not None]
+                if events:
+                    self._write(events)
+                    if self.store:
+                        self.store.insert(events)
+                if unsynced and due and self.file:
+                    self.file.flush()
+                    os.fsync(self.file.fileno())
+                    self._rotate_if_due()
+            except (OSError, sqlite3.Error) as e:
+                logger.error(f"Error writing audit log {self.path}: {str(e)}")
+            if unsynced and due:
+                last_sync = time.monotonic()
+                for _ in range(unsynced):
+                    self.queue.task_done()
+                unsynced = 0
+            if stop:
+                if self.file:
+                    self.file.close()
+                if self.store:
+                    self.store.close()
+                return
+
+    def _write(self, events):
+        if self.file is None:
+            self._open()
+        self.file.write(''.join(json.dumps(event) + '\n' for event in events))
+
+    def _open(self):
+        self.file = open(self.path, 'a')
+        self.opened_at = time.time()
+        # An existing log is as old as its first event
+        try:
+            with open(self.path, 'r') as f:
+                first = f.readline()
+            if first:
+                self.opened_at = datetime.datetime.fromisoformat(json.loads(first)['timestamp']).timestamp()
+        except (OSError, ValueError, KeyError, TypeError):
+            pass
+
+    def _rotate_if_due(self):
+        if self.file is None:
+            return
+        too_large = self.max_bytes and self.file.tell() >= self.max_bytes
+        too_old = self.max_age and time.time() - self.opened_at >= self.max_age
+        if not (too_large or too_old):
+            return
+        self.file.close()
+        self.file = None
+        rotated = f"{self.path}.{datetime.datetime.now().strftime('%Y%m%d-%H%M%S-%f')}"
+        os.replace(self.path, rotated)
+        with open(rotated, 'rb') as src, gzip.open(f"{rotated}.gz", 'wb') as dst:
+            shutil.copyfileobj(src, dst, 1024 * 1024)
+            dst.flush()
+            os.fsync(dst.fileobj.fileno())
+        os.remove(rotated)
+        directory, name = os.path.split(os.path.abspath(self.path))
+        backups = sorted(entry for entry in os.listdir(directory)
+                         if entry.startswith(f"{name}.") and entry.endswith('.gz'))
+        for old in backups[:-self.backups] if self.backups else backups:
+            os.remove(os.path.join(directory, old))
+        logger.info(f"Rotated audit log to {rotated}.gz")
+
+
+class AuditStore:
+    """Indexed SQLite copy of the audit events for audit-query.
+
+    Every field of an event is a column, plus the time as epoch seconds.
+    Each filterable field has an index together with the time, so a
+    filtered, time-bounded query reads only the matching rows.
+    """
+
+    FIELDS = ('timestamp', 'user', 'hostname', 'event_type', 'description', 'ssid', 'mac_address', 'result')
+    FILTERS = {'event_type': 'event_type', 'ssid': 'ssid', 'bssid': 'mac_address', 'result': 'result',
+               'user': 'user', 'hostname': 'hostname'}
+    GROUPS = dict(FILTERS, day="substr(timestamp, 1, 10)", month="substr(timestamp, 1, 7)")
+
+    def __init__(self, db_path, readonly=False):
+        if readonly:
+            self.conn = sqlite3.connect(f"file:{db_path}?mode=ro", uri=True, check_same_thread=False)
+        else:
+            os.makedirs(os.path.dirname(os.path.abspath(db_path)), exist_ok=True)
+            self.conn = sqlite3.connect(db_path, check_same_thread=False)
+        self.lock = threading.Lock()
+        if readonly:
+            return
+        with self.lock, self.conn:
+            self.conn.execute("PRAGMA journal_mode=WAL")
+            self.conn.execute("""
+                CREATE TABLE IF NOT EXISTS events (
+                    id INTEGER PRIMARY KEY,
+                    ts REAL NOT NULL,
+                    timestamp TEXT NOT NULL,
+                    user TEXT,
+                    hostname TEXT,
+                    event_type TEXT NOT NULL,
+                    description TEXT,
+                    ssid TEXT,
+                    mac_address TEXT,
+                    result TEXT
+                )
+            """)
+            self.conn.execute("CREATE INDEX IF NOT EXISTS events_ts ON events (ts)")
+            for column in ('event_type', 'ssid', 'mac_address', 'result'):
+                self.conn.execute(f"CREATE INDEX IF NOT EXISTS events_{column} ON events ({column}, ts)")
+
+    def insert(self, events):
+        rows = [(datetime.datetime.fromisoformat(event['timestamp']).timestamp(),
+                 *(event.get(field) for field in self.FIELDS)) for event in events]
+        with self.lock, self.conn:
+            self.conn.executemany(
+                f"INSERT INTO events (ts, {', '.join(self.FIELDS)}) VALUES ({', '.join('?' * (len(self.FIELDS) + 1))})",
+                rows)
+
+    def query(self, since=None, until=None, filters=None, search=None, group_by=None, limit=100, newest_first=True):
+        """Return (columns, rows) of the matching events, or of their counts per group_by fields.
+        
+        filters maps FILTERS keys to a list of accepted values; search is a
+        substring of the description. Groups carry the event count and the
+        first and last time seen.
+        """
+        where, params = [], []
+        if since is not None:
+            where.append("ts >= ?")
+            params.append(since)
+        if until is not None:
+            where.append("ts < ?")
+            params.append(until)
+        for name, values in (filters or {}).items():
+            if values:
+                where.append(f"{self.FILTERS[name]} IN ({', '.join('?' * len(values))})")
+                params.extend(values)
+        if search:
+            where.append("description LIKE ?")
+            params.append(f"%{search}%")
+        clause = f" WHERE {' AND '.join(where)}" if where else ""
+        order = "DESC" if newest_first else "ASC"
+        if group_by:
+            groups = [self.GROUPS[name] for name in group_by]
+            columns = [*group_by, 'count', 'first_seen', 'last_seen']
+            sql = (f"SELECT {', '.join(groups)}, COUNT(*), MIN(timestamp), MAX(timestamp) FROM events{clause} "
+                   f"GROUP BY {', '.join(groups)} ORDER BY COUNT(*) DESC")
+        else:
+            columns = list(self.FIELDS)
+            sql = f"SELECT {', '.join(self.FIELDS)} FROM events{clause} ORDER BY ts {order}"
+        if limit:
+            sql += f" LIMIT {int(limit)}"
+        with self.lock:
+            return columns, self.conn.execute(sql, params).fetchall()
+
+    def close(self):
+        with self.lock:
+            self.conn.close()
+
+
+class MailQueue:
+    """Persistent outbound mail queue delivered by a background thread.
+
+    Messages are stored in SQLite before enqueue() returns, so a slow or
+    unreachable mail server never blocks the caller and no report is lost
+    across restarts. The sender keeps one authenticated SMTP connection,
+    sends NOOP every `keepalive` seconds while idle and closes it after
+    `idle_timeout` seconds without mail. A failed delivery is retried
+    with exponential backoff (retry_base doubling up to retry_max) and
+    given up after max_attempts; while the server is failing, the whole
+    queue waits. Messages enqueued with digest=True are collected and
+    sent as one digest once the oldest has waited `digest_interval`.
+    """
+
+    def __init__(self, db_path, server, port, sender, password, recipient, starttls=True,
+                 keepalive=60, idle_timeout=300, retry_base=30, retry_max=3600, max_attempts=10,
+                 digest_interval=3600, metrics=None):
+        self.server = server
+        self.port = port
+        self.sender = sender
+        self.password = password
+        self.recipient = recipient
+        self.starttls = starttls
+        self.keepalive = keepalive
+        self.idle_timeout = idle_timeout
+        self.retry_base = retry_base
+        self.retry_max = retry_max
+        self.max_attempts = max_attempts
+        self.digest_interval = digest_interval
+        self.metrics = metrics
+        self.smtp = None
+        self.last_sent = 0
+        self.last_activity = 0
+        self.blocked_until = 0
+        self.stopped = False
+        self.wakeup = threading.Event()
+        os.makedirs(os.path.dirname(os.path.abspath(db_path)), exist_ok=True)
+        self.lock = threading.Lock()
+        self.conn = sqlite3.connect(db_path, check_same_thread=False)
+        self.conn.row_factory = sqlite3.Row
+        with self.lock, self.conn:
+            self.conn.execute("PRAGMA journal_mode=WAL")
+            self.conn.execute("""
+                CREATE TABLE IF NOT EXISTS outbox (
+                    id INTEGER PRIMARY KEY,
+                    state TEXT NOT NULL,
+                    subject TEXT NOT NULL,
+                    body TEXT NOT NULL,
+                    created_at REAL NOT NULL,
+                    attempts INTEGER NOT NULL DEFAULT 0,
+                    next_attempt REAL NOT NULL,
+                    last_error TEXT
+                )
+            """)
+            self.conn.execute("CREATE INDEX IF NOT EXISTS outbox_state ON outbox (state, next_attempt)")
+        self.thread = threading.Thread(target=self._run, name="mail-sender", daemon=True)
+        self.thread.start()
+
+    def enqueue(self, subject, body, digest=False):
+        """Store a message for delivery (or for the next digest); returns its id."""
+        now = time.time()
+        with self.lock, self.conn:
+            cursor = self.conn.execute(
+                "INSERT INTO outbox (state, subject, body, created_at, next_attempt) VALUES (?, ?, ?, ?, ?)",
+                ('digest' if digest else 'queued', subject, body, now, now))
+        self.wakeup.set()
+        return cursor.lastrowid
+
+    def pending(self):
+        """Return the number of messages per state (queued, digest, failed)."""
+        with self.lock:
+            return dict(self.conn.execute("SELECT state, COUNT(*) FROM outbox GROUP BY state").fetchall())
+
+    def close(self):
+        """Stop the sender; undelivered messages stay queued for the next start."""
+        self.stopped = True
+        self.wakeup.set()
+        self.thread.join()
+        self._disconnect()
+        with self.lock:
+            self.conn.close()
+
+    def _run(self):
+        while not self.stopped:
+            try:
+                self._release_digest()
+                self._deliver_due()
+                self._keep_connection()
+            except sqlite3.Error as e:
+                logger.error(f"Mail queue error: {str(e)}")
+            self.wakeup.wait(self._next_wakeup())
+            self.wakeup.clear()
+
+    def _next_wakeup(self):
+        now = time.time()
+        with self.lock:
+            due = self.conn.execute("SELECT MIN(next_attempt) FROM outbox WHERE state = 'queued'").fetchone()[0]
+            oldest = self.conn.execute("SELECT MIN(created_at) FROM outbox WHERE state = 'digest'").fetchone()[0]
+        times = [max(due, self.blocked_until) if due is not None else None,
+                 oldest + self.digest_interval if oldest is not None else None,
+                 min(self.last_activity + self.keepalive, self.last_sent + self.idle_timeout) if self.smtp else None]
+        times = [t for t in times if t is not None]
+        return max(0.0, min(times) - now) if times else None
+
+    def _release_digest(self):
+        """Combine the collected digest messages into one queued message once the oldest is due."""
+        with self.lock, self.conn:
+            rows = self.conn.execute(
+                "SELECT id, subject, body, created_at FROM outbox WHERE state = 'digest' ORDER BY id").fetchall()
+            if not rows or time.time() - rows[0]['created_at'] < self.digest_interval:
+                return
+            parts = [f"{len(rows)} security reports since "
+                     f"{datetime.datetime.fromtimestamp(rows[0]['created_at']).strftime('%Y-%m-%d %H:%M:%S')}:",
+                     *(f"- {row['subject']}" for row in rows)]
+            for row in rows:
+                parts.append("\n" + "#" * 80 + f"\n{row['subject']}\n" + "#" * 80 + f"\n{row['body']}")
+            now = time.time()
+            self.conn.execute(
+                "INSERT INTO outbox (state, subject, body, created_at, next_attempt) VALUES ('queued', ?, ?, ?, ?)",
+                (f"WiFi Security Digest: {len(rows)} reports", "\n".join(parts), now, now))
+            self.conn.executemany("DELETE FROM outbox WHERE id = ?", [(row['id'],) for row in rows])
+
+    def _deliver_due(self):
+        while not self.stopped and time.time() >= self.blocked_until:
+            with self.lock:
+                row = self.conn.execute(
+                    "SELECT * FROM outbox WHERE state = 'queued' AND next_attempt <= ? ORDER BY id LIMIT 1",
+                    (time.time(),)).fetchone()
+            if row is None:
+                return
+            start = time.perf_counter()
+            try:
+                with trace_span('email_send', subject=row['subject'], attempt=row['attempts'] + 1,
+                                bytes=len(row['body'])):
+                    self._send(row['subject'], row['body'])
+            except (smtplib.SMTPException, OSError) as e:
+                self._disconnect()
+                attempts = row['attempts'] + 1
+                delay = min(self.retry_max, self.retry_base * 2 ** (attempts - 1))
+                state = 'failed' if attempts >= self.max_attempts else 'queued'
+                with self.lock, self.conn:
+                    self.conn.execute(
+                        "UPDATE outbox SET state = ?, attempts = ?, next_attempt = ?, last_error = ? WHERE id = ?",
+                        (state, attempts, time.time() + delay, str(e), row['id']))
+                self.blocked_until = time.time() + delay
+                if state == 'failed':
+                    logger.error(f"Giving up on email '{row['subject']}' after {attempts} attempts: {str(e)}")
+                else:
+                    logger.error(f"Failed to send email '{row['subject']}' (attempt {attempts}, "
+                                 f"retry in {delay:.0f} s): {str(e)}")
+                return
+            if self.metrics:
+                self.metrics.observe('email', time.perf_counter() - start)
+            with self.lock, self.conn:
+                self.conn.execute("DELETE FROM outbox WHERE id = ?", (row['id'],))
+            logger.info(f"Email sent successfully: {row['subject']}")
+
+    def _send(self, subject, body):
+        msg = MIMEMultipart()
+        msg['From'] = self.sender
+        msg['To'] = self.recipient
+        msg['Subject'] = subject
+        msg.attach(MIMEText(body, 'plain'))
+        reused = self.smtp is not None
+        if not reused:
+            self._connect()
+        try:
+            self.smtp.sendmail(self.sender, self.recipient, msg.as_string())
+        except smtplib.SMTPServerDisconnected:
+            if not reused:
+                raise
+            # The server closed the pooled connection while it was idle; that is
+            # no delivery failure, so retry once right away on a fresh connection
+            logger.info("SMTP connection was closed by the server, reconnecting")
+            self._disconnect()
+            self._connect()
+            self.smtp.sendmail(self.sender, self.recipient, msg.as_string())
+        self.last_sent = self.last_activity = time.time()
+
+    def _connect(self):
+        self.smtp = smtplib.SMTP(self.server, self.port, timeout=60)
+        if self.starttls:
+            self.smtp.starttls()
+        if self.password:
+            self.smtp.login(self.sender, self.password)
+
+    def _keep_connection(self):
+        """NOOP an idle connection to keep it open, or close it after idle_timeout."""
+        if self.smtp is None:
+            return
+        now = time.time()
+        if now - self.last_sent >= self.idle_timeout:
+            self._disconnect()
+        elif now - self.last_activity >= self.keepalive:
+            try:
+                if self.smtp.noop()[0] != 250:
+                    self._disconnect()
+                    return
+                self.last_activity = time.time()
+            except (smtplib.SMTPException, OSError):
+                self._disconnect()
+
+    def _disconnect(self):
+        if self.smtp is None:
+            return
+        try:
+            self.smtp.quit()
+        except (smtplib.SMTPException, OSError):
+            self.smtp.close()
+        self.smtp = None
+
+
+# Stage latency histogram buckets in seconds, from parsing a capture to an hour-long engine run
+METRIC_BUCKETS = (0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1, 5, 10, 30, 60, 300, 900, 1800, 3600)
+METRICS_CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+
+
+class Metrics:
+    """Counters, gauges and per-stage latency histograms in the Prometheus text format.
+
+    Recording is a bisect and a dictionary update under a lock, so the
+    instrumentation costs about a microsecond per call on the hot path.
+    Values that are cheaper to read on demand (queue depths, cache
+    statistics) come from collectors, which only run when the metrics
+    are rendered.
+    """
+
+    METRICS = {
+        'wifi_audit_stage_duration_seconds': ('histogram', 'Time spent per processing stage.'),
+        'wifi_audit_jobs': ('gauge', 'Jobs known to the scheduler by state.'),
+        'wifi_audit_engine_candidates_per_second': ('gauge', 'Candidate rate last reported by each engine.'),
+        'wifi_audit_cache_requests_total': ('counter', 'Cache lookups by cache and result.'),
+        'wifi_audit_email_queue': ('gauge', 'Messages in the outbound mail queue by state.'),
+    }
+
+    def __init__(self, buckets=METRIC_BUCKETS):
+        self.buckets = tuple(buckets)
+        self.lock = threading.Lock()
+        self.histograms = {}   # stage -> [count per bucket..., count above the last bucket, sum]
+        self.values = {}       # (name, sorted label items) -> counter or gauge value
+        self.collectors = []
+
+    def observe(self, stage, seconds):
+        """Record one duration of a processing stage."""
+        index = bisect.bisect_left(self.buckets, seconds)
+        with self.lock:
+            histogram = self.histograms.get(stage)
+            if histogram is None:
+                histogram = self.histograms[stage] = [0] * (len(self.buckets) + 1) + [0.0]
+            histogram[index] += 1
+            histogram[-1] += seconds
+
+    @contextlib.contextmanager
+    def time(self, stage):
+        """Context manager observing the duration of its block as `stage`."""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(stage, time.perf_counter() - start)
+
+    def inc(self, name, value=1, **labels):
+        key = (name, tuple(sorted(labels.items())))
+        with self.lock:
+            self.values[key] = self.values.get(key, 0) + value
+
+    def set(self, name, value, **labels):
+        with self.lock:
+            self.values[(name, tuple(sorted(labels.items())))] = value
+
+    def add_collector(self, collector):
+        """Register a callable returning (name, labels, value) samples, run at render time."""
+        self.collectors.append(collector)
+
+    def render(self):
+        """Return all metrics in the Prometheus text exposition format."""
+        samples = collections.defaultdict(list)
+        with self.lock:
+            histograms = {stage: list(histogram) for stage, histogram in self.histograms.items()}
+            for (name, labels), value in self.values.items():
+                samples[name].append((dict(labels), value))
+        for collector in self.collectors:
+            try:
+                for name, labels, value in collector():
+                    samples[name].append((labels, value))
+            except Exception as e:
+                logger.error(f"Error collecting metrics: {str(e)}")
+
+        lines = []
+        name = 'wifi_audit_stage_duration_seconds'
+        lines.extend(self._header(name))
+        for stage, histogram in sorted(histograms.items()):
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float('inf'),), histogram):
+                cumulative += count
+                le = '+Inf' if bound == float('inf') else f"{bound:g}"
+                lines.append(f"{name}_bucket{self._labels({'stage': stage, 'le': le})} {cumulative}")
+            lines.append(f"{name}_sum{self._labels({'stage': stage})} {histogram[-1]!r}")
+            lines.append(f"{name}_count{self._labels({'stage': stage})} {cumulative}")
+        for name in sorted(samples):
+            lines.extend(self._header(name))
+            for labels, value in sorted(samples[name], key=lambda sample: sorted(sample[0].items())):
+                lines.append(f"{name}{self._labels(labels)} {float(value)!r}")
+        return '\n'.join(lines) + '\n'
+
+    def _header(self, name):
+        metric_type, description = self.METRICS.get(name, ('untyped', name))
+        return [f"# HELP {name} {description}", f"# TYPE {name} {metric_type}"]
+
+    @staticmethod
+    def _labels(labels):
+        if not labels:
+            return ''
+        escaped = (str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+                   for value in labels.values())
+        return '{' + ','.join(f'{key}="{value}"' for key, value in zip(labels, escaped)) + '}'
+
+
+class _UnixHTTPServer(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    daemon_threads = True
+
+
+class MetricsExporter:
+    """Expose Metrics to Prometheus over HTTP and/or the node exporter textfile collector.
+
+    `listen` is "host:port" (or just a port, bound to 127.0.0.1) for a
+    TCP endpoint, or "unix:/path" for a Unix socket; any path serves the
+    metrics. `textfile` is rewritten atomically every textfile_interval
+    seconds and once more when the exporter stops.
+    """
+
+    def __init__(self, metrics, listen=None, textfile=None, textfile_interval=15):
+        self.metrics = metrics
+        self.listen = listen
+        self.textfile = textfile
+        self.textfile_interval = textfile_interval
+        self.server = None
+        self.threads = []
+        self.stopped = threading.Event()
+
+    def start(self):
+        if self.listen:
+            try:
+                self.server = self._make_server()
+            except (OSError, ValueError) as e:
+                logger.error(f"Metrics endpoint {self.listen} could not be opened: {str(e)}")
+            else:
+                self.threads.append(threading.Thread(target=self.server.serve_forever, name="metrics-http",
+                                                     daemon=True))
+                logger.info(f"Serving metrics on {self.listen}")
+        if self.textfile:
+            self.threads.append(threading.Thread(target=self._textfile_writer, name="metrics-textfile", daemon=True))
+        for thread in self.threads:
+            thread.start()
+
+    def stop(self):
+        self.stopped.set()
+        if self.server:
+            self.server.shutdown()
+            self.server.server_close()
+            if isinstance(self.server, _UnixHTTPServer):
+                with contextlib.suppress(OSError):
+                    os.unlink(self.server.server_address)
+        for thread in self.threads:
+            thread.join()
+
+    def _make_server(self):
+        metrics = self.metrics
+
+        class Handler(http.server.BaseHTTPRequestHandler):
+            def do_GET(self):
+                body = metrics.render().encode('utf-8')
+                self.send_response(200)
+                self.send_header('Content-Type', METRICS_CONTENT_TYPE)
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                pass
+
+        if self.listen.startswith('unix:'):
+            path = self.listen[len('unix:'):]
+            os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+            with contextlib.suppress(FileNotFoundError):
+                os.unlink(path)
+            return _UnixHTTPServer(path, Handler)
+        host, _, port = self.listen.rpartition(':')
+        server = http.server.ThreadingHTTPServer((host or '127.0.0.1', int(port)), Handler)
+        server.daemon_threads = True
+        return server
+
+    def _textfile_writer(self):
+        while not self.stopped.wait(self.textfile_interval):
+            self._write_textfile()
+        self._write_textfile()
+
+    def _write_textfile(self):
+        tmp_path = f"{self.textfile}.{os.getpid()}.tmp"
+        try:
+            os.makedirs(os.path.dirname(os.path.abspath(self.textfile)), exist_ok=True)
+            with open(tmp_path, 'w') as f:
+                f.write(self.metrics.render())
+            os.replace(tmp_path, self.textfile)
+        except OSError as e:
+            logger.error(f"Error writing metrics file {self.textfile}: {str(e)}")
+
+
+class JobProfiler:
+    """Profile selected jobs with cProfile and tracemalloc.
+
+    For each job whose capture file name matches the glob `match`, a
+    cProfile dump (for pstats or snakeviz), a tracemalloc snapshot and
+    a text summary of the top allocating lines are written to
+    `directory`. cProfile only sees the job's worker thread, but
+    tracemalloc is process-wide, so one job is profiled at a time and
+    matching jobs that start meanwhile run unprofiled.
+    """
+
+    def __init__(self, directory, match='*', top=50):
+        self.directory = directory
+        self.match = match
+        self.top = top
+        self.lock = threading.Lock()
+        os.makedirs(directory, exist_ok=True)
+
+    @contextlib.contextmanager
+    def profile(self, job):
+        name = os.path.basename(job.file_path)
+        if not fnmatch.fnmatch(name, self.match) or not self.lock.acquire(blocking=False):
+            yield
+            return
+        prefix = os.path.join(self.directory, f"{time.strftime('%Y%m%d-%H%M%S')}-job{job.job_id}-{name}")
+        started_tracemalloc = not tracemalloc.is_tracing()
+        if started_tracemalloc:
+            tracemalloc.start(25)
+        tracemalloc.reset_peak()
+        profiler = cProfile.Profile()
+        try:
+            profiler.enable()
+        except ValueError as e:
+            logger.warning(f"cProfile unavailable for {name}: {str(e)}")
+            profiler = None
+        try:
+            yield
+        finally:
+            if profiler:
+                profiler.disable()
+            snapshot = tracemalloc.take_snapshot().filter_traces((
+                tracemalloc.Filter(False, cProfile.__file__),
+                tracemalloc.Filter(False, tracemalloc.__file__),
+            ))
+            current, peak = tracemalloc.get_traced_memory()
+            if started_tracemalloc:
+                tracemalloc.stop()
+            self.lock.release()
+            if profiler:
+                profiler.dump_stats(f"{prefix}.prof")
+            snapshot.dump(f"{prefix}.tracemalloc")
+            with open(f"{prefix}.tracemalloc.txt", 'w') as f:
+                f.write(f"Traced memory: {current} bytes, peak {peak} bytes\n")
+                for stat in snapshot.statistics('lineno')[:self.top]:
+                    f.write(f"{stat}\n")
+            logger.info(f"Profile of job {job.job_id} written to {prefix}.* (peak traced memory {peak} bytes)")
+
+
+class JobJournal:
+    """Crash-safe record of capture jobs, kept in SQLite (WAL mode).
+
+    Captures are moved out of the monitor directory into a spool
+    directory on intake, so a restart never sees them again as new files.
+    Each job moves through incoming -> claimed -> done/failed; jobs left
+    incoming or claimed by a crash are handed back by recover().
+    """
+
+    def __init__(self, db_path, spool_dir, max_attempts=3):
+        self.spool_dir = spool_dir
+        self.incoming_dir = os.path.join(spool_dir, 'incoming')
+        self.failed_dir = os.path.join(spool_dir, 'failed')
+        self.max_attempts = max_attempts
+        os.makedirs(self.incoming_dir, exist_ok=True)
+        os.makedirs(self.failed_dir, exist_ok=True)
+        os.makedirs(os.path.dirname(os.path.abspath(db_path)), exist_ok=True)
+        self.lock = threading.Lock()
+        self.conn = sqlite3.connect(db_path, check_same_thread=False)
+        self.conn.row_factory = sqlite3.Row
+        with self.lock, self.conn:
+            self.conn.execute("PRAGMA journal_mode=WAL")
+            self.conn.execute("PRAGMA synchronous=FULL")
+            self.conn.execute("""
+                CREATE TABLE IF NOT EXISTS jobs (
+                    job_id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    original_path TEXT NOT NULL,
+                    spool_path TEXT NOT NULL UNIQUE,
+                    state TEXT NOT NULL,
+                    priority INTEGER NOT NULL,
+                    attempts INTEGER NOT NULL DEFAULT 0,
+                    error TEXT,
+                    created_at REAL NOT NULL,
+                    updated_at REAL NOT NULL
+                )
+            """)
+            self.conn.execute("CREATE INDEX IF NOT EXISTS jobs_state ON jobs (state)")
+
+    def intake(self, file_path, prioritize):
+        """Move a capture into the spool and record it. Returns (job_id, spool_path, priority).
+
+        prioritize is called with the spool path once the file has been
+        moved, so anything it parses is cached under the path the worker
+        reads the capture from.
+        """
+        spool_path = os.path.join(self.incoming_dir, f"{uuid.uuid4().hex}-{os.path.basename(file_path)}")
+        shutil.move(file_path, spool_path)
+        priority = prioritize(spool_path)
+        job_id = self._insert(file_path, spool_path, priority)
+        return job_id, spool_path, priority
+
+    def claim(self, job_id):
+        self._update(job_id, 'claimed', attempts_increment=1)
+
+    def release(self, job_id):
+        """Return a claimed job to the queue to continue in another time slice."""
+        with self.lock, self.conn:
+            self.conn.execute(
+                "UPDATE jobs SET state = 'incoming', priority = ?, attempts = 0, updated_at = ? WHERE job_id = ?",
+                (JobScheduler.PRIORITY_CONTINUE, time.time(), job_id)
+            )
+
+    def interrupt(self, job_id):
+        """Hand back a job stopped by a clean shutdown; only crashes count against max_attempts."""
+        with self.lock, self.conn:
+            self.conn.execute(
+                "UPDATE jobs SET state = 'incoming', attempts = MAX(attempts - 1, 0), updated_at = ? WHERE job_id = ?",
+                (time.time(), job_id)
+            )
+
+    def finish(self, job_id, state, error=None):
+        """Mark a job done or failed and dispose of its spooled capture."""
+        with self.lock:
+            row = self.conn.execute("SELECT spool_path FROM jobs WHERE job_id = ?", (job_id,)).fetchone()
+        if row and os.path.exists(row['spool_path']):
+            if state == 'done':
+                os.remove(row['spool_path'])
+            else:
+                shutil.move(row['spool_path'], os.path.join(self.failed_dir, os.path.basename(row['spool_path'])))
+        self._update(job_id, state, error=error)
+
+    def recover(self):
+        """Return (job_id, spool_path, priority) for every job to requeue after a restart.
+
+        Jobs still claimed were cut off by a crash (a clean shutdown hands
+        them back through interrupt()); they are resumed unless they have
+        already used up max_attempts, which guards against a capture that
+        crashes the daemon every time. Spooled files without
+        a journal row (crash between move and insert) are adopted.
+        """
+        with self.lock:
+            rows = self.conn.execute(
+                "SELECT * FROM jobs WHERE state IN ('incoming', 'claimed') ORDER BY job_id"
+            ).fetchall()
+            known = {row[0] for row in self.conn.execute("SELECT spool_path FROM jobs")}
+
+        pending = []
+        for row in rows:
+            if not os.path.exists(row['spool_path']):
+                self._update(row['job_id'], 'failed', error="Spooled capture missing")
+            elif row['state'] == 'claimed' and row['attempts'] >= self.max_attempts:
+                logger.error(f"Job {row['job_id']} crashed the analysis {row['attempts']} times. Giving up.")
+                self.finish(row['job_id'], 'failed', error="Too many interrupted attempts")
+            else:
+                if row['state'] == 'claimed':
+                    logger.info(f"Resuming interrupted job {row['job_id']} for {row['original_path']}")
+                pending.append((row['job_id'], row['spool_path'], row['priority']))
+
+        for entry in sorted(os.scandir(self.incoming_dir), key=lambda e: e.stat().st_mtime):
+            if entry.path not in known:
+                job_id = self._insert(entry.path, entry.path, JobScheduler.PRIORITY_INTAKE)
+                pending.append((job_id, entry.path, JobScheduler.PRIORITY_INTAKE))
+        return pending
+
+    def prune(self, retention_days):
+        """Forget finished jobs older than retention_days."""
+        cutoff = time.time() - retention_days * 86400
+        with self.lock, self.conn:
+            self.conn.execute("DELETE FROM jobs WHERE state IN ('done', 'failed') AND updated_at < ?", (cutoff,))
+
+    def close(self):
+        with self.lock:
+            self.conn.close()
+
+    def _insert(self, original_path, spool_path, priority):
+        now = time.time()
+        with self.lock, self.conn:
+            cursor = self.conn.execute(
+                "INSERT INTO jobs (original_path, spool_path, state, priority, created_at, updated_at) "
+                "VALUES (?, ?, 'incoming', ?, ?, ?)",
+                (original_path, spool_path, priority, now, now)
+            )
+        return cursor.lastrowid
+
+    def _update(self, job_id, state, error=None, attempts_increment=0):
+        with self.lock, self.conn:
+            self.conn.execute(
+                "UPDATE jobs SET state = ?, error = ?, attempts = attempts + ?, updated_at = ? WHERE job_id = ?",
+                (state, error, attempts_increment, time.time(), job_id)
+            )
+
+
+class Job:
+    """A capture moving through the scheduler: queued -> running -> done/failed."""
+
+    def __init__(self, job_id, file_path, priority):
+        self.job_id = job_id
+        self.file_path = file_path
+        self.priority = priority
+        self.state = 'queued'
+        self.workspace = None
+        self.error = None
+        self.progress = None
+        self.capture = None       # CaptureKey once admitted for analysis
+        self.checkpoints = {}     # engine -> candidates tested, counted from the start of the wordlist
+        self.requeue = False      # continue from the checkpoint in another time slice
+        self.parked = False       # waiting for an identical capture until JobScheduler.resume()
+        self.submitted_at = time.time()
+        self.started_at = None
+        self.finished_at = None
+
+    def to_dict(self):
+        return {
+            'job_id': self.job_id,
+            'file': self.file_path,
+            'priority': self.priority,
+            'state': self.state,
+            'error': self.error,
+            'submitted_at': self.submitted_at,
+            'started_at': self.started_at,
+            'finished_at': self.finished_at,
+            'progress': self.progress._asdict() if self.progress else None,
+        }
+
+
+class JobScheduler:
+    """Priority queue of capture jobs processed by a pool of worker threads.
+
+    Every job gets its own scratch directory below `workspace_root`, which
+    is removed when the job finishes. The handler is called with the Job
+    and its return value is ignored; an exception marks the job failed.
+
+    With a batch handler, a worker that picks up a job also takes further
+    queued jobs, up to `batch_size` or until the first job has waited
+    `batch_latency` seconds, and hands them over together. The batch
+    handler returns {job_id: exception} for the jobs that did not complete.
+    Continuations (PRIORITY_CONTINUE) resume from a checkpoint and are
+    never batched. A job whose handler raises JobParked waits without a
+    worker until resume() queues it again.
+    """
+
+    PRIORITY_RETEST = 0
+    PRIORITY_INTAKE = 10
+    PRIORITY_CONTINUE = 20
+
+    def __init__(self, handler, workspace_root, workers=2, status_file=None, history=1000,
+                 batch_handler=None, batch_size=1, batch_latency=0):
+        self.handler = handler
+        self.workspace_root = workspace_root
+        self.worker_count = max(1, workers)
+        self.status_file = status_file
+        self.batch_handler = batch_handler
+        self.batch_size = max(1, batch_size)
+        self.batch_latency = batch_latency
+        self.queue = queue.PriorityQueue()
+        self.lock = threading.Lock()
+        self.active = {}
+        self.finished = collections.deque(maxlen=history)
+        self.threads = []
+        self.sequence = itertools.count(1)
+        self.last_status_write = 0
+        self.stopping = False
+
+    def start(self):
+        for i in range(self.worker_count):
+            thread = threading.Thread(target=self._worker, name=f"audit-worker-{i + 1}", daemon=True)
+            thread.start()
+            self.threads.append(thread)
+        logger.info(f"Job scheduler started with {self.worker_count} workers")
+
+    def stop(self):
+        """Let the workers exit once their current job is finished.
+
+        Jobs still waiting in the queue are not started; they stay in the
+        journal and are picked up again on the next start.
+        """
+        self.stopping = True
+        for _ in self.threads:
+            self.queue.put((float('inf'), next(self.sequence), None))
+
+    def join(self, timeout=None):
+        """Wait for the workers to exit. Returns False if some are still running after `timeout` seconds."""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        for thread in self.threads:
+            thread.join(None if deadline is None else max(0, deadline - time.monotonic()))
+        running = [thread.name for thread in self.threads if thread.is_alive()]
+        if running:
+            logger.warning(f"Workers still running after {timeout}s: {', '.join(running)}")
+        return not running
+
+    def submit(self, file_path, priority=PRIORITY_INTAKE, job_id=None):
+        """Queue a capture unless the same path is already queued or running."""
+        with self.lock:
+            if any(job.file_path == file_path for job in self.active.values()):
+                return None
+            job = Job(job_id or next(self.sequence), file_path, priority)
+            self.active[job.job_id] = job
+        self.queue.put((priority, job.job_id, job))
+        logger.info(f"Queued job {job.job_id} for {file_path} (priority {priority})")
+        self._write_status()
+        return job
+
+    def resume(self, job):
+        """Queue a parked job again."""
+        with self.lock:
+            job.parked = False
+            if job.state != 'waiting':
+                return   # Its worker has not settled it yet and queues it itself
+            job.state = 'queued'
+        self.queue.put((job.priority, next(self.sequence), job))
+        logger.info(f"Job {job.job_id} for {job.file_path} resumed")
+        self._write_status()
+
+    def status(self):
+        """Return job counts per state plus the queued and running jobs."""
+        with self.lock:
+            jobs = list(self.active.values())
+            finished = list(self.finished)
+        counts = collections.Counter(job.state for job in jobs + finished)
+        return {
+            'workers': self.worker_count,
+            'counts': {state: counts.get(state, 0)
+                       for state in ('queued', 'running', 'waiting', 'done', 'failed', 'interrupted')},
+            'jobs': [job.to_dict() for job in jobs],
+        }
+
+    def _worker(self):
+        while True:
+            _, _, job = self.queue.get()
+            if job is None or self.stopping:
+                return
+            if self.batch_handler and self.batch_size > 1 and job.priority != self.PRIORITY_CONTINUE:
+                jobs = self._collect_batch(job)
+                if len(jobs) > 1:
+                    self._run_batch(jobs)
+                    continue
+            self._run(job)
+
+    def _collect_batch(self, job):
+        jobs = [job]
+        deadline = job.submitted_at + self.batch_latency
+        while len(jobs) < self.batch_size:
+            try:
+                item = self.queue.get(timeout=max(0, deadline - time.time()))
+            except queue.Empty:
+                break
+            if item[2] is None or item[2].priority == self.PRIORITY_CONTINUE:
+                # Leave the stop marker for this worker's next round; a continuation
+                # resumes from its checkpoint on its own, which a batch session cannot
+                self.queue.put(item)
+                break
+            jobs.append(item[2])
+        return jobs
+
+    def _run(self, job):
+        self._start(job)
+        self._write_status()
+        error = None
+        try:
+            self.handler(job)
+        except Exception as e:
+            error = e
+        self._settle(job, error)
+
+    def _run_batch(self, jobs):
+        for job in jobs:
+            self._start(job)
+        self._write_status()
+        logger.info(f"Running jobs {', '.join(str(job.job_id) for job in jobs)} as one batch")
+        try:
+            errors = self.batch_handler(jobs) or {}
+        except Exception as e:
+            errors = {job.job_id: e for job in jobs}
+        for job in jobs:
+            self._settle(job, errors.get(job.job_id))
+
+    def _start(self, job):
+        job.state = 'running'
+        job.started_at = time.time()
+        job.workspace = tempfile.mkdtemp(prefix=f"job-{job.job_id}-", dir=self.workspace_root)
+
+    def _settle(self, job, error):
+        if isinstance(error, JobParked):
+            shutil.rmtree(job.workspace, ignore_errors=True)
+            with self.lock:
+                # Still parked, unless resume() came before this worker got here
+                resumed = not job.parked
+                job.state = 'queued' if resumed else 'waiting'
+            if resumed:
+                self.queue.put((job.priority, next(self.sequence), job))
+            else:
+                logger.info(f"Job {job.job_id} for {job.file_path} parked: {str(error)}")
+            self._write_status()
+            return
+        if error is None and job.requeue:
+            # Another time slice for a job that stopped at a checkpoint
+            job.requeue = False
+            job.state = 'queued'
+            job.priority = self.PRIORITY_CONTINUE
+            shutil.rmtree(job.workspace, ignore_errors=True)
+            self.queue.put((self.PRIORITY_CONTINUE, next(self.sequence), job))
+            logger.info(f"Job {job.job_id} for {job.file_path} requeued to continue from its checkpoint")
+            self._write_status()
+            return
+        if error is None:
+            job.state = 'done'
+        elif isinstance(error, JobInterrupted):
+            job.state = 'interrupted'
+            logger.info(f"Job {job.job_id} for {job.file_path} interrupted. It will resume on restart")
+        else:
+            job.state = 'failed'
+            job.error = str(error)
+            logger.error(f"Job {job.job_id} for {job.file_path} failed: {str(error)}")
+        job.finished_at = time.time()
+        shutil.rmtree(job.workspace, ignore_errors=True)
+        with self.lock:
+            self.active.pop(job.job_id, None)
+            self.finished.append(job)
+        self._write_status()
+
+    def update_progress(self, job, progress):
+        """Record engine progress for a running job; the status file is refreshed at most every 10 s."""
+        job.progress = progress
+        if time.monotonic() - self.last_status_write >= 10:
+            self._write_status()
+
+    def _write_status(self):
+        self.last_status_write = time.monotonic()
+        if not self.status_file:
+            return
+        try:
+            tmp_path = f"{self.status_file}.tmp"
+            with open(tmp_path, 'w') as f:
+                json.dump(self.status(), f, indent=2)
+            os.replace(tmp_path, self.status_file)
+        except OSError as e:
+            logger.error(f"Error writing status file {self.status_file}: {str(e)}")
+
+class EngineBenchmark:
+    """Per-host throughput of each analysis engine, cached in a JSON file.
+
+    The cache maps hostname to the measured candidates per second of
+    aircrack-ng and hashcat and when they were measured, so the "best"
+    engine strategy does not have to benchmark on every start.
+    """
+
+    def __init__(self, cache_path, hash_mode, max_age_days=7):
+        self.cache_path = cache_path
+        self.hash_mode = hash_mode
+        self.max_age = max_age_days * 86400
+        self.hostname = socket.gethostname()
+        self.lock = threading.Lock()
+        self.rates = None
+        self._load()
+
+    def is_stale(self):
+        return self.rates is None or time.time() - self.rates.get('measured_at', 0) > self.max_age
+
+    def preferred_engine(self):
+        """Return the faster engine, or None while no benchmark is available."""
+        with self.lock:
+            rates = self.rates
+        if not rates:
+            return None
+        aircrack, hashcat = rates.get('aircrack-ng') or 0, rates.get('hashcat') or 0
+        if not aircrack and not hashcat:
+            return None
+        return 'hashcat' if hashcat >= aircrack else 'aircrack-ng'
+
+    def measure(self, supervisor):
+        """Benchmark both engines and update the cache."""
+        logger.info("Benchmarking analysis engines")
+        rates = {'measured_at': time.time(), 'hash_mode': self.hash_mode}
+        try:
+            output = supervisor.run(['aircrack-ng', '-S'], timeout=120)
+            speeds = [float(m) * 1000 for m in re.findall(r'([\d.]+)\s*k/s', '\n'.join(output.output))]
+            rates['aircrack-ng'] = speeds[-1] if speeds else None
+        except OSError as e:
+            logger.warning(f"aircrack-ng benchmark failed: {str(e)}")
+            rates['aircrack-ng'] = None
+        try:
+            output = supervisor.run(['hashcat', '-b', '-m', str(self.hash_mode), '--machine-readable'], timeout=600)
+            rates['hashcat'] = self._parse_hashcat_benchmark(output.output) or None
+        except OSError as e:
+            logger.warning(f"hashcat benchmark failed: {str(e)}")
+            rates['hashcat'] = None
+        logger.info(f"Engine benchmark: aircrack-ng {rates['aircrack-ng']} c/s, hashcat {rates['hashcat']} c/s")
+        with self.lock:
+            self.rates = rates
+            self._save()
+        return rates
+
+    def _parse_hashcat_benchmark(self, lines):
+        """Sum the per-device speeds from machine-readable (device:mode:...:speed) lines."""
+        total = 0.0
+        for line in lines:
+            fields = line.split(':')
+            if len(fields) >= 3 and fields[1] == str(self.hash_mode):
+                try:
+                    total += float(fields[-1])
+                except ValueError:
+                    continue
+            else:
+                progress = parse_hashcat_progress(line)
+                if progress and progress.rate and not line.startswith('Speed.#*'):
+                    total += progress.rate
+        return total
+
+    def _load(self):
+        try:
+            with open(self.cache_path, 'r') as f:
+                rates = json.load(f).get(self.hostname)
+        except (OSError, ValueError):
+            return
+        if rates and rates.get('hash_mode') == self.hash_mode:
+            self.rates = rates
+
+    def _save(self):
+        try:
+            with open(self.cache_path, 'r') as f:
+                cache = json.load(f)
+        except (OSError, ValueError):
+            cache = {}
+        cache[self.hostname] = self.rates
+        try:
+            tmp_path = f"{self.cache_path}.tmp"
+            with open(tmp_path, 'w') as f:
+                json.dump(cache, f, indent=2)
+            os.replace(tmp_path, self.cache_path)
+        except OSError as e:
+            logger.error(f"Error writing benchmark cache {self.cache_path}: {str(e)}")
+
 class SecurityAuditTool:
-    def __init__(self, config_path="/etc/wifi_security_audit/config.ini", educational_mode=False):
-        """Initialize the SecurityAuditTool with configuration."""
+    def __init__(self, config_path="/etc/wifi_security_audit/config.ini", educational_mode=False,
+                 trace_file=None, profile_dir=None, profile_match='*'):
+        """Initialize the SecurityAuditTool with configuration.
+        
+        trace_file records a span tree of every job as a Chrome trace;
+        profile_dir enables cProfile/tracemalloc profiles of the jobs
+        whose capture name matches profile_match (see JobProfiler).
+        """
         self.config = self._load_config(config_path)
         self.monitor_dir = self.config.get('Directories', 'monitor_dir')
         self.wordlist_path = self.config.get('Directories', 'wordlist_path')
         self.auth_dir = self.config.get('Directories', 'auth_dir', fallback='/var/wifi_security_audit/auth')
+        self.result_store_path = self.config.get('Directories', 'result_store', fallback='/var/wifi_security_audit/results.db')
+        self.spool_dir = self.config.get('Directories', 'spool_dir', fallback='/var/wifi_security_audit/spool')
         self.temp_dir = tempfile.mkdtemp()
-        self.timeout = 3600  # 1 hour in seconds
         self.educational_mode = educational_mode
         
+        # Diagnostics; both are off unless requested on the command line
+        self.tracer = Tracer(trace_file) if trace_file else None
+        if self.tracer:
+            set_tracer(self.tracer)
+        self.profiler = JobProfiler(profile_dir, profile_match) if profile_dir else None
+        
+        # Analysis settings
+        self.timeout = self.config.getint('Analysis', 'timeout', fallback=3600)  # 1 hour in seconds
+        self.engine_strategy = self.config.get('Analysis', 'engine_strategy', fallback='sequential')
+        self.cpu_budget = self.config.getint('Analysis', 'cpu_budget', fallback=0)
+        self.benchmark_cache = self.config.get('Analysis', 'benchmark_cache', fallback='/var/wifi_security_audit/engine_benchmark.json')
+        self.benchmark_max_age_days = self.config.getint('Analysis', 'benchmark_max_age_days', fallback=7)
+        self.checkpoint_interval = self.config.getfloat('Analysis', 'checkpoint_interval', fallback=300.0)
+        self.max_slices = self.config.getint('Analysis', 'max_slices', fallback=1)
+        if self.engine_strategy not in ENGINE_STRATEGIES:
+            logger.warning(f"Unknown engine strategy '{self.engine_strategy}'. Using 'sequential'")
+            self.engine_strategy = 'sequential'
+        self.candidate_source = self.config.get('Analysis', 'candidate_source', fallback='wordlist')
+        self.generated_wordlist = None
+        if self.candidate_source == 'generator':
+            charsets = self.config.get('Generator', 'charsets', fallback='lowercase,digits')
+            try:
+                self.generated_wordlist = GeneratedWordlist(
+                    [name.strip() for name in charsets.split(',') if name.strip()],
+                    self.config.getint('Generator', 'min_length', fallback=8),
+                    self.config.getint('Generator', 'max_length', fallback=8),
+                    self.config.get('Generator', 'base_words', fallback='') or None,
+                    self.config.getboolean('Generator', 'patterns', fallback=True),
+                    self.config.get('Generator', 'rules', fallback='') or None)
+                logger.info(f"Candidates generated from spec ({self.generated_wordlist.count} candidates)")
+            except (OSError, ValueError) as e:
+                logger.error(f"Cannot use the candidate generator: {str(e)}. Using the wordlist")
+        elif self.candidate_source != 'wordlist':
+            logger.warning(f"Unknown candidate source '{self.candidate_source}'. Using 'wordlist'")
+        
+        # Monitoring settings
+        self.settle_time = self.config.getfloat('Monitoring', 'settle_time', fallback=2.0)
+        self.poll_interval = self.config.getfloat('Monitoring', 'poll_interval', fallback=5.0)
+        
+        # Processing settings
+        self.workers = self.config.getint('Processing', 'workers', fallback=2)
+        self.status_file = self.config.get('Processing', 'status_file', fallback='/var/wifi_security_audit/status.json')
+        self.journal_path = self.config.get('Processing', 'journal', fallback='/var/wifi_security_audit/jobs.db')
+        self.max_attempts = self.config.getint('Processing', 'max_attempts', fallback=3)
+        self.journal_retention_days = self.config.getint('Processing', 'journal_retention_days', fallback=30)
+        self.batch_size = self.config.getint('Processing', 'batch_size', fallback=1)
+        self.batch_latency = self.config.getfloat('Processing', 'batch_latency', fallback=60.0)
+        self.shutdown_timeout = self.config.getfloat('Processing', 'shutdown_timeout', fallback=30.0)
+        
         # Security settings
         self.require_authorization = self.config.getboolean('Security', 'require_authorization', fallback=True)
         self.audit_logging = self.config.getboolean('Security', 'audit_logging', fallback=True)
@@ -61,6 +2772,10 @@ class SecurityAuditTool:
         self.email_recipient = self.config.get('Email', 'recipient')
         self.email_server = self.config.get('Email', 'server')
         self.email_port = self.config.getint('Email', 'port')
+        self.email_digest = self.config.get('Email', 'digest', fallback='off').lower()
+        if self.email_digest not in ('off', 'reports', 'all'):
+            logger.warning(f"Unknown email digest mode '{self.email_digest}', digests disabled")
+            self.email_digest = 'off'
         
         # Ensure required tools are installed
         self._check_dependencies()
@@ -68,9 +2783,61 @@ class SecurityAuditTool:
         # Ensure the required directories exist
         os.makedirs(self.monitor_dir, exist_ok=True)
         os.makedirs(self.auth_dir, exist_ok=True)
+        self.auth_index = AuthorizationIndex(self.auth_dir)
         
         # Initialize audit log
-        self.audit_log = []
+        self.audit_sink = None
+        if self.audit_logging:
+            self.audit_sink = AuditSink(
+                self.config.get('Security', 'audit_log', fallback='/var/log/wifi_security_audit_events.jsonl'),
+                self.config.getfloat('Security', 'audit_fsync_interval', fallback=1.0),
+                self.config.getint('Security', 'audit_max_size_mb', fallback=100) * 1024 * 1024,
+                self.config.getint('Security', 'audit_max_age_days', fallback=30),
+                self.config.getint('Security', 'audit_backups', fallback=12),
+                self.config.getint('Security', 'audit_ring_size', fallback=1000),
+                AuditStore(self.config.get('Security', 'audit_store', fallback='/var/wifi_security_audit/audit.db')))
+        
+        # Assessment outcomes by capture fingerprint, and captures currently being analysed
+        # with the jobs of identical captures waiting for them
+        self.result_store = ResultStore(self.result_store_path)
+        self._inflight = {}
+        self._inflight_lock = threading.Lock()
+        
+        # Child processes (engines, conversion) and the job scheduler
+        self.supervisor = get_process_supervisor()
+        self.scheduler = None
+        self.watcher = None
+        
+        # Engine throughput for the "best" strategy, measured in the background when stale
+        self.engine_benchmark = EngineBenchmark(self.benchmark_cache, HASHCAT_MODE, self.benchmark_max_age_days)
+        if self.engine_strategy == 'best' and self.engine_benchmark.is_stale():
+            threading.Thread(target=self.engine_benchmark.measure, args=(self.supervisor,),
+                             name="engine-benchmark", daemon=True).start()
+        
+        # Persistent job queue
+        self.journal = JobJournal(self.journal_path, self.spool_dir, self.max_attempts)
+        
+        # Stage latencies, queue gauges and cache statistics for the metrics exporter
+        self.metrics = Metrics()
+        self.metrics.add_collector(self._collect_metrics)
+        self.metrics_exporter = MetricsExporter(
+            self.metrics,
+            self.config.get('Metrics', 'listen', fallback='') or None,
+            self.config.get('Metrics', 'textfile', fallback='') or None,
+            self.config.getfloat('Metrics', 'textfile_interval', fallback=15.0))
+        
+        # Persistent outbound mail queue with a pooled SMTP connection
+        self.mail_queue = MailQueue(
+            self.config.get('Email', 'queue', fallback='/var/wifi_security_audit/mail.db'),
+            self.email_server, self.email_port, self.email_sender, self.email_password, self.email_recipient,
+            starttls=self.config.getboolean('Email', 'starttls', fallback=True),
+            keepalive=self.config.getfloat('Email', 'keepalive', fallback=60.0),
+            idle_timeout=self.config.getfloat('Email', 'idle_timeout', fallback=300.0),
+            retry_base=self.config.getfloat('Email', 'retry_base', fallback=30.0),
+            retry_max=self.config.getfloat('Email', 'retry_max', fallback=3600.0),
+            max_attempts=self.config.getint('Email', 'max_attempts', fallback=10),
+            digest_interval=self.config.getfloat('Email', 'digest_interval', fallback=3600.0),
+            metrics=self.metrics)
         
         logger.info(f"SecurityAuditTool initialized. Monitoring directory: {self.monitor_dir}")
         self._log_audit_event("SYSTEM_INIT", "Security Audit Tool initialized")
@@ -83,7 +2850,9 @@ class SecurityAuditTool:
         config['Directories'] = {
             'monitor_dir': '/var/wifi_security_audit/handshakes',
             'wordlist_path': '/var/wifi_security_audit/wordlist.txt',
-            'auth_dir': '/var/wifi_security_audit/auth'
+            'auth_dir': '/var/wifi_security_audit/auth',
+            'result_store': '/var/wifi_security_audit/results.db',
+            'spool_dir': '/var/wifi_security_audit/spool'
         }
         
         config['Email'] = {
@@ -91,13 +2860,71 @@ class SecurityAuditTool:
             'password': 'your_password',
             'recipient': 'recipient@example.com',
             'server': 'mail.gmx.net',
-            'port': '587'
+            'port': '587',
+            'starttls': 'true',
+            'queue': '/var/wifi_security_audit/mail.db',
+            'keepalive': '60',
+            'idle_timeout': '300',
+            'retry_base': '30',
+            'retry_max': '3600',
+            'max_attempts': '10',
+            'digest': 'off',
+            'digest_interval': '3600'
         }
         
         config['Security'] = {
             'require_authorization': 'true',
             'audit_logging': 'true',
-            'local_network_only': 'true'
+            'local_network_only': 'true',
+            'audit_log': '/var/log/wifi_security_audit_events.jsonl',
+            'audit_fsync_interval': '1',
+            'audit_max_size_mb': '100',
+            'audit_max_age_days': '30',
+            'audit_backups': '12',
+            'audit_ring_size': '1000',
+            'audit_store': '/var/wifi_security_audit/audit.db'
+        }
+        
+        config['Metrics'] = {
+            'listen': '',
+            'textfile': '',
+            'textfile_interval': '15'
+        }
+        
+        config['Monitoring'] = {
+            'settle_time': '2',
+            'poll_interval': '5'
+        }
+        
+        config['Analysis'] = {
+            'timeout': '3600',
+            'engine_strategy': 'sequential',
+            'cpu_budget': '0',
+            'benchmark_cache': '/var/wifi_security_audit/engine_benchmark.json',
+            'benchmark_max_age_days': '7',
+            'checkpoint_interval': '300',
+            'max_slices': '1',
+            'candidate_source': 'wordlist'
+        }
+        
+        config['Generator'] = {
+            'charsets': 'lowercase,digits',
+            'min_length': '8',
+            'max_length': '8',
+            'base_words': '',
+            'patterns': 'true',
+            'rules': ''
+        }
+        
+        config['Processing'] = {
+            'workers': '2',
+            'status_file': '/var/wifi_security_audit/status.json',
+            'journal': '/var/wifi_security_audit/jobs.db',
+            'max_attempts': '3',
+            'journal_retention_days': '30',
+            'batch_size': '1',
+            'batch_latency': '60',
+            'shutdown_timeout': '30'
         }
         
         # Create config directory if it doesn't exist
@@ -134,30 +2961,9 @@ class SecurityAuditTool:
 
     def _log_audit_event(self, event_type, description, ssid=None, mac=None, result=None):
         """Log an audit event with detailed information."""
-        if not self.audit_logging:
+        if not self.audit_sink:
             return
-            
-        timestamp = datetime.datetime.now().isoformat()
-        username = getpass.getuser()
-        hostname = socket.gethostname()
-        
-        audit_entry = {
-            "timestamp": timestamp,
-            "user": username,
-            "hostname": hostname,
-            "event_type": event_type,
-            "description": description,
-            "ssid": ssid,
-            "mac_address": mac,
-            "result": result
-        }
-        
-        self.audit_log.append(audit_entry)
-        
-        # Write to the audit log file
-        with open("/var/log/wifi_security_audit_events.log", "a") as f:
-            f.write(f"{timestamp} | {username}@{hostname} | {event_type} | {description} | " +
-                   f"SSID:{ssid or 'N/A'} | MAC:{mac or 'N/A'} | Result:{result or 'N/A'}\n")
+        self.audit_sink.log(event_type, description, ssid, mac, result)
 
     def _check_authorization(self, file_path):
         """Check if there is a valid authorization for the network."""
@@ -168,24 +2974,11 @@ class SecurityAuditTool:
         ssid = self._extract_ssid(file_path)
         mac = self._extract_mac(file_path)
         
-        # Look for authorization files
-        auth_found = False
-        auth_file = None
-        
-        # Check for ssid-specific authorization
-        for filename in os.listdir(self.auth_dir):
-            if filename.lower().endswith('.auth'):
-                auth_file_path = os.path.join(self.auth_dir, filename)
-                with open(auth_file_path, 'r') as f:
-                    content = f.read()
-                    if ssid.lower() in content.lower() or (mac and mac.lower() in content.lower()):
-                        auth_found = True
-                        auth_file = auth_file_path
-                        break
-        
-        if auth_found:
+        document = self.auth_index.lookup(ssid, mac)
+        if document:
             logger.info(f"Authorization found for SSID: {ssid}")
-            self._log_audit_event("AUTHORIZATION_VALID", "Valid authorization found", ssid, mac, "AUTHORIZED")
+            self._log_audit_event("AUTHORIZATION_VALID", f"Valid authorization found in {os.path.basename(document.path)}",
+                                 ssid, mac, "AUTHORIZED")
             return True
         else:
             logger.warning(f"No authorization found for SSID: {ssid}. Analysis aborted.")
@@ -224,121 +3017,287 @@ class SecurityAuditTool:
             logger.error(f"Error checking local network: {str(e)}")
             return False
 
-    def _detect_file_type(self, file_path):
+    def _detect_file_type(self, file_path, job):
         """Detect the type of handshake file and convert if necessary."""
-        file_extension = os.path.splitext(file_path)[1].lower()
-        converted_path = None
-        
-        if file_extension in ['.cap', '.pcap', '.pcapng']:
-            # Convert to hccapx for hashcat
-            converted_path = os.path.join(self.temp_dir, "converted.hccapx")
-            try:
-                subprocess.run(
-                    ['cap2hccapx', file_path, converted_path],
-                    check=True, stdout=subprocess.PIPE, stderr=subprocess.PIPE
-                )
-                return 'hashcat', converted_path
-            except subprocess.CalledProcessError:
-                logger.warning("Failed to convert to hccapx. Trying aircrack-ng instead.")
-                return 'aircrack-ng', file_path
-        else:
-            # If unknown extension, try both tools
-            return 'aircrack-ng', file_path
+        # The native parser recognizes pcap, pcapng and hccapx by content, not extension
+        with self.metrics.time('conversion'), trace_span('conversion') as span:
+            converted_path = self._convert_to_hashes(file_path, job)
+            if span.recording and converted_path:
+                span.set(bytes_written=os.path.getsize(converted_path))
+        if converted_path:
+            return 'hashcat', converted_path
+        logger.warning("No handshake material for hashcat found. Trying aircrack-ng instead.")
+        return 'aircrack-ng', file_path
+    
+    def _convert_to_hashes(self, file_path, job):
+        """Write the capture's 22000 hash lines into the job workspace. Returns the path or None."""
+        hash_lines = capture_hash_lines(file_path)
+        if not hash_lines:
+            return None
+        converted_path = os.path.join(job.workspace, "converted.22000")
+        with open(converted_path, 'w') as f:
+            f.write('\n'.join(hash_lines) + '\n')
+        return converted_path
             
     def _extract_ssid(self, file_path):
         """Extract SSID from handshake file."""
-        try:
-            output = subprocess.run(
-                ['aircrack-ng', file_path],
-                check=True, stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True, timeout=30
-            )
-            
-            # Extract SSID from aircrack-ng output
-            ssid_match = re.search(r'SSID:\s+([^\n]+)', output.stdout)
-            if ssid_match:
-                return ssid_match.group(1).strip()
-            else:
-                logger.warning("Could not extract SSID from file.")
-                return "Unknown SSID"
-                
-        except (subprocess.CalledProcessError, subprocess.TimeoutExpired):
-            logger.warning("Failed to extract SSID. Using filename instead.")
+        metadata = parse_capture(file_path)
+        if metadata is None:
             return os.path.basename(file_path)
+        if not metadata.ssid:
+            return "Unknown SSID"
+        return metadata.ssid
 
     def _extract_mac(self, file_path):
         """Extract MAC address from handshake file."""
-        try:
-            output = subprocess.run(
-                ['aircrack-ng', file_path],
-                check=True, stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True, timeout=30
-            )
-            
-            # Extract BSSID (MAC) from aircrack-ng output
-            mac_match = re.search(r'BSSID:\s+([0-9A-F:]{17})', output.stdout, re.IGNORECASE)
-            if mac_match:
-                return mac_match.group(1).strip()
-            else:
-                logger.warning("Could not extract MAC address from file.")
-                return None
-                
-        except (subprocess.CalledProcessError, subprocess.TimeoutExpired):
-            logger.warning("Failed to extract MAC address.")
-            return None
+        metadata = parse_capture(file_path)
+        return metadata.bssid if metadata else None
 
-    def _analyze_with_aircrack(self, file_path):
-        """Analyze the handshake using aircrack-ng."""
+    def _analyze_with_aircrack(self, file_path, job):
+        """Analyze the handshake using aircrack-ng.
+        
+        Returns the key if found, None if the wordlist was exhausted and
+        False if the analysis failed or timed out.
+        """
+        args, kwargs = self._aircrack_command(file_path, job)
         try:
-            output = subprocess.run(
-                ['aircrack-ng', '-w', self.wordlist_path, file_path],
-                check=True, stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True, timeout=self.timeout
-            )
-            
-            # Extract password from aircrack-ng output
-            password_match = re.search(r'KEY FOUND!\s*\[\s*([^\]]+)\s*\]', output.stdout)
-            if password_match:
-                result = password_match.group(1).strip()
-                self._log_audit_event("SECURITY_ISSUE_FOUND", "Security vulnerability detected", 
-                                    self._extract_ssid(file_path), self._extract_mac(file_path), "WEAK_PASSWORD")
-                return result
-            else:
-                self._log_audit_event("SECURITY_ASSESSMENT", "Security assessment completed", 
-                                    self._extract_ssid(file_path), self._extract_mac(file_path), "NO_ISSUES_FOUND")
-                return None
-                
-        except (subprocess.CalledProcessError, subprocess.TimeoutExpired):
+            output = self._run_engine('aircrack-ng', job, args, kwargs)
+        except OSError as e:
+            logger.error(f"Aircrack-ng could not be started: {str(e)}")
+            return False
+        return self._aircrack_verdict(file_path, output)
+    
+    def _aircrack_command(self, file_path, job, cpus=None):
+        wordlist_args, wordlist_kwargs = self._wordlist_input([job], ['-'], 'aircrack-ng')
+        args = ['aircrack-ng', '-w', *wordlist_args]
+        bssid = self._extract_mac(file_path)
+        if bssid:
+            # Only the admitted network, even if the capture holds others
+            args += ['-b', bssid]
+        if cpus:
+            args += ['-p', str(len(cpus))]
+        args.append(file_path)
+        return args, {
+            'timeout': self.timeout,
+            'result_pattern': AIRCRACK_KEY_FOUND,
+            'progress_parser': parse_aircrack_progress,
+            'preexec_fn': self._cpu_affinity(cpus),
+            **wordlist_kwargs,
+        }
+    
+    def _aircrack_verdict(self, file_path, output):
+        # Extract password from aircrack-ng output
+        if output.match:
+            result = output.match.strip()
+            self._log_audit_event("SECURITY_ISSUE_FOUND", "Security vulnerability detected", 
+                                self._extract_ssid(file_path), self._extract_mac(file_path), "WEAK_PASSWORD")
+            return result
+        if output.timed_out or output.returncode != 0:
             logger.error("Aircrack-ng analysis failed or timed out")
-            return None
+            return False
+        self._log_audit_event("SECURITY_ASSESSMENT", "Security assessment completed", 
+                            self._extract_ssid(file_path), self._extract_mac(file_path), "NO_ISSUES_FOUND")
+        return None
 
-    def _analyze_with_hashcat(self, file_path):
-        """Analyze the handshake using hashcat."""
-        output_file = os.path.join(self.temp_dir, "hashcat_output.txt")
+    def _analyze_with_hashcat(self, file_path, job, capture_path):
+        """Analyze the converted handshake file_path of capture_path using hashcat.
         
+        Returns the key if found, None if the wordlist was exhausted and
+        False if the analysis failed or timed out.
+        """
+        args, kwargs = self._hashcat_command(file_path, job)
         try:
-            subprocess.run(
-                ['hashcat', '-m', '2500', '-a', '0', file_path, self.wordlist_path, '-o', output_file],
-                check=True, stdout=subprocess.PIPE, stderr=subprocess.PIPE, timeout=self.timeout
-            )
-            
-            # Check if output file exists and contains the password
-            if os.path.exists(output_file):
-                with open(output_file, 'r') as f:
-                    content = f.read().strip()
-                    if content:
-                        # Extract password from hashcat output
-                        password_match = re.search(r':(.*?)$', content)
-                        if password_match:
-                            result = password_match.group(1).strip()
-                            self._log_audit_event("SECURITY_ISSUE_FOUND", "Security vulnerability detected", 
-                                                self._extract_ssid(file_path), self._extract_mac(file_path), "WEAK_PASSWORD")
-                            return result
-            
-            self._log_audit_event("SECURITY_ASSESSMENT", "Security assessment completed", 
-                                self._extract_ssid(file_path), self._extract_mac(file_path), "NO_ISSUES_FOUND")
+            output = self._run_engine('hashcat', job, args, kwargs)
+        except OSError as e:
+            logger.error(f"Hashcat could not be started: {str(e)}")
+            return False
+        return self._hashcat_verdict(capture_path, job, output)
+    
+    def _hashcat_command(self, file_path, job, cpus=None):
+        output_file = os.path.join(job.workspace, "hashcat_output.txt")
+        wordlist_args, wordlist_kwargs = self._wordlist_input([job], [], 'hashcat')
+        args = ['hashcat', '-m', str(HASHCAT_MODE), '-a', '0', '--status', '--status-timer=10', '--machine-readable',
+                '--outfile-format=2', file_path, *wordlist_args, '-o', output_file]
+        return args, {
+            'timeout': self.timeout,
+            'progress_parser': parse_hashcat_progress,
+            'preexec_fn': self._cpu_affinity(cpus),
+            **wordlist_kwargs,
+        }
+    
+    def _compiled_wordlist(self):
+        """Return the generated candidate source, or the configured wordlist if it is compiled or compressed, else None."""
+        if self.generated_wordlist:
+            return self.generated_wordlist
+        try:
+            return open_wordlist(self.wordlist_path)
+        except (OSError, ValueError) as e:
+            logger.error(f"Error opening wordlist {self.wordlist_path}: {str(e)}")
             return None
-                
-        except (subprocess.CalledProcessError, subprocess.TimeoutExpired):
+    
+    def _wordlist_input(self, jobs, stdin_args, engine=None):
+        """Return (engine arguments, supervisor keyword arguments) for the wordlist.
+        
+        A compiled wordlist is streamed to the engine's stdin from its
+        memory map, a compressed one through its decompressor and
+        generated candidates straight from the generator (stdin_args
+        tells the engine to read stdin). Where the exact candidate count
+        is known, it is reported as the keyspace. For a single job run
+        by `engine`, the wordlist continues at the job's checkpoint, and
+        progress is checkpointed every checkpoint_interval seconds.
+        """
+        wordlist = self._compiled_wordlist()
+        skip = self._resume_offset(jobs[0], engine) if engine and len(jobs) == 1 else 0
+        last_checkpoint = [time.monotonic()]
+        
+        def progress_callback(progress):
+            progress = progress._replace(tested=progress.tested + skip if progress.tested is not None else None)
+            if wordlist and wordlist.count is not None:
+                progress = progress._replace(total=wordlist.count)
+            for job in jobs:
+                self._update_progress(job, progress)
+            if progress.rate is not None:
+                self.metrics.set('wifi_audit_engine_candidates_per_second', progress.rate, engine=engine or 'hashcat')
+            if engine and len(jobs) == 1:
+                if progress.tested is not None:
+                    jobs[0].checkpoints[engine] = progress.tested
+                if time.monotonic() - last_checkpoint[0] >= self.checkpoint_interval:
+                    last_checkpoint[0] = time.monotonic()
+                    self._save_checkpoint(jobs[0], engine)
+        
+        if wordlist is None and not skip:
+            return [self.wordlist_path], {'progress_callback': progress_callback}
+        return stdin_args, {
+            'stdin_source': wordlist.chunks(skip) if wordlist else text_wordlist_chunks(self.wordlist_path, skip),
+            'progress_callback': progress_callback,
+        }
+    
+    def _run_engine(self, engine, job, args, kwargs):
+        """Run an engine, checkpointing it when it times out or is interrupted."""
+        try:
+            with self.metrics.time('engine'), trace_span('engine', engine=engine) as span:
+                output = self.supervisor.run(args, **kwargs)
+                span.set(pid=output.pid, returncode=output.returncode, stdin_bytes=output.stdin_bytes,
+                         timed_out=output.timed_out)
+        except JobInterrupted:
+            self._save_checkpoint(job, engine)
+            raise
+        if output.timed_out:
+            self._save_checkpoint(job, engine, end_of_slice=True)
+        return output
+    
+    def _resume_offset(self, job, engine):
+        """Return the candidate offset an engine reached on this capture earlier, or 0."""
+        if job.capture is None:
+            return 0
+        checkpoint = self.result_store.checkpoint(job.capture.capture_fp, job.capture.wordlist_fp, engine)
+        if not checkpoint or not checkpoint[0]:
+            return 0
+        logger.info(f"Resuming {engine} at candidate {checkpoint[0]} (time slice {checkpoint[1] + 1})")
+        job.checkpoints[engine] = checkpoint[0]
+        return checkpoint[0]
+    
+    def _save_checkpoint(self, job, engine, end_of_slice=False):
+        """Persist how far an engine got; a timed-out slice requeues the job while slices remain."""
+        offset = job.checkpoints.get(engine)
+        if job.capture is None or not offset:
+            return
+        slices = self.result_store.save_checkpoint(job.capture.capture_fp, job.capture.wordlist_fp,
+                                                   engine, offset, end_of_slice)
+        logger.info(f"Checkpoint for {job.file_path}: {engine} at candidate {offset}")
+        if end_of_slice and slices < self.max_slices:
+            job.requeue = True
+    
+    def _hashcat_verdict(self, capture_path, job, output):
+        output_file = os.path.join(job.workspace, "hashcat_output.txt")
+        
+        # Exit code 0 means cracked, 1 means the wordlist was exhausted
+        if output.timed_out or output.returncode not in (0, 1):
             logger.error("Hashcat analysis failed or timed out")
+            return False
+        
+        # Check if output file exists and contains the password (one plain per cracked hash)
+        if os.path.exists(output_file):
+            with open(output_file, 'r') as f:
+                content = f.read().strip()
+                if content:
+                    result = content.splitlines()[0]
+                    if result:
+                        self._log_audit_event("SECURITY_ISSUE_FOUND", "Security vulnerability detected", 
+                                            self._extract_ssid(capture_path), self._extract_mac(capture_path), "WEAK_PASSWORD")
+                        return result
+        
+        self._log_audit_event("SECURITY_ASSESSMENT", "Security assessment completed", 
+                            self._extract_ssid(capture_path), self._extract_mac(capture_path), "NO_ISSUES_FOUND")
+        return None
+    
+    def _race_engines(self, file_path, hashcat_file, job):
+        """Run both engines at once on a split CPU budget; the first verdict wins.
+        
+        Returns (result, engine). A found key or an exhausted wordlist is a
+        verdict and cancels the other engine; a failure waits for the other.
+        """
+        cpus = sorted(os.sched_getaffinity(0))
+        if self.cpu_budget > 0:
+            cpus = cpus[:self.cpu_budget]
+        half = max(1, len(cpus) // 2)
+        aircrack_cpus, hashcat_cpus = cpus[:half], cpus[half:] or cpus[:half]
+        
+        engines = {}
+        started = time.perf_counter()
+        for engine, (args, kwargs), verdict in (
+            ('aircrack-ng', self._aircrack_command(file_path, job, aircrack_cpus),
+             lambda output: self._aircrack_verdict(file_path, output)),
+            ('hashcat', self._hashcat_command(hashcat_file, job, hashcat_cpus),
+             lambda output: self._hashcat_verdict(file_path, job, output)),
+        ):
+            engines[self.supervisor.submit(args, **kwargs)] = (engine, verdict)
+        
+        pending = set(engines)
+        try:
+            while pending:
+                done, pending = concurrent.futures.wait(pending, return_when=concurrent.futures.FIRST_COMPLETED)
+                for future in done:
+                    engine, verdict = engines[future]
+                    if future.cancelled():
+                        raise JobInterrupted(f"{engine} was cancelled")
+                    self.metrics.observe('engine', time.perf_counter() - started)
+                    try:
+                        output = future.result()
+                        if output.timed_out:
+                            self._save_checkpoint(job, engine, end_of_slice=True)
+                        engine_result = verdict(output)
+                    except OSError as e:
+                        logger.error(f"{engine} could not be started: {str(e)}")
+                        engine_result = False
+                    if engine_result is not False:
+                        logger.info(f"{engine} won the engine race for {file_path}")
+                        return engine_result, engine
+        except JobInterrupted:
+            for engine, _ in engines.values():
+                self._save_checkpoint(job, engine)
+            raise
+        finally:
+            for future in pending:
+                future.cancel()
+        return False, None
+    
+    @staticmethod
+    def _cpu_affinity(cpus):
+        """preexec_fn pinning an engine to its share of the CPU budget."""
+        if not cpus:
             return None
+        return lambda: os.sched_setaffinity(0, cpus)
+    
+    def _update_progress(self, job, progress):
+        """Progress callback for engine runs, merging partial updates."""
+        if job.progress:
+            progress = EngineProgress(*(new if new is not None else old
+                                        for new, old in zip(progress, job.progress)))
+        if self.scheduler:
+            self.scheduler.update_progress(job, progress)
+        else:
+            job.progress = progress
 
     def _generate_security_report(self, ssid, mac, result, analysis_duration):
         """Generate a comprehensive security report."""
@@ -394,143 +3353,477 @@ class SecurityAuditTool:
         
         return "\n".join(report)
 
-    def _send_email(self, ssid, result, analysis_duration=None):
-        """Send email with the security assessment results."""
+    def _send_email(self, ssid, result, analysis_duration=None, mac=None):
+        """Queue an email with the security assessment results.
+        
+        Delivery happens in the background through the mail queue. In
+        digest mode 'reports' only reports without findings are batched
+        into the periodic digest, in mode 'all' alerts are as well.
+        """
         try:
-            msg = MIMEMultipart()
-            msg['From'] = self.email_sender
-            msg['To'] = self.email_recipient
-            
             if result:
-                msg['Subject'] = f"WiFi Security Alert: {ssid}"
+                subject = f"WiFi Security Alert: {ssid}"
             else:
-                msg['Subject'] = f"WiFi Security Report: {ssid}"
+                subject = f"WiFi Security Report: {ssid}"
             
-            mac = self._extract_mac(self.current_file_path) if hasattr(self, 'current_file_path') else None
-            body = self._generate_security_report(ssid, mac, result, analysis_duration or 0)
-            msg.attach(MIMEText(body, 'plain'))
+            with self.metrics.time('report'), trace_span('report'):
+                body = self._generate_security_report(ssid, mac, result, analysis_duration or 0)
+            digest = self.email_digest == 'all' or (self.email_digest == 'reports' and not result)
+            with trace_span('email_queue', digest=digest):
+                self.mail_queue.enqueue(subject, body, digest)
             
-            server = smtplib.SMTP(self.email_server, self.email_port)
-            server.starttls()
-            server.login(self.email_sender, self.email_password)
-            text = msg.as_string()
-            server.sendmail(self.email_sender, self.email_recipient, text)
-            server.quit()
-            
-            logger.info(f"Email sent successfully for SSID: {ssid}")
+            logger.info(f"Email {'added to digest' if digest else 'queued'} for SSID: {ssid}")
             return True
             
         except Exception as e:
-            logger.error(f"Failed to send email: {str(e)}")
+            logger.error(f"Failed to queue email: {str(e)}")
             return False
 
-    def _process_handshake_file(self, file_path):
-        """Process a handshake file for security assessment."""
+    def _process_handshake_file(self, file_path, job=None):
+        """Process a handshake file for security assessment.
+        
+        Intermediate files are written to the job's workspace, which must
+        not be shared with concurrently running jobs. Without a job, the
+        tool's own temporary directory is used.
+        """
         logger.info(f"Processing handshake file: {file_path}")
-        self.current_file_path = file_path
+        if job is None:
+            job = Job(0, file_path, JobScheduler.PRIORITY_INTAKE)
+            job.workspace = self.temp_dir
+        
+        with trace_span('job', job_id=job.job_id, file=os.path.basename(file_path)) as span, \
+                (self.profiler.profile(job) if self.profiler else contextlib.nullcontext()):
+            settled, capture = self._admit_capture(file_path, job)
+            if capture is None:
+                span.set(outcome='settled' if settled else 'refused')
+                return settled
+            
+            try:
+                start_time = time.time()
+                result, engine = self._assess_capture(file_path, job)
+                analysis_duration = time.time() - start_time
+                job.requeue = job.requeue and result is False
+                self._record_assessment(file_path, capture, result, engine, analysis_duration, self.engine_strategy)
+            finally:
+                self._release_capture(capture)
+            span.set(engine=engine, requeue=job.requeue)
+            
+            if not job.requeue:
+                self._report_assessment(file_path, result, analysis_duration)
+            return True
+
+    def _admit_capture(self, file_path, job):
+        """Run the per-capture checks that precede an analysis.
+        
+        Returns (settled, capture). capture is a CaptureKey when the capture
+        needs an analysis; it is then registered as in flight until
+        _release_capture(). Otherwise settled is the processing result.
+        If an identical capture is in flight, the job is parked as its
+        follower and JobParked is raised; _release_capture() resumes it.
+        """
+        with self.metrics.time('metadata'), trace_span('metadata'):
+            metadata = parse_capture(file_path)
+            capture_fp = capture_fingerprint(file_path, metadata)
+        if self.generated_wordlist:
+            wordlist_fp = self.generated_wordlist.fingerprint
+        else:
+            wordlist_fp = wordlist_fingerprint(self.wordlist_path) or 'missing'
         
         # Check authorization
-        if not self._check_authorization(file_path):
+        with self.metrics.time('authorization'), trace_span('authorization'):
+            authorized = self._check_authorization(file_path)
+        if not authorized:
             logger.warning(f"Unauthorized analysis attempt for {file_path}. Skipping.")
-            return False
+            self.result_store.record(capture_fp, wordlist_fp, metadata, False)
+            return False, None
             
         # Check if it's a local network (if enabled)
         if self.local_network_only and not self._check_local_network(file_path):
             logger.warning(f"Non-local network in {file_path}. Additional authorization required.")
             self._log_audit_event("SECURITY_CHECK", "Non-local network requires additional authorization", 
                                  self._extract_ssid(file_path), self._extract_mac(file_path), "BLOCKED")
+            return False, None
+        
+        # Identical capture already assessed against this wordlist
+        if self._answer_from_store(file_path, capture_fp, wordlist_fp):
+            return True, None
+        
+        # Follow an identical capture that is currently being analysed
+        with self._inflight_lock:
+            followers = self._inflight.get(capture_fp)
+            if followers is None:
+                self._inflight[capture_fp] = []
+                job.capture = CaptureKey(metadata, capture_fp, wordlist_fp)
+                return True, job.capture
+            job.parked = True
+            followers.append(job)
+        logger.info(f"Identical capture already being analysed. Job {job.job_id} waits for its result: {file_path}")
+        raise JobParked(f"waiting for identical capture {capture_fp[:16]}")
+
+    def _release_capture(self, capture):
+        with self._inflight_lock:
+            followers = self._inflight.pop(capture.capture_fp)
+        for job in followers:
+            # Answered from the store now, or analysed on its own if the result was inconclusive
+            self.scheduler.resume(job)
+
+    def _record_assessment(self, file_path, capture, result, engine, analysis_duration, strategy):
+        # Inconclusive analyses (failures, timeouts) are not cached
+        outcome = None
+        if result:
+            outcome = "WEAK_PASSWORD"
+        elif result is None:
+            outcome = "NO_ISSUES_FOUND"
+        self.result_store.record(capture.capture_fp, capture.wordlist_fp, capture.metadata, True, outcome, analysis_duration)
+        self.result_store.record_verdict(capture.capture_fp, strategy, engine, analysis_duration, outcome)
+        if outcome:
+            self.result_store.clear_checkpoints(capture.capture_fp, capture.wordlist_fp)
+        logger.info(f"Time to verdict for {file_path}: {analysis_duration:.2f} s "
+                    f"({strategy} strategy, engine {engine or 'none'}, outcome {outcome or 'INCONCLUSIVE'})")
+
+    def _report_assessment(self, file_path, result, analysis_duration):
+        # Send email with results
+        ssid = self._extract_ssid(file_path)
+        mac = self._extract_mac(file_path)
+        if result:
+            logger.warning(f"Security vulnerability found for {ssid}")
+            self._send_email(ssid, result, analysis_duration, mac)
+        else:
+            logger.info(f"No immediate security issues found for {ssid}")
+            self._send_email(ssid, None, analysis_duration, mac)
+
+    def _answer_from_store(self, file_path, capture_fp, wordlist_fp):
+        """Answer a capture from an earlier assessment, if one exists."""
+        with trace_span('result_store'):
+            stored = self.result_store.lookup(capture_fp, wordlist_fp)
+        if not stored or not stored['outcome']:
+            self.metrics.inc('wifi_audit_cache_requests_total', cache='result_store', result='miss')
             return False
+        self.metrics.inc('wifi_audit_cache_requests_total', cache='result_store', result='hit')
         
-        # Extract SSID
         ssid = self._extract_ssid(file_path)
-        logger.info(f"Analyzing security for SSID: {ssid}")
+        logger.info(f"Capture for {ssid} already assessed at {stored['assessed_at']}: {stored['outcome']}")
+        self._log_audit_event("SECURITY_ASSESSMENT_CACHED", "Identical capture already assessed with this wordlist",
+                             ssid, self._extract_mac(file_path), stored['outcome'])
+        return True
+
+    def _assess_capture(self, file_path, job):
+        """Run the analysis engines on an authorized capture.
         
-        # Record start time for performance measurement
-        start_time = time.time()
+        Returns (result, engine), where engine produced the verdict.
+        """
+        ssid = self._extract_ssid(file_path)
+        logger.info(f"Analyzing security for SSID: {ssid}")
         
         # Detect file type and convert if necessary
-        tool, analysis_file = self._detect_file_type(file_path)
-        logger.info(f"Using {tool} with file {analysis_file}")
+        tool, analysis_file = self._detect_file_type(file_path, job)
+        logger.info(f"Using {tool} with file {analysis_file} ({self.engine_strategy} strategy)")
         
         # Start security assessment
         self._log_audit_event("SECURITY_ASSESSMENT_START", "Beginning security assessment", 
                              ssid, self._extract_mac(file_path))
+        wordlist = self._compiled_wordlist()
+        if wordlist and wordlist.count is not None:
+            logger.info(f"Keyspace: {wordlist.count} candidates (wordlist {wordlist.fingerprint[:16]})")
+            self._update_progress(job, EngineProgress(0, wordlist.count, None))
+        
+        if self.engine_strategy == 'race' and tool == 'hashcat':
+            return self._race_engines(file_path, analysis_file, job)
+        
+        if self.engine_strategy == 'best' and tool == 'hashcat':
+            preferred = self.engine_benchmark.preferred_engine()
+            if preferred == 'hashcat':
+                return self._analyze_with_hashcat(analysis_file, job, file_path), 'hashcat'
+            if preferred == 'aircrack-ng':
+                return self._analyze_with_aircrack(file_path, job), 'aircrack-ng'
+            logger.info("No engine benchmark available yet. Falling back to sequential strategy")
         
         # Try to analyze the security
-        result = None
+        results = []
         if tool == 'hashcat':
-            result = self._analyze_with_hashcat(analysis_file)
-            # If hashcat fails, try aircrack-ng
-            if result is None:
-                result = self._analyze_with_aircrack(file_path)
+            results.append(('hashcat', self._analyze_with_hashcat(analysis_file, job, file_path)))
+            # If hashcat fails, try aircrack-ng; None means the wordlist was exhausted
+            if results[-1][1] is False:
+                results.append(('aircrack-ng', self._analyze_with_aircrack(file_path, job)))
         else:
-            result = self._analyze_with_aircrack(file_path)
-            # If aircrack-ng fails, try to convert and use hashcat
-            if result is None:
-                converted_path = os.path.join(self.temp_dir, "converted.hccapx")
-                try:
-                    subprocess.run(
-                        ['cap2hccapx', file_path, converted_path],
-                        check=True, stdout=subprocess.PIPE, stderr=subprocess.PIPE
-                    )
-                    result = self._analyze_with_hashcat(converted_path)
-                except subprocess.CalledProcessError:
-                    logger.warning("Failed to convert for hashcat attempt")
-        
-        # Calculate analysis duration
-        analysis_duration = time.time() - start_time
+            # Without extractable handshake material only aircrack-ng can try
+            results.append(('aircrack-ng', self._analyze_with_aircrack(file_path, job)))
         
-        # Send email with results
-        if result:
-            logger.warning(f"Security vulnerability found for {ssid}")
-            self._send_email(ssid, result, analysis_duration)
-            return True
-        else:
-            logger.info(f"No immediate security issues found for {ssid}")
-            self._send_email(ssid, None, analysis_duration)
-            return True
+        # The key if any engine found it, None if an engine completed, else False
+        for engine, result in results:
+            if result:
+                return result, engine
+        for engine, result in results:
+            if result is None:
+                return None, engine
+        return False, None
 
     def monitor_directory(self):
         """Monitor directory for handshake files and process them."""
         logger.info(f"Starting to monitor directory for security assessments: {self.monitor_dir}")
         
-        while True:
-            try:
-                # Check for files in the directory
-                for filename in os.listdir(self.monitor_dir):
-                    file_path = os.path.join(self.monitor_dir, filename)
-                    
-                    # Skip directories
-                    if os.path.isdir(file_path):
-                        continue
-                        
-                    # Process the file
-                    success = self._process_handshake_file(file_path)
-                    
-                    # Remove the file after processing
-                    try:
-                        os.remove(file_path)
-                        logger.info(f"Removed file after assessment: {file_path}")
-                    except OSError as e:
-                        logger.error(f"Error removing file {file_path}: {str(e)}")
-                
-                # Wait 60 seconds before checking again
-                time.sleep(60)
+        self.scheduler = JobScheduler(self._run_job, self.temp_dir, self.workers, self.status_file,
+                                      batch_handler=self._run_batch, batch_size=self.batch_size,
+                                      batch_latency=self.batch_latency)
+        self.scheduler.start()
+        self.metrics_exporter.start()
+        if threading.current_thread() is threading.main_thread():
+            signal.signal(signal.SIGUSR1, lambda signum, frame: self._report_status())
+        
+        # Resume jobs interrupted by a crash or restart before taking new intake
+        self.journal.prune(self.journal_retention_days)
+        for job_id, spool_path, priority in self.journal.recover():
+            self.scheduler.submit(spool_path, priority, job_id)
+        
+        self.watcher = DirectoryWatcher(self.monitor_dir, self.settle_time, self.poll_interval)
+        for file_path in self.watcher.watch():
+            self._intake(file_path)
+    
+    def _intake(self, file_path):
+        """Spool a new capture and queue its job. Errors are logged so one bad file never ends intake."""
+        try:
+            job_id, spool_path, priority = self.journal.intake(file_path, self._job_priority)
+        except Exception as e:
+            # A capture already moved into the spool is adopted by recover() on the next start
+            logger.error(f"Error spooling {file_path}: {str(e)}")
+            return
+        self.scheduler.submit(spool_path, priority, job_id)
                 
+    def _collect_metrics(self):
+        """Metrics collector for the job and mail queues and the capture caches."""
+        samples = []
+        if self.scheduler:
+            counts = self.scheduler.status()['counts']
+            samples.extend(('wifi_audit_jobs', {'state': state}, counts[state]) for state in ('queued', 'running'))
+        pending = self.mail_queue.pending()
+        samples.extend(('wifi_audit_email_queue', {'state': state}, pending.get(state, 0))
+                       for state in ('queued', 'digest', 'failed'))
+        for cache, cached in (('capture_metadata', _parse_capture_cached), ('capture_digest', _content_digest)):
+            info = cached.cache_info()
+            samples.append(('wifi_audit_cache_requests_total', {'cache': cache, 'result': 'hit'}, info.hits))
+            samples.append(('wifi_audit_cache_requests_total', {'cache': cache, 'result': 'miss'}, info.misses))
+        return samples
+    
+    def _job_priority(self, file_path):
+        """Authorized re-tests of a known network run ahead of new intake."""
+        try:
+            metadata = parse_capture(file_path)
+            if (metadata and metadata.bssid and self.result_store.has_network(metadata.bssid)
+                    and self.auth_index.lookup(metadata.ssid, metadata.bssid)):
+                return JobScheduler.PRIORITY_RETEST
+        except Exception as e:
+            # The job itself reports the error when it reads the capture
+            logger.warning(f"Cannot prioritize {file_path}: {str(e)}")
+        return JobScheduler.PRIORITY_INTAKE
+    
+    def _run_job(self, job):
+        """Scheduler handler: assess one spooled capture in its own workspace."""
+        self.journal.claim(job.job_id)
+        self._complete_job(job, lambda: self._process_handshake_file(job.file_path, job))
+    
+    def _complete_job(self, job, process):
+        """Run a claimed job's processing and record its end in the journal."""
+        try:
+            process()
+        except JobInterrupted:
+            # Resumed from its checkpoint after the restart without using up an attempt
+            self.journal.interrupt(job.job_id)
+            raise
+        except JobParked:
+            # Not started; handed back so a restart before it is resumed picks it up
+            self.journal.interrupt(job.job_id)
+            raise
+        except Exception as e:
+            self.journal.finish(job.job_id, 'failed', str(e))
+            raise
+        
+        if job.requeue:
+            self.journal.release(job.job_id)
+            return
+        
+        # Remove the file after processing
+        try:
+            self.journal.finish(job.job_id, 'done')
+            logger.info(f"Removed file after assessment: {job.file_path}")
+        except OSError as e:
+            logger.error(f"Error removing file {job.file_path}: {str(e)}")
+    
+    def _run_batch(self, jobs):
+        """Scheduler batch handler: assess several spooled captures in one hashcat session.
+        
+        Authorization, the result store and duplicate detection stay per
+        capture; duplicates of a capture in flight are parked as on the
+        single-capture path. Captures without hash material and captures
+        the session leaves undecided go through the regular single-capture
+        path.
+        """
+        errors = {}
+        batch = []
+        individual = []
+        for job in jobs:
+            self.journal.claim(job.job_id)
+            try:
+                if not capture_hash_lines(job.file_path):
+                    individual.append(job)
+                    continue
+                settled, capture = self._admit_capture(job.file_path, job)
+            except JobParked as e:
+                self.journal.interrupt(job.job_id)
+                errors[job.job_id] = e
+                continue
+            except Exception as e:
+                self.journal.finish(job.job_id, 'failed', str(e))
+                errors[job.job_id] = e
+                continue
+            if capture is not None:
+                batch.append((job, capture))
+            else:
+                self.journal.finish(job.job_id, 'done')
+        
+        if batch:
+            try:
+                start_time = time.time()
+                results = self._analyze_batch_with_hashcat(batch)
+                analysis_duration = time.time() - start_time
+            except Exception as e:
+                for job, capture in batch:
+                    self._release_capture(capture)
+                    if isinstance(e, JobInterrupted):
+                        self.journal.interrupt(job.job_id)
+                    else:
+                        self.journal.finish(job.job_id, 'failed', str(e))
+                    errors[job.job_id] = e
+                batch = []
+        
+        for job, capture in batch:
+            try:
+                self._complete_job(job, lambda: self._conclude_batched(
+                    job, capture, results[job.job_id], analysis_duration))
+            except Exception as e:
+                errors[job.job_id] = e
+        for job in individual:
+            try:
+                self._complete_job(job, lambda: self._process_handshake_file(job.file_path, job))
             except Exception as e:
-                logger.error(f"Error in monitor loop: {str(e)}")
-                # Continue monitoring despite errors
-                time.sleep(60)
+                errors[job.job_id] = e
+        return errors
+    
+    def _analyze_batch_with_hashcat(self, batch):
+        """Crack the hash lines of several captures in one hashcat session.
+        
+        Hashes sharing an ESSID also share the PMK computation. Returns
+        {job_id: key, None if the wordlist was exhausted, False on failure}.
+        """
+        workspace = batch[0][0].workspace
+        hash_file = os.path.join(workspace, "batch.22000")
+        output_file = os.path.join(workspace, "hashcat_output.txt")
+        owners = {}
+        with open(hash_file, 'w') as f:
+            for job, capture in batch:
+                self._log_audit_event("SECURITY_ASSESSMENT_START", "Beginning security assessment (batched)", 
+                                     self._extract_ssid(job.file_path), self._extract_mac(job.file_path))
+                for line in capture_hash_lines(job.file_path):
+                    fields = line.split('*')
+                    key = (fields[2], fields[3], fields[4])
+                    if key not in owners:
+                        f.write(line + '\n')
+                    owners.setdefault(key, (bytes.fromhex(fields[5]), set()))[1].add(job.job_id)
+        logger.info(f"Running batched hashcat session for {len(batch)} captures ({len(owners)} hashes)")
+        
+        wordlist_args, wordlist_kwargs = self._wordlist_input([job for job, _ in batch], [])
+        args = ['hashcat', '-m', str(HASHCAT_MODE), '-a', '0', '--status', '--status-timer=10', '--machine-readable',
+                '--outfile-format=1,2', hash_file, *wordlist_args, '-o', output_file]
+        try:
+            with self.metrics.time('engine'), trace_span('engine', engine='hashcat', batch=len(batch)) as span:
+                output = self.supervisor.run(
+                    args, timeout=self.timeout, progress_parser=parse_hashcat_progress, **wordlist_kwargs
+                )
+                span.set(pid=output.pid, returncode=output.returncode, stdin_bytes=output.stdin_bytes,
+                         timed_out=output.timed_out)
+        except OSError as e:
+            logger.error(f"Hashcat could not be started: {str(e)}")
+            return {job.job_id: False for job, _ in batch}
+        if output.timed_out or output.returncode not in (0, 1):
+            logger.error("Batched hashcat session failed or timed out")
+            return {job.job_id: False for job, _ in batch}
+        
+        results = {job.job_id: None for job, _ in batch}
+        if os.path.exists(output_file):
+            with open(output_file, 'r', errors='replace') as f:
+                for line in f:
+                    # mic-or-pmkid:mac_ap:mac_sta:essid:plain
+                    fields = line.rstrip('\n').split(':', 3)
+                    if len(fields) < 4 or tuple(fields[:3]) not in owners:
+                        continue
+                    essid, job_ids = owners[tuple(fields[:3])]
+                    for prefix in (essid.decode('utf-8', errors='replace') + ':', f"$HEX[{essid.hex()}]:"):
+                        if fields[3].startswith(prefix):
+                            plain = fields[3][len(prefix):]
+                            break
+                    else:
+                        plain = fields[3].split(':', 1)[-1]
+                    for job_id in job_ids:
+                        results[job_id] = plain
+        return results
+    
+    def _conclude_batched(self, job, capture, result, analysis_duration):
+        """Record and report one capture's share of a batched session."""
+        file_path = job.file_path
+        try:
+            strategy, engine = 'batch', 'hashcat'
+            if result is False:
+                logger.info(f"Batched session gave no verdict for {file_path}. Assessing it on its own")
+                start_time = time.time()
+                result, engine = self._assess_capture(file_path, job)
+                analysis_duration += time.time() - start_time
+                strategy = self.engine_strategy
+                job.requeue = job.requeue and result is False
+            elif result:
+                self._log_audit_event("SECURITY_ISSUE_FOUND", "Security vulnerability detected", 
+                                    self._extract_ssid(file_path), self._extract_mac(file_path), "WEAK_PASSWORD")
+            else:
+                self._log_audit_event("SECURITY_ASSESSMENT", "Security assessment completed", 
+                                    self._extract_ssid(file_path), self._extract_mac(file_path), "NO_ISSUES_FOUND")
+            self._record_assessment(file_path, capture, result, engine, analysis_duration, strategy)
+        finally:
+            self._release_capture(capture)
+        if not job.requeue:
+            self._report_assessment(file_path, result, analysis_duration)
+    
+    def _report_status(self):
+        """Log the scheduler state (sent on SIGUSR1)."""
+        status = self.scheduler.status()
+        logger.info(f"Job status: {status['counts']}")
+        for job in status['jobs']:
+            logger.info(f"  Job {job['job_id']} [{job['state']}] {job['file']}")
                 
     def cleanup(self):
         """Clean up temporary files."""
+        if self.watcher:
+            self.watcher.stop()
+        if self.scheduler:
+            self.scheduler.stop()
+        self.supervisor.shutdown()
+        if self.scheduler:
+            # Workers save their checkpoints and journal state on the way out
+            self.scheduler.join(self.shutdown_timeout)
+        self.result_store.close()
+        self.journal.close()
+        self.metrics_exporter.stop()
+        self.mail_queue.close()
+        if self.audit_sink:
+            self.audit_sink.close()
+        if self.tracer:
+            set_tracer(None)
+            self.tracer.close()
         try:
             shutil.rmtree(self.temp_dir)
             logger.info("Cleaned up temporary directory")
         except OSError as e:
             logger.error(f"Error cleaning up temporary directory: {str(e)}")
 
-def run_as_daemon(pid_file, config_path, educational_mode=False):
+def run_as_daemon(pid_file, config_path, educational_mode=False, trace_file=None, profile_dir=None,
+                  profile_match='*'):
     """Run the SecurityAuditTool as a daemon."""
     with daemon.DaemonContext(
         pidfile=PIDLockFile(pid_file),
@@ -539,12 +3832,63 @@ def run_as_daemon(pid_file, config_path, educational_mode=False):
             signal.SIGINT: lambda signum, frame: sys.exit(0),
         }
     ):
-        audit_tool = SecurityAuditTool(config_path, educational_mode)
+        audit_tool = SecurityAuditTool(config_path, educational_mode, trace_file, profile_dir, profile_match)
         try:
             audit_tool.monitor_directory()
         finally:
             audit_tool.cleanup()
 
+def parse_query_time(value):
+    """argparse type for audit-query times: relative (90d, 12h, 30m, 2w) or an ISO date/time. Returns epoch seconds."""
+    units = {'m': 60, 'h': 3600, 'd': 86400, 'w': 7 * 86400}
+    match = re.fullmatch(r'(\d+(?:\.\d+)?)([mhdw])', value.strip())
+    if match:
+        return time.time() - float(match.group(1)) * units[match.group(2)]
+    try:
+        return datetime.datetime.fromisoformat(value.strip()).timestamp()
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"invalid time: {value} (use e.g. 90d, 12h or 2026-01-31)")
+
+
+def audit_query(args):
+    """Run the audit-query subcommand: print matching audit events or their counts."""
+    config = configparser.ConfigParser()
+    config.read(args.config)
+    store_path = args.store or config.get('Security', 'audit_store', fallback='/var/wifi_security_audit/audit.db')
+    if not os.path.exists(store_path):
+        print(f"No audit store at {store_path}", file=sys.stderr)
+        return 1
+    store = AuditStore(store_path, readonly=True)
+    filters = {name: getattr(args, name) for name in AuditStore.FILTERS}
+    group_by = [name.strip() for name in args.count_by.split(',')] if args.count_by else None
+    if group_by and any(name not in AuditStore.GROUPS for name in group_by):
+        print(f"--count-by accepts: {', '.join(AuditStore.GROUPS)}", file=sys.stderr)
+        return 1
+    try:
+        columns, rows = store.query(args.since, args.until, filters, args.search, group_by,
+                                    args.limit, not args.oldest_first)
+    except sqlite3.Error as e:
+        print(f"Audit store query failed: {str(e)}", file=sys.stderr)
+        return 1
+    finally:
+        store.close()
+    
+    if args.format == 'json':
+        json.dump([dict(zip(columns, row)) for row in rows], sys.stdout, indent=2)
+        sys.stdout.write('\n')
+    elif args.format == 'csv':
+        writer = csv.writer(sys.stdout)
+        writer.writerow(columns)
+        writer.writerows(rows)
+    else:
+        cells = [[str(value) if value is not None else '' for value in row] for row in rows]
+        widths = [max([len(column)] + [len(row[i]) for row in cells]) for i, column in enumerate(columns)]
+        print('  '.join(column.ljust(width) for column, width in zip(columns, widths)).rstrip())
+        for row in cells:
+            print('  '.join(value.ljust(width) for value, width in zip(row, widths)).rstrip())
+    return 0
+
+
 def main():
     """Main function to set up and run the SecurityAuditTool."""
     parser = argparse.ArgumentParser(description='WiFi Security Audit Tool')
@@ -552,12 +3896,40 @@ def main():
     parser.add_argument('--config', default='/etc/wifi_security_audit/config.ini', help='Path to configuration file')
     parser.add_argument('--pid-file', default='/var/run/wifi_security_audit.pid', help='Path to PID file when running as daemon')
     parser.add_argument('--educational', action='store_true', help='Run in educational mode with detailed reports')
+    parser.add_argument('--trace', metavar='FILE',
+                        help='Record a span tree of every job to FILE (Chrome trace JSON, opens in Perfetto)')
+    parser.add_argument('--profile', metavar='DIR', help='Write cProfile and tracemalloc profiles of jobs to DIR')
+    parser.add_argument('--profile-match', metavar='GLOB', default='*',
+                        help='Only profile jobs whose capture file name matches GLOB (default: all)')
+    subparsers = parser.add_subparsers(dest='command')
+    query_parser = subparsers.add_parser('audit-query', help='Search the indexed audit events')
+    query_parser.add_argument('--config', default=argparse.SUPPRESS, help='Path to configuration file')
+    query_parser.add_argument('--store', help='Audit store to query (default: audit_store from the configuration)')
+    query_parser.add_argument('--since', type=parse_query_time, help='Only events since this time (e.g. 90d, 12h, 2026-01-01)')
+    query_parser.add_argument('--until', type=parse_query_time, help='Only events before this time')
+    query_parser.add_argument('--event-type', action='append', help='Only this event type (repeatable)')
+    query_parser.add_argument('--ssid', action='append', help='Only this SSID (repeatable)')
+    query_parser.add_argument('--bssid', action='append', type=str.upper, help='Only this BSSID (repeatable)')
+    query_parser.add_argument('--result', action='append', help='Only this result (repeatable)')
+    query_parser.add_argument('--user', action='append', help='Only events of this user (repeatable)')
+    query_parser.add_argument('--hostname', action='append', help='Only events of this host (repeatable)')
+    query_parser.add_argument('--search', help='Only events whose description contains this text')
+    query_parser.add_argument('--count-by', metavar='FIELDS',
+                              help=f"Count events per comma-separated fields: {', '.join(AuditStore.GROUPS)}")
+    query_parser.add_argument('--limit', type=int, default=100, help='Maximum number of rows, 0 for all (default: 100)')
+    query_parser.add_argument('--oldest-first', action='store_true', help='List events in chronological order')
+    query_parser.add_argument('--format', choices=('table', 'json', 'csv'), default='table', help='Output format')
     args = parser.parse_args()
     
+    if args.command == 'audit-query':
+        sys.exit(audit_query(args))
+    
     if args.daemon:
-        run_as_daemon(args.pid_file, args.config, args.educational)
+        run_as_daemon(args.pid_file, args.config, args.educational,
+                      args.trace and os.path.abspath(args.trace), args.profile and os.path.abspath(args.profile),
+                      args.profile_match)
     else:
-        audit_tool = SecurityAuditTool(args.config, args.educational)
+        audit_tool = SecurityAuditTool(args.config, args.educational, args.trace, args.profile, args.profile_match)
         try:
             audit_tool.monitor_directory()
         except KeyboardInterrupt:
@@ -566,6 +3938,10 @@ def main():
             audit_tool.cleanup()
 
 if __name__ == "__main__":
+    # Queries only read the audit store; they skip the banner and consent and keep stdout clean for export
+    if 'audit-query' in sys.argv[1:]:
+        main()
+    
     print("""
     
     ===================================================================
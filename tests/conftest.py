@@ -0,0 +1,71 @@
+import os
+import sys
+import logging
+
+import pytest
+
+REPO_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, REPO_DIR)
+os.environ.setdefault('TQDM_DISABLE', '1')
+
+# Installed before the modules are imported, so their basicConfig leaves the
+# system log (/var/log/wifi_security_audit.log) alone; pytest captures the records
+logging.getLogger().addHandler(logging.NullHandler())
+logging.getLogger().setLevel(logging.INFO)
+
+
+def write_config(work_dir, **sections):
+    """Write a config.ini keeping every path of the audit tool below work_dir."""
+    wordlist = os.path.join(work_dir, 'wordlist.txt')
+    with open(wordlist, 'w') as f:
+        f.writelines(f"candidate{index:05d}\n" for index in range(100))
+    config = {
+        'Directories': {
+            'monitor_dir': f"{work_dir}/handshakes",
+            'wordlist_path': wordlist,
+            'auth_dir': f"{work_dir}/auth",
+            'result_store': f"{work_dir}/results.db",
+            'spool_dir': f"{work_dir}/spool",
+        },
+        'Email': {
+            'server': '127.0.0.1', 'port': '25', 'starttls': 'false', 'password': '',
+            'queue': f"{work_dir}/mail.db",
+        },
+        'Security': {
+            'local_network_only': 'false',
+            'audit_log': f"{work_dir}/audit_events.jsonl",
+            'audit_store': f"{work_dir}/audit.db",
+            'audit_fsync_interval': '0',
+        },
+        'Analysis': {'benchmark_cache': f"{work_dir}/engine_benchmark.json"},
+        'Processing': {'status_file': f"{work_dir}/status.json", 'journal': f"{work_dir}/jobs.db"},
+    }
+    for section, values in sections.items():
+        config.setdefault(section, {}).update(values)
+    config_path = os.path.join(work_dir, 'config.ini')
+    with open(config_path, 'w') as f:
+        for section, values in config.items():
+            f.write(f"[{section}]\n" + ''.join(f"{key} = {value}\n" for key, value in values.items()) + "\n")
+    return config_path
+
+
+@pytest.fixture
+def engine_stubs(tmp_path, monkeypatch):
+    """aircrack-ng and hashcat stand-ins that find nothing, so the tool starts without the real engines."""
+    bin_dir = tmp_path / 'bin'
+    os.makedirs(bin_dir)
+    for name in ('aircrack-ng', 'hashcat'):
+        path = bin_dir / name
+        path.write_text("#!/bin/sh\ncat > /dev/null\nexit 1\n")
+        path.chmod(0o755)
+    monkeypatch.setenv('PATH', f"{bin_dir}{os.pathsep}{os.environ.get('PATH', '')}")
+    return str(bin_dir)
+
+
+@pytest.fixture
+def audit_tool(tmp_path, engine_stubs):
+    import security_audit_tool as sat
+    os.makedirs(tmp_path / 'auth')
+    tool = sat.SecurityAuditTool(write_config(str(tmp_path)))
+    yield tool
+    tool.cleanup()
@@ -0,0 +1,131 @@
+"""Hashcat 22000 lines exported from native pcap/pcapng parsing."""
+
+import struct
+
+import pytest
+
+import security_audit_tool as sat
+
+AP_MAC = bytes.fromhex('001122334455')
+OTHER_AP_MAC = bytes.fromhex('020000000009')
+STATION_MAC = bytes.fromhex('66778899aabb')
+SNAP_EAPOL = bytes.fromhex('aaaa03000000888e')
+RSN_IE = bytes.fromhex('30140100000fac040100000fac040100000fac020000')
+ANONCE, SNONCE = b'\xaa' * 32, b'\xbb' * 32
+MIC, PMKID = b'\xcc' * 16, b'\x11' * 16
+
+
+def _beacon(ssid, bssid):
+    ies = bytes([0, len(ssid)]) + ssid.encode() + RSN_IE
+    return (b'\x80\x00\x00\x00' + b'\xff' * 6 + bssid + bssid + b'\x00\x00'
+            + bytes(8) + struct.pack('<HH', 100, 0x1111) + ies)
+
+
+def _eapol_key(key_info, nonce, replay_counter, mic=bytes(16), keydata=b''):
+    body = (bytes([2]) + struct.pack('>HHQ', key_info, 16, replay_counter) + nonce + bytes(16) + bytes(16)
+            + mic + struct.pack('>H', len(keydata)) + keydata)
+    return bytes([1, 3]) + struct.pack('>H', len(body)) + body
+
+
+def _from_ap(bssid, eapol):
+    return b'\x08\x02\x00\x00' + STATION_MAC + bssid + bssid + b'\x00\x00' + SNAP_EAPOL + eapol
+
+
+def _to_ap(bssid, eapol):
+    return b'\x08\x01\x00\x00' + bssid + STATION_MAC + bssid + b'\x00\x00' + SNAP_EAPOL + eapol
+
+
+def _m1(bssid=AP_MAC, pmkid=None):
+    keydata = b'\xdd\x14\x00\x0f\xac\x04' + pmkid if pmkid else b''
+    return _from_ap(bssid, _eapol_key(0x008a, ANONCE, 1, keydata=keydata))
+
+
+def _m2(bssid=AP_MAC):
+    return _to_ap(bssid, _eapol_key(0x010a, SNONCE, 1, MIC, RSN_IE))
+
+
+def _m3(bssid=AP_MAC):
+    return _from_ap(bssid, _eapol_key(0x13ca, ANONCE, 2, b'\xdd' * 16))
+
+
+def _write_pcap(path, frames):
+    with open(path, 'wb') as f:
+        f.write(struct.pack('<IHHiIII', 0xa1b2c3d4, 2, 4, 0, 0, 65535, sat.LINKTYPE_IEEE802_11))
+        for index, frame in enumerate(frames):
+            f.write(struct.pack('<IIII', 1700000000, index, len(frame), len(frame)) + frame)
+    return str(path)
+
+
+def _write_pcapng(path, frames):
+    def block(block_type, body):
+        body += bytes(-len(body) % 4)
+        return struct.pack('<II', block_type, len(body) + 12) + body + struct.pack('<I', len(body) + 12)
+
+    with open(path, 'wb') as f:
+        f.write(block(0x0A0D0D0A, struct.pack('<IHHq', 0x1A2B3C4D, 1, 0, -1)))
+        f.write(block(1, struct.pack('<HHI', sat.LINKTYPE_IEEE802_11, 0, 65535)))
+        for index, frame in enumerate(frames):
+            f.write(block(6, struct.pack('<IIIII', 0, 0, index, len(frame), len(frame)) + frame))
+    return str(path)
+
+
+def _prefix(bssid=AP_MAC, essid=b'HomeNet'):
+    return f"{bssid.hex()}*{STATION_MAC.hex()}*{essid.hex()}"
+
+
+def _m2_eapol():
+    """M2 as it goes into the hash line: the EAPOL frame with its MIC zeroed."""
+    return _eapol_key(0x010a, SNONCE, 1, bytes(16), RSN_IE).hex()
+
+
+@pytest.mark.parametrize('writer', [_write_pcap, _write_pcapng])
+def test_pmkid_and_m1_m2_lines(tmp_path, writer):
+    path = writer(tmp_path / 'capture', [_beacon('HomeNet', AP_MAC), _m1(pmkid=PMKID), _m2()])
+    assert sat.capture_hash_lines(path) == [
+        f"WPA*01*{PMKID.hex()}*{_prefix()}***",
+        f"WPA*02*{MIC.hex()}*{_prefix()}*{ANONCE.hex()}*{_m2_eapol()}*00",
+    ]
+
+
+def test_m2_m3_line(tmp_path):
+    path = _write_pcap(tmp_path / 'capture.cap', [_beacon('HomeNet', AP_MAC), _m2(), _m3()])
+    assert sat.capture_hash_lines(path) == [f"WPA*02*{MIC.hex()}*{_prefix()}*{ANONCE.hex()}*{_m2_eapol()}*02"]
+
+
+def test_no_line_without_essid(tmp_path):
+    path = _write_pcap(tmp_path / 'capture.cap', [_m1(pmkid=PMKID), _m2()])
+    assert sat.capture_hash_lines(path) == []
+
+
+def test_only_selected_network_is_exported(tmp_path):
+    frames = [_beacon('HomeNet', AP_MAC), _m1(pmkid=PMKID), _m2(),
+              _beacon('Neighbour', OTHER_AP_MAC), _m1(OTHER_AP_MAC, PMKID)]
+    path = _write_pcap(tmp_path / 'capture.cap', frames)
+    parser = sat.CaptureParser()
+    assert parser.parse(path).bssid == '00:11:22:33:44:55'
+    assert f"WPA*01*{PMKID.hex()}*{_prefix(OTHER_AP_MAC, b'Neighbour')}***" in parser.hash_lines()
+    assert sat.capture_hash_lines(path) == [
+        f"WPA*01*{PMKID.hex()}*{_prefix()}***",
+        f"WPA*02*{MIC.hex()}*{_prefix()}*{ANONCE.hex()}*{_m2_eapol()}*00",
+    ]
+
+
+def test_truncated_pcapng_block_falls_back_to_aircrack(tmp_path, monkeypatch):
+    path = _write_pcapng(tmp_path / 'capture.pcapng', [_beacon('HomeNet', AP_MAC), _m1(pmkid=PMKID)])
+    with open(path, 'ab') as f:
+        # An Enhanced Packet Block whose length leaves no room for its fixed fields
+        f.write(struct.pack('<III', 6, 16, 0) + struct.pack('<I', 16))
+    with pytest.raises(sat.CaptureFormatError):
+        sat.CaptureParser().parse(path)
+    probed = []
+    monkeypatch.setattr(sat, '_probe_with_aircrack', lambda file_path: probed.append(file_path))
+    assert sat.capture_hash_lines(path) == []
+    assert probed == [path]
+
+
+@pytest.mark.parametrize('cut', [30, 60])
+def test_pcap_cut_mid_record_keeps_complete_frames(tmp_path, cut):
+    path = _write_pcap(tmp_path / 'capture.cap', [_beacon('HomeNet', AP_MAC), _m1(pmkid=PMKID), _m2()])
+    with open(path, 'r+b') as f:
+        f.truncate(f.seek(0, 2) - cut)
+    assert sat.capture_hash_lines(path) == [f"WPA*01*{PMKID.hex()}*{_prefix()}***"]
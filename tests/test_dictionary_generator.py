@@ -0,0 +1,125 @@
+"""Streamed candidates must match the wordlist file written for the same spec."""
+
+import gzip
+
+import pytest
+
+import dictionary_generator as dg
+
+BASE_WORDS = ['12', 'ab', 'Wifi']
+
+
+@pytest.fixture
+def base_words_file(tmp_path):
+    path = tmp_path / 'base_words.txt'
+    path.write_text('\n'.join(BASE_WORDS) + '\n')
+    return str(path)
+
+
+def _candidates(path):
+    """Lines of a generated wordlist without its comment header."""
+    with open(path, 'rb') as f:
+        lines = f.read().split(b'\n')
+    while lines and (lines[0].startswith(b'#') or not lines[0]):
+        lines.pop(0)
+    return lines[:-1]
+
+
+def _write_wordlist(tmp_path, base_words_file, name='wordlist.txt', **options):
+    output = str(tmp_path / name)
+    count = dg.DictionaryGenerator().generate_wordlist(output, min_length=2, max_length=3, use_lowercase=False,
+                                                       use_digits=True, base_words_file=base_words_file,
+                                                       **options)
+    return output, count
+
+
+def _stream(skip=0, **options):
+    generator = dg.DictionaryGenerator()
+    charset = generator.build_charset(use_lowercase=False, use_digits=True)
+    chunks = generator.stream_wordlist(charset, 2, 3, BASE_WORDS, True, skip=skip, chunk_size=64, **options)
+    return b''.join(chunks).split(b'\n')[:-1]
+
+
+def test_stream_matches_file(tmp_path, base_words_file):
+    output, count = _write_wordlist(tmp_path, base_words_file)
+    candidates = _candidates(output)
+    assert len(candidates) == count
+    assert _stream() == candidates
+
+
+# Into and onto the ends of the base words (3), patterns (199), length 2 (299) and length 3 (1299)
+@pytest.mark.parametrize('skip', [1, 3, 150, 199, 250, 299, 1298, 1299])
+def test_stream_skip_matches_file_offset(tmp_path, base_words_file, skip):
+    output, _ = _write_wordlist(tmp_path, base_words_file)
+    assert _stream(skip=skip) == _candidates(output)[skip:]
+
+
+def test_sharded_file_matches_single_process(tmp_path, base_words_file):
+    single, _ = _write_wordlist(tmp_path, base_words_file, 'single.txt')
+    sharded, _ = _write_wordlist(tmp_path, base_words_file, 'sharded.txt', workers=2)
+    assert _candidates(sharded) == _candidates(single)
+
+
+def test_exact_dedup_keeps_first_occurrences(tmp_path, base_words_file):
+    plain, _ = _write_wordlist(tmp_path, base_words_file, 'plain.txt')
+    exact, count = _write_wordlist(tmp_path, base_words_file, 'exact.txt', dedup='exact')
+    unique = list(dict.fromkeys(_candidates(plain)))
+    assert len(unique) < len(_candidates(plain))
+    assert _candidates(exact) == unique
+    assert count == len(unique)
+
+
+def test_bloom_stream_matches_exact_dedup(tmp_path, base_words_file):
+    exact, _ = _write_wordlist(tmp_path, base_words_file, 'exact.txt', dedup='exact')
+    assert _stream(dedup=True) == _candidates(exact)
+
+
+def test_dedup_file_spills_runs(tmp_path):
+    path = tmp_path / 'words.txt'
+    lines = [f"word{i % 97:04d}".encode() for i in range(1000)]
+    path.write_bytes(b'\n'.join(lines) + b'\n')
+    removed = dg.DictionaryGenerator().dedup_file(str(path), memory_bytes=2048)
+    assert removed == 1000 - 97
+    assert path.read_bytes().split(b'\n')[:-1] == list(dict.fromkeys(lines))
+
+
+def test_compressed_wordlist_has_no_comment_header(tmp_path, base_words_file):
+    output, count = _write_wordlist(tmp_path, base_words_file, 'wordlist.txt.gz', compression='gzip',
+                                    compression_threads=1)
+    with gzip.open(output, 'rb') as f:
+        lines = f.read().split(b'\n')[:-1]
+    assert len(lines) == count
+    assert lines == _stream()
+
+
+@pytest.mark.parametrize('chunk_size', [1, 7, 4096])
+def test_strip_comment_header(chunk_size):
+    data = dg._comment_header().encode() + b'# more\npassword1\n# not a header\n'
+    chunks = [data[i:i + chunk_size] for i in range(0, len(data), chunk_size)]
+    assert b''.join(dg.strip_comment_header(chunks)) == b'password1\n# not a header\n'
+    assert b''.join(dg.strip_comment_header([dg._comment_header().encode()])) == b''
+
+
+class CountingGenerator(dg.DictionaryGenerator):
+    """Generator whose pattern phase records how far it has been expanded."""
+
+    def __init__(self, patterns):
+        super().__init__()
+        self.pattern_count = patterns
+        self.expanded = []
+
+    def _pattern_candidates(self, base_words):
+        self.expanded.append(0)
+        for index in range(self.pattern_count):
+            self.expanded[-1] += 1
+            yield f"pattern{index:06d}"
+
+
+@pytest.mark.parametrize('dedup', [False, True])
+def test_pattern_phase_is_streamed_lazily(dedup):
+    generator = CountingGenerator(100000)
+    charset = generator.build_charset(use_lowercase=False, use_digits=True)
+    chunks = generator.stream_wordlist(charset, 2, 3, BASE_WORDS, True, chunk_size=64, dedup=dedup)
+    assert generator.duplicates == 0   # Set before the stream is started
+    assert next(chunks).startswith(b'12\nab\nWifi\npattern000000\n')
+    assert generator.expanded[-1] < 1000
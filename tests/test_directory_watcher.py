@@ -0,0 +1,53 @@
+"""Files picked up from the monitored directory."""
+
+import os
+import threading
+import time
+
+import pytest
+
+import security_audit_tool as sat
+
+
+def _wait_until(condition, timeout=10):
+    deadline = time.time() + timeout
+    while not condition():
+        assert time.time() < deadline, "timed out"
+        time.sleep(0.01)
+
+
+@pytest.fixture
+def watching(tmp_path):
+    directory = tmp_path / 'handshakes'
+    directory.mkdir()
+    watcher = sat.DirectoryWatcher(str(directory), settle_time=0.05, poll_interval=0.05)
+    seen = []
+
+    def collect():
+        for path in watcher.watch():
+            seen.append(path)
+
+    thread = threading.Thread(target=collect, daemon=True)
+    thread.start()
+    _wait_until(lambda: watcher.inotify_fd is not None)
+    yield watcher, directory, seen
+    watcher.stop()
+    thread.join(5)
+
+
+def test_moved_out_files_are_forgotten(watching, tmp_path):
+    watcher, directory, seen = watching
+    done = tmp_path / 'done'
+    done.mkdir()
+    for index in range(20):
+        (directory / f'capture{index}.cap').write_bytes(b'capture')
+    _wait_until(lambda: len(watcher.yielded) == 20)
+    for index in range(10):
+        os.rename(directory / f'capture{index}.cap', done / f'capture{index}.cap')
+    for index in range(10, 20):
+        os.unlink(directory / f'capture{index}.cap')
+    _wait_until(lambda: not watcher.yielded)
+
+    # A new file under a reused name is picked up again
+    (directory / 'capture0.cap').write_bytes(b'capture')
+    _wait_until(lambda: seen.count(str(directory / 'capture0.cap')) == 2)
@@ -0,0 +1,24 @@
+"""Engine progress parsing and the checkpoints it feeds."""
+
+import pytest
+
+import security_audit_tool as sat
+
+
+@pytest.mark.parametrize('line, progress', [
+    ("[00:00:02] 4472/9822768 keys tested (2275.89 k/s)", sat.EngineProgress(4472, 9822768, 2275890.0)),
+    ("[00:00:02] 4472 keys tested (2275.89 k/s)", sat.EngineProgress(4472, None, 2275890.0)),
+    ("Opening capture", None),
+])
+def test_parse_aircrack_progress(line, progress):
+    assert sat.parse_aircrack_progress(line) == progress
+
+
+def test_stdin_progress_advances_resumed_checkpoint(audit_tool, tmp_path, monkeypatch):
+    job = sat.Job(1, str(tmp_path / 'capture.cap'), sat.JobScheduler.PRIORITY_CONTINUE)
+    monkeypatch.setattr(audit_tool, '_resume_offset', lambda job, engine: 40)
+    args, kwargs = audit_tool._wordlist_input([job], ['-'], 'aircrack-ng')
+    assert args == ['-']
+    assert b''.join(kwargs['stdin_source']).startswith(b'candidate00040\n')
+    kwargs['progress_callback'](sat.parse_aircrack_progress("[00:00:01] 25 keys tested (1.00 k/s)"))
+    assert job.checkpoints['aircrack-ng'] == 65
@@ -0,0 +1,96 @@
+"""Job journal recovery and intake of new captures."""
+
+import os
+import sqlite3
+
+import pytest
+
+import security_audit_tool as sat
+
+
+@pytest.fixture
+def journal(tmp_path):
+    journal = sat.JobJournal(str(tmp_path / 'jobs.db'), str(tmp_path / 'spool'), max_attempts=3)
+    yield journal
+    journal.close()
+
+
+def _capture(tmp_path, name='capture.cap'):
+    path = tmp_path / name
+    path.write_bytes(b'capture')
+    return str(path)
+
+
+def _reopen(journal, tmp_path):
+    journal.close()
+    return sat.JobJournal(str(tmp_path / 'jobs.db'), str(tmp_path / 'spool'), max_attempts=3)
+
+
+def test_clean_shutdowns_do_not_use_up_attempts(journal, tmp_path):
+    job_id, spool_path, _ = journal.intake(_capture(tmp_path), lambda path: sat.JobScheduler.PRIORITY_INTAKE)
+    for _ in range(5):
+        journal.claim(job_id)
+        journal.interrupt(job_id)
+    journal = _reopen(journal, tmp_path)
+    assert journal.recover() == [(job_id, spool_path, sat.JobScheduler.PRIORITY_INTAKE)]
+
+
+def test_capture_crashing_every_attempt_is_failed(journal, tmp_path):
+    job_id, spool_path, _ = journal.intake(_capture(tmp_path), lambda path: sat.JobScheduler.PRIORITY_INTAKE)
+    for attempt in range(3):
+        journal.claim(job_id)   # No interrupt(): the daemon crashed mid-analysis
+        journal = _reopen(journal, tmp_path)
+        pending = journal.recover()
+    assert pending == []
+    assert not os.path.exists(spool_path)
+    assert os.listdir(journal.failed_dir) == [os.path.basename(spool_path)]
+
+
+def test_spooled_file_without_journal_row_is_adopted(journal, tmp_path):
+    orphan = os.path.join(journal.incoming_dir, 'orphan.cap')
+    with open(orphan, 'wb') as f:
+        f.write(b'capture')
+    [(job_id, spool_path, priority)] = journal.recover()
+    assert (spool_path, priority) == (orphan, sat.JobScheduler.PRIORITY_INTAKE)
+
+
+class RecordingScheduler(sat.JobScheduler):
+    """Scheduler without workers that records what it is given."""
+
+    def __init__(self, workspace_root):
+        super().__init__(None, workspace_root)
+        self.submitted = []
+
+    def submit(self, file_path, priority, job_id):
+        self.submitted.append((file_path, priority, job_id))
+
+
+def test_intake_survives_unparsable_capture(audit_tool, tmp_path, monkeypatch):
+    audit_tool.scheduler = RecordingScheduler(str(tmp_path))
+
+    def broken_parse(file_path):
+        raise RuntimeError("parser bug")
+
+    monkeypatch.setattr(sat, 'parse_capture', broken_parse)
+    audit_tool._intake(_capture(tmp_path))
+    [(spool_path, priority, _)] = audit_tool.scheduler.submitted
+    assert priority == sat.JobScheduler.PRIORITY_INTAKE
+    assert os.path.dirname(spool_path) == audit_tool.journal.incoming_dir
+
+
+def test_intake_survives_journal_error(audit_tool, tmp_path, monkeypatch):
+    audit_tool.scheduler = RecordingScheduler(str(tmp_path))
+    insert = audit_tool.journal._insert
+
+    def locked(*args):
+        raise sqlite3.OperationalError("database is locked")
+
+    monkeypatch.setattr(audit_tool.journal, '_insert', locked)
+    audit_tool._intake(_capture(tmp_path, 'first.cap'))
+    assert audit_tool.scheduler.submitted == []
+    # Still spooled, so recover() adopts it on the next start
+    assert [name.endswith('-first.cap') for name in os.listdir(audit_tool.journal.incoming_dir)] == [True]
+
+    monkeypatch.setattr(audit_tool.journal, '_insert', insert)
+    audit_tool._intake(_capture(tmp_path, 'second.cap'))
+    assert len(audit_tool.scheduler.submitted) == 1
@@ -0,0 +1,151 @@
+"""Batching in the job scheduler and the batch handler of the audit tool."""
+
+import os
+import threading
+import time
+
+import security_audit_tool as sat
+
+
+def _run_scheduler(tmp_path, submit, expected_jobs):
+    runs = []
+    done = threading.Event()
+
+    def record(kind):
+        def handler(jobs):
+            runs.append((kind, [job.file_path for job in (jobs if kind == 'batch' else [jobs])]))
+            if sum(len(files) for _, files in runs) >= expected_jobs:
+                done.set()
+        return handler
+
+    scheduler = sat.JobScheduler(record('single'), str(tmp_path), workers=1, batch_handler=record('batch'),
+                                 batch_size=4, batch_latency=0.2)
+    submit(scheduler)
+    scheduler.start()
+    assert done.wait(5)
+    scheduler.stop()
+    scheduler.join(5)
+    return runs
+
+
+def test_continuation_is_not_batched(tmp_path):
+    def submit(scheduler):
+        scheduler.submit('continued.cap', sat.JobScheduler.PRIORITY_CONTINUE)
+        scheduler.submit('a.cap')
+        scheduler.submit('b.cap')
+
+    runs = _run_scheduler(tmp_path, submit, 3)
+    assert runs == [('batch', ['a.cap', 'b.cap']), ('single', ['continued.cap'])]
+
+
+def test_requeued_job_continues_on_its_own(tmp_path):
+    runs = []
+    done = threading.Event()
+
+    def handler(job):
+        runs.append(('single', job.file_path))
+        if job.file_path == 'slow.cap' and len(runs) == 1:
+            job.requeue = True   # Timed out at a checkpoint
+            scheduler.submit('new.cap')
+        elif job.file_path == 'slow.cap':
+            done.set()
+
+    def batch_handler(jobs):
+        runs.append(('batch', [job.file_path for job in jobs]))
+
+    scheduler = sat.JobScheduler(handler, str(tmp_path), workers=1, batch_handler=batch_handler,
+                                 batch_size=4, batch_latency=0)
+    scheduler.submit('slow.cap')
+    scheduler.start()
+    assert done.wait(5)
+    scheduler.stop()
+    scheduler.join(5)
+    assert runs == [('single', 'slow.cap'), ('single', 'new.cap'), ('single', 'slow.cap')]
+
+
+def test_batch_survives_unreadable_capture(audit_tool, tmp_path, monkeypatch):
+    jobs = []
+    for name in ('broken.cap', 'fine.cap'):
+        path = tmp_path / name
+        path.write_bytes(b'capture')
+        job_id, spool_path, priority = audit_tool.journal.intake(str(path), lambda path: 10)
+        jobs.append(sat.Job(job_id, spool_path, priority))
+
+    def hash_lines(file_path):
+        if file_path.endswith('broken.cap'):
+            raise RuntimeError("parser bug")
+        return []
+
+    processed = []
+    monkeypatch.setattr(sat, 'capture_hash_lines', hash_lines)
+    monkeypatch.setattr(audit_tool, '_process_handshake_file', lambda file_path, job: processed.append(job))
+    errors = audit_tool._run_batch(jobs)
+    assert list(errors) == [jobs[0].job_id]
+    assert processed == [jobs[1]]
+    states = dict(audit_tool.journal.conn.execute("SELECT job_id, state FROM jobs"))
+    assert states == {jobs[0].job_id: 'failed', jobs[1].job_id: 'done'}
+
+
+def _wait_until(condition, timeout=5):
+    deadline = time.time() + timeout
+    while not condition():
+        assert time.time() < deadline, "timed out"
+        time.sleep(0.01)
+
+
+def test_parked_job_waits_without_a_worker(tmp_path):
+    runs = []
+    parked = {}
+
+    def handler(job):
+        runs.append(job.file_path)
+        if runs.count(job.file_path) == 1 and job.file_path.startswith('parked'):
+            job.parked = True
+            parked[job.file_path] = job
+            if job.file_path == 'parked-resumed-early.cap':
+                scheduler.resume(job)   # The capture it waited for finished first
+            raise sat.JobParked("waiting")
+
+    scheduler = sat.JobScheduler(handler, str(tmp_path), workers=1)
+    for name in ('parked.cap', 'parked-resumed-early.cap', 'other.cap'):
+        scheduler.submit(name)
+    scheduler.start()
+    _wait_until(lambda: runs.count('parked-resumed-early.cap') == 2 and 'other.cap' in runs)
+    assert parked['parked.cap'].state == 'waiting'
+    assert scheduler.status()['counts']['waiting'] == 1
+
+    scheduler.resume(parked['parked.cap'])
+    _wait_until(lambda: runs.count('parked.cap') == 2)
+    scheduler.stop()
+    scheduler.join(5)
+    assert runs == ['parked.cap', 'parked-resumed-early.cap', 'other.cap', 'parked-resumed-early.cap', 'parked.cap']
+    assert scheduler.status()['counts']['done'] == 3
+
+
+def test_duplicate_capture_does_not_hold_a_worker(audit_tool, tmp_path, monkeypatch):
+    release = threading.Event()
+    assessed = []
+
+    def assess(file_path, job):
+        assessed.append(os.path.basename(file_path).split('-', 1)[1])
+        if len(assessed) == 1:
+            assert release.wait(5)
+        return None, 'hashcat'
+
+    monkeypatch.setattr(sat, 'parse_capture', lambda file_path: None)
+    monkeypatch.setattr(audit_tool, '_check_authorization', lambda file_path: True)
+    monkeypatch.setattr(audit_tool, '_assess_capture', assess)
+    monkeypatch.setattr(audit_tool, '_report_assessment', lambda *args: None)
+    audit_tool.scheduler = sat.JobScheduler(audit_tool._run_job, str(tmp_path), workers=2)
+    audit_tool.scheduler.start()
+    for name, content in (('a.cap', b'same'), ('b.cap', b'same'), ('other.cap', b'other')):
+        path = tmp_path / name
+        path.write_bytes(content)
+        audit_tool._intake(str(path))
+
+    # One of the identical captures is being analysed, the other is parked
+    _wait_until(lambda: 'other.cap' in assessed)
+    release.set()
+    _wait_until(lambda: set(dict(audit_tool.journal.conn.execute("SELECT job_id, state FROM jobs")).values())
+                == {'done'})
+    assert sorted(assessed) in (['a.cap', 'other.cap'], ['b.cap', 'other.cap'])
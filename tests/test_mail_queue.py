@@ -0,0 +1,83 @@
+"""Delivery of the outbound mail queue over a pooled SMTP connection."""
+
+import socket
+import threading
+import time
+
+import pytest
+
+import security_audit_tool as sat
+
+
+class SMTPStandIn:
+    """Minimal SMTP server that closes each connection after `per_connection` messages."""
+
+    def __init__(self, per_connection):
+        self.per_connection = per_connection
+        self.messages = []
+        self.connections = 0
+        self.listener = socket.create_server(('127.0.0.1', 0))
+        self.port = self.listener.getsockname()[1]
+        self.thread = threading.Thread(target=self._serve, daemon=True)
+        self.thread.start()
+
+    def _serve(self):
+        while True:
+            try:
+                conn, _ = self.listener.accept()
+            except OSError:
+                return
+            self.connections += 1
+            with conn, conn.makefile('rb') as reader:
+                self._session(conn, reader)
+
+    def _session(self, conn, reader):
+        conn.sendall(b'220 stand-in\r\n')
+        sent = 0
+        for line in reader:
+            command = line[:4].upper()
+            if command == b'QUIT':
+                conn.sendall(b'221 bye\r\n')
+                return
+            if command != b'DATA':
+                conn.sendall(b'250 ok\r\n')
+                continue
+            conn.sendall(b'354 go ahead\r\n')
+            data = b''.join(iter(reader.readline, b'.\r\n'))
+            self.messages.append(data)
+            conn.sendall(b'250 queued\r\n')
+            sent += 1
+            if sent == self.per_connection:
+                return   # As a server dropping an idle connection does
+
+    def close(self):
+        self.listener.close()
+
+
+@pytest.fixture
+def smtp_server():
+    server = SMTPStandIn(per_connection=1)
+    yield server
+    server.close()
+
+
+def _wait_until(condition, timeout=10):
+    deadline = time.time() + timeout
+    while not condition():
+        assert time.time() < deadline, "timed out"
+        time.sleep(0.01)
+
+
+def test_closed_pooled_connection_is_replaced_without_failure(smtp_server, tmp_path):
+    queue = sat.MailQueue(str(tmp_path / 'mail.db'), '127.0.0.1', smtp_server.port, 'audit@example.org', '',
+                          'admin@example.org', starttls=False)
+    try:
+        queue.enqueue('first', 'body')
+        _wait_until(lambda: not queue.pending() and len(smtp_server.messages) == 1)
+        queue.enqueue('second', 'body')
+        _wait_until(lambda: not queue.pending())
+        assert len(smtp_server.messages) == 2
+        assert smtp_server.connections == 2
+        assert queue.blocked_until == 0
+    finally:
+        queue.close()
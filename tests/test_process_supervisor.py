@@ -0,0 +1,50 @@
+"""Child processes fed from a stdin source and stopped early."""
+
+import threading
+import time
+
+import pytest
+
+import security_audit_tool as sat
+
+
+@pytest.fixture
+def supervisor():
+    supervisor = sat.ProcessSupervisor()
+    yield supervisor
+    supervisor.shutdown()
+
+
+def _slow_source(closed, delay=0.3):
+    try:
+        while True:
+            time.sleep(delay)   # Still producing when the run ends
+            yield b'candidate\n' * 1000
+    finally:
+        closed.set()
+
+
+def test_source_is_closed_after_early_result(supervisor):
+    closed = threading.Event()
+    result = supervisor.run(['sh', '-c', 'read line; echo "KEY FOUND! [ secret ]"; sleep 30'], timeout=20,
+                            result_pattern=sat.AIRCRACK_KEY_FOUND, stdin_source=_slow_source(closed))
+    assert result.match == 'secret'
+    assert closed.wait(5)
+
+
+def test_source_is_closed_after_timeout(supervisor):
+    closed = threading.Event()
+    result = supervisor.run(['sh', '-c', 'cat > /dev/null'], timeout=1, stdin_source=_slow_source(closed))
+    assert result.timed_out
+    assert result.stdin_bytes > 0
+    assert closed.wait(5)
+
+
+def test_source_error_is_reported_not_raised(supervisor, caplog):
+    def broken():
+        yield b'candidate\n'
+        raise ValueError("corrupt wordlist")
+
+    result = supervisor.run(['sh', '-c', 'cat > /dev/null; echo done'], timeout=20, stdin_source=broken())
+    assert result.output == ['done']
+    assert "corrupt wordlist" in caplog.text
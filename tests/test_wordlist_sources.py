@@ -0,0 +1,17 @@
+"""Wordlist sources the audit tool streams into the engines."""
+
+import gzip
+
+import security_audit_tool as sat
+
+HEADER = b"# Dictionary generated for authorized security assessment\n# with proper authorization.\n\n"
+
+
+def test_compressed_wordlist_skips_comment_header(tmp_path):
+    path = tmp_path / 'wordlist.txt.gz'
+    candidates = [f"password{index:03d}".encode() for index in range(300)]
+    with gzip.open(path, 'wb') as f:
+        f.write(HEADER + b'\n'.join(candidates) + b'\n')
+    wordlist = sat.CompressedWordlist(str(path), 'gzip')
+    assert b''.join(wordlist.chunks(chunk_size=64)).split(b'\n')[:-1] == candidates
+    assert b''.join(wordlist.chunks(skip=250, chunk_size=64)).split(b'\n')[:-1] == candidates[250:]